@@ -0,0 +1,27 @@
+from typing import Any, Literal
+
+from fastapi import APIRouter, Query
+
+from ..model.query_stats import QueryStatistics
+
+
+def bind_query_stats(router: APIRouter, statistics: QueryStatistics):
+    @router.get("/query_stats", description="按 SQL 指纹聚合的查询统计")
+    async def query_stats(
+        limit: int = Query(50, title="数量"),
+        order_by: Literal[
+            "total", "count", "mean", "p95", "p99", "max", "rows"
+        ] = Query("total", title="排序"),
+    ) -> dict[str, Any]:
+        return {
+            "shapes": len(statistics.shapes),
+            "evicted": statistics.evicted,
+            "data": statistics.top(limit, order_by),
+        }
+
+    @router.delete("/query_stats", description="重置查询统计")
+    async def reset_query_stats() -> str:
+        statistics.reset()
+        return ""
+
+    return query_stats, reset_query_stats
@@ -1,18 +1,28 @@
 import asyncio
+import hashlib
+import time
+from contextlib import asynccontextmanager
 from copy import copy
 from datetime import datetime
 from enum import IntEnum
+from functools import cache
 from typing import (
     TYPE_CHECKING,
     Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
     Callable,
     Coroutine,
     Generic,
+    Hashable,
     Iterable,
+    Iterator,
     Type,
     TypeVar,
     cast,
 )
+from weakref import WeakKeyDictionary
 
 import orjson
 from dateutil.parser import parse as parse_datetime
@@ -26,29 +36,50 @@ from fastapi import (
     Request,
     status,
 )
+from fastapi import Response as FastAPIResponse
+from fastapi.responses import StreamingResponse
+from fastapi.routing import APIRoute, serialize_response
+from fastapi.utils import create_model_field  # pyright: ignore[reportUnknownVariableType]
 from pydantic import BaseModel as PydanticBaseModel
 from pydantic import create_model
 from pypika_tortoise.functions import Count
 from pypika_tortoise.terms import Field as pikaField
 from pypika_tortoise.terms import Term
+from tortoise.backends.base.client import BaseDBAsyncClient
 from tortoise.expressions import Function, Q, RawSQL
+from tortoise.fields import JSONField
 from tortoise.fields.base import Field
 from tortoise.models import MetaInfo
 from tortoise.queryset import CountQuery, QuerySet
 
+from .. import metrics, tracing
 from ..model import BaseModel
-from ..model.functions import in_transaction
-from ..model.queryset import ValuesWithoutGroupByQuery
+from ..model.blob import Blob
+from ..model.fields import (
+    BlobDBField,
+    CompressedDBField,
+    LazyJSONDBField,
+    RawJSONFragments,
+    raw_json_fragments,
+)
+from ..model.functions import JSONExtract, check_json_path, in_transaction
+from ..model.queryset import ValuesWithoutGroupByQuery, default_projection
+from ..model.record import fetch_records
+from ..model.replica import replicas
+from ..model.search import Search
 from .exceptions import (
     HTTPForbiddenError,
     HTTPNotFoundError,
+    HTTPPayloadTooLargeError,
     HTTPPreconditionRequiredError,
 )
+from .responses import RawJSONResponse, blob_response
 
 UserModel = TypeVar("UserModel")
 Model = TypeVar("Model", bound=BaseModel)
 CreateForm = TypeVar("CreateForm", bound=PydanticBaseModel)
 UpdateForm = TypeVar("UpdateForm", bound=PydanticBaseModel)
+T = TypeVar("T")
 
 
 class ResourceMethod(IntEnum):
@@ -63,6 +94,39 @@ class DeleteResponse(PydanticBaseModel):
     id: str | int | None = None
 
 
+# 延迟生成的响应模型: 路由 endpoint -> 模型工厂, 随 endpoint 一同释放
+lazy_response_models: WeakKeyDictionary[Callable[..., Any], Callable[[], Any]] = (
+    WeakKeyDictionary()
+)
+
+
+def resolve_lazy_response_models(routes: Iterable[Any]):
+    """
+    为延迟模式注册的路由补全响应模型, 仅影响 OpenAPI 文档
+    """
+    for _ in iter_resolve_lazy_response_models(routes):
+        pass
+
+
+def iter_resolve_lazy_response_models(routes: Iterable[Any]) -> Iterator[APIRoute]:
+    """
+    逐个补全并产出路由, 便于在事件循环中分段执行
+    """
+    for route in routes:
+        if not isinstance(route, APIRoute) or route.response_model is not None:
+            continue
+        factory = lazy_response_models.get(route.endpoint)
+        if factory is None:
+            continue
+        route.response_model = factory()
+        route.response_field = create_model_field(
+            name=f"Response_{route.unique_id}",
+            type_=route.response_model,
+            mode="serialization",
+        )
+        yield route
+
+
 class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
     def __init__(
         self,
@@ -185,14 +249,10 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
     ) -> QuerySet[Model]:
         excludes = await self.excludes(method)
         if excludes:
-            model_meta = getattr(q.model, "_meta")
-            fields_db_projection: dict[str, Any] = (
-                getattr(model_meta, "fields_db_projection") if model_meta else {}
-            )
             include: set[str] = (
                 set(
                     getattr(q, "_fields_for_select", None)
-                    or fields_db_projection.keys()
+                    or default_projection(q.model)
                 )
                 - excludes
             )
@@ -207,6 +267,19 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
         method: ResourceMethod,
         prefetch: list[str],
         background_tasks: BackgroundTasks | None = None,
+        using_db: BaseDBAsyncClient | None = None,
+    ):
+        await self.fetch_related_list(
+            [obj], method, prefetch, background_tasks, using_db
+        )
+
+    async def fetch_related_list(
+        self,
+        objs: list[Model],
+        method: ResourceMethod,
+        prefetch: list[str],
+        background_tasks: BackgroundTasks | None = None,
+        using_db: BaseDBAsyncClient | None = None,
     ):
         excludes = await self.excludes(method)
         if excludes:
@@ -214,7 +287,10 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
             if not include_prefetch:
                 return
             prefetch = list(include_prefetch)
-        await obj.fetch_related(*prefetch, background_tasks=background_tasks)
+        with tracing.span("prefetch", rows=len(objs)):
+            await self.model.fetch_related_list(
+                objs, *prefetch, using_db=using_db, background_tasks=background_tasks
+            )
 
     async def before_create(
         self,
@@ -281,6 +357,16 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
     ) -> None:
         return None
 
+    async def run_hook(self, name: str, awaitable: Awaitable[T]) -> T:
+        start = time.perf_counter()
+        try:
+            with tracing.span(f"hook.{name}"):
+                return await awaitable
+        finally:
+            metrics.api_hook_duration.observe(
+                time.perf_counter() - start, self.model.__name__, name
+            )
+
     @classmethod
     def ids_path(cls):
         return Path(..., title="ID", description="支持采用 `1,2,3` 形式传入多个")
@@ -319,6 +405,43 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
         meta: MetaInfo = getattr(self.model, "_meta")
         return meta.default_connection
 
+    sticky_session_key = "_anyforce_written_at"
+
+    def sticky_key(self, user: UserModel, request: Request) -> Hashable | None:
+        key = getattr(user, "pk", user)
+        return key if isinstance(key, Hashable) else None
+
+    def mark_written(self, user: UserModel, request: Request):
+        if self.connection_name not in replicas.pools:
+            return
+        replicas.mark_written(self.connection_name, self.sticky_key(user, request))
+        if "session" in request.scope:
+            request.session[self.sticky_session_key] = datetime.now().timestamp()
+
+    @asynccontextmanager
+    async def write_transaction(
+        self, user: UserModel, request: Request
+    ) -> AsyncGenerator[BaseDBAsyncClient, None]:
+        """
+        写事务, 提交成功后才标记写入, 回滚时不影响之后读取使用的连接
+        """
+        async with in_transaction(self.connection_name) as connection:
+            yield connection
+        self.mark_written(user, request)
+
+    async def read_db(
+        self, user: UserModel, request: Request
+    ) -> BaseDBAsyncClient | None:
+        if self.connection_name not in replicas.pools:
+            return None
+        if "session" in request.scope:
+            written_at: float = request.session.get(self.sticky_session_key, 0)
+            if datetime.now().timestamp() - written_at < replicas.sticky_seconds:
+                return None
+        return replicas.db_for_read(
+            self.connection_name, self.sticky_key(user, request)
+        )
+
     async def get(
         self,
         ids: str,
@@ -326,21 +449,37 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
         user: UserModel,
         request: Request,
         method: ResourceMethod,
+        using_db: BaseDBAsyncClient | None = None,
     ):
-        normalize_ids = await asyncio.gather(
-            *[self.translate_id(user, id.strip(), request) for id in ids.split(",")]
-        )
-        q = await self.q(
-            user,
-            request,
-            self.model.filter(id__in=normalize_ids),
-            method,
+        # 按主键类型转换后去重, 如 "1,01" 只查询一条
+        pk = getattr(self.model, "_meta").pk
+        normalize_ids = list(
+            dict.fromkeys(
+                pk.to_python_value(id)
+                for id in await asyncio.gather(
+                    *[
+                        self.translate_id(user, id.strip(), request)
+                        for id in ids.split(",")
+                    ]
+                )
+            )
         )
+        with tracing.span("q"):
+            q = await self.q(
+                user,
+                request,
+                self.model.filter(id__in=normalize_ids).using_db(using_db),
+                method,
+            )
         if include:
             q = q.only(*include)
-        objs = await q.all()
+        with tracing.span("query"):
+            objs = await q.all()
         if len(objs) != len(normalize_ids):
             raise HTTPNotFoundError
+        # 按传入 ID 顺序返回
+        orders = {str(id): i for i, id in enumerate(normalize_ids)}
+        objs.sort(key=lambda obj: orders.get(str(obj.pk), 0))
         return objs
 
     async def translate_kv_condition(
@@ -381,10 +520,11 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
                 qs.append(iq)
                 continue
 
+            v = self.parse_condition_value(v)
+            q, k, v = self.translate_search(q, k, v, request)
+            q, k = self.translate_json_path(q, k, v)
             k = self.model.normalize_field(k)
-            v = await self.translate_condition(
-                user, q, k, self.parse_condition_value(v), request
-            )
+            v = await self.translate_condition(user, q, k, v, request)
             if isinstance(v, QuerySet):
                 q = cast(QuerySet[Model], v)
             elif isinstance(v, Q):
@@ -402,6 +542,95 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
         )
         return q, kv_q
 
+    def translate_search(
+        self, q: QuerySet[Model], k: str, v: Any, request: Request
+    ) -> tuple[QuerySet[Model], str, Any]:
+        """
+        `search` 条件使用模型声明的全文索引 (见 SearchIndex) 过滤,
+        按相关度排序时 (如 `order_by=-search_rank`) 同时计算 search_rank
+        """
+        fields_map = self.model.fields_map()
+        if k != "search" or not self.model.search_index or k in fields_map:
+            return q, k, v
+        text = str(v)
+        name = "_search_" + hashlib.sha1(text.encode()).hexdigest()[:12]
+        annotations: dict[str, Any] = {name: Search(self.model, text)}
+        if "search_rank" in (
+            o.lstrip("-") for o in request.query_params.getlist("order_by")
+        ):
+            annotations["search_rank"] = Search(self.model, text, rank=True)
+        return q.annotate(**annotations), name, True
+
+    # JSON 路径 -> 生成列字段名, 如 {"json_field.a.b": "json_field_a_b"},
+    # 常用路径可声明为带索引的生成列 (见 json_path_sql), 过滤时直接使用该列
+    json_paths: dict[str, str] = {}
+
+    json_path_operators = {
+        "not",
+        "in",
+        "not_in",
+        "gt",
+        "gte",
+        "lt",
+        "lte",
+        "range",
+        "isnull",
+        "not_isnull",
+        "contains",
+        "icontains",
+        "startswith",
+        "istartswith",
+        "endswith",
+        "iendswith",
+        "iexact",
+    }
+    json_field_operators = json_path_operators | {"contained_by", "filter"}
+
+    def translate_json_path(
+        self, q: QuerySet[Model], k: str, v: Any
+    ) -> tuple[QuerySet[Model], str]:
+        """
+        `json_field.a.b` / `json_field.a.b.in` 形式的条件转换为数据库的 JSON 路径提取
+        """
+        parts = k.replace("__", ".").split(".")
+        # 字段本身的运算符 (如 json_field.isnull) 保持原义, 至少有一级路径才视为路径
+        if len(parts) < 2 or (
+            len(parts) == 2 and parts[1] in self.json_field_operators
+        ):
+            return q, k
+        field = self.model.fields_map().get(parts[0])
+        if not isinstance(field, JSONField) or isinstance(field, CompressedDBField):
+            return q, k
+        op = parts[-1] if parts[-1] in self.json_path_operators else ""
+        path = parts[1:-1] if op else parts[1:]
+        check_json_path(path)
+        suffix = f"__{op}" if op else ""
+
+        column = self.json_paths.get(".".join([parts[0], *path]))
+        if column:
+            return q, column + suffix
+
+        # PostgreSQL 提取结果为文本, 按值的类型转换后比较
+        values = cast(list[Any], v) if isinstance(v, list) else [v]
+        sample = values[0] if values else None
+        json_cast = None
+        if op not in ("isnull", "not_isnull"):
+            if isinstance(sample, bool):
+                json_cast = "boolean"
+            elif isinstance(sample, (int, float)):
+                json_cast = "numeric"
+        name = (
+            "_json_"
+            + hashlib.sha1(repr((parts[0], path, json_cast)).encode()).hexdigest()[:12]
+        )
+        if name not in getattr(q, "_annotations"):
+            column = self.model.fields_db_projection()[parts[0]]
+            table = getattr(self.model, "_meta").basetable
+            q = q.annotate(
+                **{name: JSONExtract(pikaField(column, table=table), path, json_cast)}
+            )
+        return q, name + suffix
+
     @classmethod
     def parse_condition_value(cls, v: Any) -> Any:
         if isinstance(v, dict):
@@ -419,33 +648,134 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
                 pass
         return v
 
-    def bind(self, router: APIRouter):
+    lazy = False
+
+    # 列表查询返回只读记录 (Record) 而非 Model 实例, 见 compact_fields
+    compact = False
+
+    def compact_fields(
+        self, q: QuerySet[Model], prefetch: list[str]
+    ) -> tuple[str, ...] | None:
+        """
+        列表查询可以使用只读记录时返回查询的数据库字段, 否则返回 None
+
+        需要加载关系字段、select_related、prefetch_related 或 annotate 的查询仍使用 Model
+        """
+        if not self.compact:
+            return None
+        computed = self.model.PydanticMeta.computed
+        if any(field not in computed for field in prefetch):
+            return None
+        if any(
+            getattr(q, k, None)
+            for k in ("_select_related", "_prefetch_map", "_annotations")
+        ):
+            return None
+        projection = self.model.fields_db_projection()
+        fields: tuple[str, ...] = tuple(
+            getattr(q, "_fields_for_select", None) or default_projection(self.model)
+        )
+        if any(field not in projection for field in fields):
+            return None
+        return fields
+
+    def bind(self, router: APIRouter, lazy: bool | None = None):
         list_exclude: set[str] = set(self.model.PydanticMeta.list_exclude or [])
         if not TYPE_CHECKING:
             CreateForm = self.create_form
             UpdateForm = self.update_form
-        ListPydanticModel = self.model.list()
-        DetailPydanticModel = self.model.detail()
+        lazy = self.lazy if lazy is None else lazy
         table_description = getattr(
             getattr(self.model, "_meta", None), "table_description", ""
         )
 
-        DetailPydanticModels = list[DetailPydanticModel] | DetailPydanticModel
-        Response = create_model(
-            f"{self.model.__module__}.{self.model.__name__}.Response",
-            __base__=PydanticBaseModel,
-            total=(int, 0),
-            summary=(ListPydanticModel | None, ...),
-            data=(list[ListPydanticModel], ...),
+        model = self.model
+        raw_json = any(
+            isinstance(field, LazyJSONDBField) for field in model.fields_map().values()
         )
 
+        @cache
+        def ListPydanticModel() -> Type[PydanticBaseModel]:
+            return model.list()
+
+        @cache
+        def DetailPydanticModel() -> Type[PydanticBaseModel]:
+            return model.detail()
+
+        @cache
+        def DetailPydanticModels() -> Any:
+            return list[DetailPydanticModel()] | DetailPydanticModel()
+
+        @cache
+        def Response() -> Type[PydanticBaseModel]:
+            return create_model(
+                f"{model.__module__}.{model.__name__}.Response",
+                __base__=PydanticBaseModel,
+                total=(int, 0),
+                summary=(ListPydanticModel() | None, ...),
+                data=(list[ListPydanticModel()], ...),
+            )
+
+        def response_model(factory: Callable[[], Any]) -> Any:
+            # 延迟模式下注册路由时不生成模型, 首次请求或生成 OpenAPI 时再生成
+            return None if lazy else factory()
+
+        def lazy_route(factory: Callable[[], Any]):
+            if lazy:
+                route = router.routes[-1]
+                assert isinstance(route, APIRoute)
+                lazy_response_models[route.endpoint] = factory
+
+        # 本次 bind 的响应模型字段, 随路由一同释放
+        response_fields: dict[Callable[[], Any], Any] = {}
+
+        def response_field(factory: Callable[[], Any]) -> Any:
+            field = response_fields.get(factory)
+            if field is None:
+                field = response_fields[factory] = create_model_field(
+                    name=f"Response_{id(factory)}",
+                    type_=factory(),
+                    mode="serialization",
+                )
+            return field
+
+        async def respond(
+            factory: Callable[[], Any],
+            response: FastAPIResponse,
+            content: Any,
+            status_code: int = 200,
+        ) -> Any:
+            if not lazy and not raw_json:
+                return content
+            # 收集未解码的 JSON 字段原文, 由 RawJSONResponse 直接嵌入
+            fragments = RawJSONFragments()
+            token = raw_json_fragments.set(fragments)
+            try:
+                content = await serialize_response(
+                    field=response_field(factory),
+                    response_content=content,
+                    exclude_unset=True,
+                    exclude_none=True,
+                )
+            finally:
+                raw_json_fragments.reset(token)
+            # 与 FastAPI 序列化时一样, 保留依赖及 endpoint 在注入的 Response 上
+            # 设置的状态码、header 与 cookie
+            rs = RawJSONResponse(
+                content,
+                status_code=response.status_code or status_code,
+                fragments=fragments,
+            )
+            rs.headers.raw.extend(response.headers.raw)
+            return rs
+
         methods: dict[str, Callable[..., Any]] = {}
 
         if self.enable_create:
 
             @router.post(
                 "/",
-                response_model=DetailPydanticModels,
+                response_model=response_model(DetailPydanticModels),
                 status_code=status.HTTP_201_CREATED,
                 response_model_exclude_unset=True,
                 response_model_exclude_none=True,
@@ -454,22 +784,29 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
             async def create(
                 request: Request,
                 background_tasks: BackgroundTasks,
+                response: FastAPIResponse,
                 input: list[CreateForm] | CreateForm = self.get_form_type(
                     self.create_form
                 ),
                 prefetch: list[str] = self.prefetch_query(),
                 current_user: UserModel = Depends(self.get_current_user),
             ) -> Any:
-                async with in_transaction(self.connection_name):
+                async with self.write_transaction(current_user, request):
                     is_batch = isinstance(input, list)
                     inputs = input if is_batch else [input]
 
                     returns: list[PydanticBaseModel] = []
                     for input in inputs:
-                        input = await self.before_create(current_user, input, request)
+                        input = await self.run_hook(
+                            "before_create",
+                            self.before_create(current_user, input, request),
+                        )
                         raw, computed, m2ms = self.model.process(input)
-                        obj = await self.before_save(
-                            current_user, self.model(**raw), input, request
+                        obj = await self.run_hook(
+                            "before_save",
+                            self.before_save(
+                                current_user, self.model(**raw), input, request
+                            ),
                         )
                         await obj.save()
                         await obj.update_computed(computed)
@@ -479,8 +816,11 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
                                 obj, ResourceMethod.create, prefetch, background_tasks
                             )
 
-                        obj_rtn = await self.after_create(
-                            current_user, obj, input, request, background_tasks
+                        obj_rtn = await self.run_hook(
+                            "after_create",
+                            self.after_create(
+                                current_user, obj, input, request, background_tasks
+                            ),
                         )
 
                         if obj_rtn:
@@ -489,9 +829,15 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
                         if isinstance(obj, PydanticBaseModel):
                             returns.append(obj)
                         else:
-                            returns.append(DetailPydanticModel.model_validate(obj))
-                    return returns if is_batch else returns[0]
+                            returns.append(DetailPydanticModel().model_validate(obj))
+                    return await respond(
+                        DetailPydanticModels,
+                        response,
+                        returns if is_batch else returns[0],
+                        status.HTTP_201_CREATED,
+                    )
 
+            lazy_route(DetailPydanticModels)
             methods["create"] = create
 
         if self.enable_get:
@@ -546,7 +892,7 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
 
             @router.get(
                 "/",
-                response_model=Response,
+                response_model=response_model(Response),
                 response_model_exclude_unset=True,
                 response_model_exclude_none=True,
                 description=f"查询 {table_description} 列表",
@@ -554,6 +900,7 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
             async def index(
                 request: Request,
                 background_tasks: BackgroundTasks,
+                response: FastAPIResponse,
                 offset: int = Query(0, title="分页偏移"),
                 limit: int = Query(20, title="分页限额"),
                 include_summary: bool = Query(False, title="是否包含summary数据"),
@@ -568,45 +915,50 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
                 group_by: list[str] = self.group_by_query(),
                 current_user: UserModel = Depends(self.get_current_user),
             ) -> Any:
-                q = self.model.all()
+                db = await self.read_db(current_user, request)
+                q = self.model.all().using_db(db)
 
                 if not include and list_exclude:
-                    db_fields = set(self.model.fields_db_projection().keys())
+                    db_fields = set(default_projection(self.model))
                     include = list(db_fields - list_exclude)
                 if include:
                     q = q.only(*include)
 
-                q = await self.q(current_user, request, q, ResourceMethod.list)
+                with tracing.span("q"):
+                    q = await self.q(current_user, request, q, ResourceMethod.list)
 
                 # 通用过滤方案
                 # https://tortoise-orm.readthedocs.io/en/latest/query.html
                 if condition:
-                    for raw in condition:
-                        kv = orjson.loads(raw)
-                        q, iq = await self.translate_kv_condition(
-                            current_user, request, q, kv
-                        )
-                        q = q.filter(iq)
+                    with tracing.span("condition"):
+                        for raw in condition:
+                            kv = orjson.loads(raw)
+                            q, iq = await self.translate_kv_condition(
+                                current_user, request, q, kv
+                            )
+                            q = q.filter(iq)
 
                 summary: Model | None = None
                 include_summary = self.enable_summary and include_summary
                 if include_summary:
-                    objs = await self.grouping(current_user, q, include, [])
+                    with tracing.span("summary"):
+                        objs = await self.grouping(current_user, q, include, [])
                     if objs:
                         summary = objs[0]
 
-                if group_by:
-                    group_by_fields = ",".join(
-                        [f"COALESCE(`{field}`, '')" for field in group_by]
-                    )
-                    total_q = q.annotate(
-                        total=RawSQL(f"COUNT(DISTINCT {group_by_fields})")
-                    ).group_by()
-                    setattr(total_q, "_fields_for_select", tuple())
-                    r = await total_q.values("total")
-                    total = r[0]["total"] if r else 0
-                else:
-                    total = await DistinctCountQuery(q.count())
+                with tracing.span("count"):
+                    if group_by:
+                        group_by_fields = ",".join(
+                            [f"COALESCE(`{field}`, '')" for field in group_by]
+                        )
+                        total_q = q.annotate(
+                            total=RawSQL(f"COUNT(DISTINCT {group_by_fields})")
+                        ).group_by()
+                        setattr(total_q, "_fields_for_select", tuple())
+                        r = await total_q.values("total")
+                        total = r[0]["total"] if r else 0
+                    else:
+                        total = await DistinctCountQuery(q.count())
 
                 q = q.offset(offset).limit(limit)
                 if group_by:
@@ -619,30 +971,49 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
                         )
                     q = q.order_by(*orderings)
 
-                if group_by:
-                    objs = await self.grouping_q(q, group_by)
-                else:
-                    objs = await q
+                compact_fields = None if group_by else self.compact_fields(q, prefetch)
+                with tracing.span("query"):
+                    if group_by:
+                        objs = await self.grouping_q(q, group_by)
+                    elif compact_fields:
+                        objs = await fetch_records(
+                            q, compact_fields, self.model.PydanticMeta.computed
+                        )
+                    else:
+                        objs = await q
 
                 if prefetch:
-                    for obj in objs:
-                        await self.fetch_related(
-                            obj, ResourceMethod.list, prefetch, background_tasks
-                        )
+                    await self.fetch_related_list(
+                        objs, ResourceMethod.list, prefetch, background_tasks, db
+                    )
                     if summary:
                         await self.fetch_related(
-                            summary, ResourceMethod.list, prefetch, background_tasks
+                            summary,
+                            ResourceMethod.list,
+                            prefetch,
+                            background_tasks,
+                            db,
                         )
 
-                return Response(
-                    total=total,
-                    summary=summary and ListPydanticModel.model_validate(summary),
-                    data=[ListPydanticModel.model_validate(obj) for obj in objs],
-                )
+                with tracing.span("serialize", rows=len(objs)):
+                    return await respond(
+                        Response,
+                        response,
+                        Response()(
+                            total=total,
+                            summary=summary
+                            and ListPydanticModel().model_validate(summary),
+                            data=[
+                                ListPydanticModel().model_validate(obj) for obj in objs
+                            ],
+                        ),
+                    )
+
+            lazy_route(Response)
 
             @router.get(
-                "/{id}",
-                response_model=DetailPydanticModel,
+                "/{ids}",
+                response_model=response_model(DetailPydanticModels),
                 response_model_exclude_unset=True,
                 response_model_exclude_none=True,
                 description=f"查询指定 ID {table_description} 详情",
@@ -650,29 +1021,31 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
             async def get(
                 request: Request,
                 background_tasks: BackgroundTasks,
-                id: str = Path(..., title="id"),
+                response: FastAPIResponse,
+                ids: str = self.ids_path(),
                 include: list[str] = self.include_query(),
                 prefetch: list[str] = self.prefetch_query(),
                 current_user: UserModel = Depends(self.get_current_user),
             ) -> Any:
-                id = await self.translate_id(current_user, id, request)
-                q = await self.q(
-                    current_user,
-                    request,
-                    self.model.all().filter(id=id),
-                    ResourceMethod.get,
+                db = await self.read_db(current_user, request)
+                objs = await self.get(
+                    ids, include, current_user, request, ResourceMethod.get, db
                 )
-                if include:
-                    q = q.only(*include)
-                obj = await q.first()
-                if not obj:
-                    raise HTTPNotFoundError
                 if prefetch:
-                    await self.fetch_related(
-                        obj, ResourceMethod.get, prefetch, background_tasks
+                    await self.fetch_related_list(
+                        objs, ResourceMethod.get, prefetch, background_tasks, db
                     )
-                return DetailPydanticModel.model_validate(obj)
+                with tracing.span("serialize", rows=len(objs)):
+                    returns = [
+                        DetailPydanticModel().model_validate(obj) for obj in objs
+                    ]
+                return await respond(
+                    DetailPydanticModels,
+                    response,
+                    returns if len(returns) > 1 else returns[0],
+                )
 
+            lazy_route(DetailPydanticModels)
             methods["index"] = index
             methods["get"] = get
 
@@ -680,7 +1053,7 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
 
             @router.put(
                 "/{ids}",
-                response_model=DetailPydanticModels,
+                response_model=response_model(DetailPydanticModels),
                 response_model_exclude_unset=True,
                 response_model_exclude_none=True,
                 description=f"修改 / 更新特定 ID 的 {table_description}",
@@ -688,20 +1061,24 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
             async def update(
                 request: Request,
                 background_tasks: BackgroundTasks,
+                response: FastAPIResponse,
                 ids: str = self.ids_path(),
                 input: UpdateForm = self.get_form_type(self.update_form),
                 include: list[str] = self.include_query(),
                 prefetch: list[str] = self.prefetch_query(),
                 current_user: UserModel = Depends(self.get_current_user),
             ) -> Any:
-                async with in_transaction(self.connection_name):
+                async with self.write_transaction(current_user, request):
                     returns: list[Any] = []
                     excludes = await self.excludes(ResourceMethod.put)
                     for obj in await self.get(
                         ids, include, current_user, request, ResourceMethod.put
                     ):
-                        r = await self.before_update(
-                            current_user, obj, input, request, background_tasks
+                        r = await self.run_hook(
+                            "before_update",
+                            self.before_update(
+                                current_user, obj, input, request, background_tasks
+                            ),
                         )
                         if r:
                             obj = r
@@ -730,8 +1107,9 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
                             update_fields = raw.keys()
                             if update_fields:
                                 await obj.update(raw)
-                                obj = await self.before_save(
-                                    current_user, obj, raw, request
+                                obj = await self.run_hook(
+                                    "before_save",
+                                    self.before_save(current_user, obj, raw, request),
                                 )
                                 await obj.save(update_fields=update_fields)
 
@@ -740,13 +1118,16 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
                                     obj, ResourceMethod.put, prefetch, background_tasks
                                 )
 
-                            obj_rtn = await self.after_update(
-                                current_user,
-                                obj_obj,
-                                input,
-                                obj,
-                                request,
-                                background_tasks,
+                            obj_rtn = await self.run_hook(
+                                "after_update",
+                                self.after_update(
+                                    current_user,
+                                    obj_obj,
+                                    input,
+                                    obj,
+                                    request,
+                                    background_tasks,
+                                ),
                             )
                             if obj_rtn:
                                 obj = obj_rtn
@@ -754,10 +1135,15 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
                         returns.append(
                             obj
                             if isinstance(obj, PydanticBaseModel)
-                            else DetailPydanticModel.model_validate(obj)
+                            else DetailPydanticModel().model_validate(obj)
                         )
-                    return returns if len(returns) > 1 else returns[0]
+                    return await respond(
+                        DetailPydanticModels,
+                        response,
+                        returns if len(returns) > 1 else returns[0],
+                    )
 
+            lazy_route(DetailPydanticModels)
             methods["update"] = update
 
         if self.enable_delete:
@@ -775,26 +1161,159 @@ class API(Generic[UserModel, Model, CreateForm, UpdateForm]):
                 ids: str = self.ids_path(),
                 current_user: UserModel = Depends(self.get_current_user),
             ) -> list[DeleteResponse] | DeleteResponse:
-                async with in_transaction(self.connection_name):
+                async with self.write_transaction(current_user, request):
                     rs: list[DeleteResponse] = []
                     for obj in await self.get(
                         ids, [], current_user, request, ResourceMethod.delete
                     ):
-                        obj = await self.before_delete(current_user, obj, request)
+                        obj = await self.run_hook(
+                            "before_delete",
+                            self.before_delete(current_user, obj, request),
+                        )
                         await obj.delete()
-                        await self.after_delete(
-                            current_user, obj, request, background_tasks
+                        await self.run_hook(
+                            "after_delete",
+                            self.after_delete(
+                                current_user, obj, request, background_tasks
+                            ),
                         )
                         rs.append(DeleteResponse(id=obj.id))
                     return len(rs) > 1 and rs or rs[0]
 
             methods["delete"] = delete
 
+        blob_fields: dict[str, BlobDBField] = {
+            k: field
+            for k, field in model.fields_map().items()
+            if isinstance(field, BlobDBField)
+        }
+
+        async def get_blob_field(method: ResourceMethod, field: str) -> BlobDBField:
+            blob_field = blob_fields.get(field)
+            if blob_field is None:
+                raise HTTPNotFoundError
+            excludes = await self.excludes(method)
+            if excludes and field in excludes:
+                raise HTTPForbiddenError
+            return blob_field
+
+        if blob_fields and self.enable_get:
+
+            @router.get(
+                "/{id}/{field}",
+                response_class=StreamingResponse,
+                description=f"下载 {table_description} 文件, 支持 Range",
+            )
+            async def download(
+                request: Request,
+                id: str = Path(..., title="ID"),
+                field: str = Path(
+                    ..., title="字段", description=", ".join(blob_fields)
+                ),
+                current_user: UserModel = Depends(self.get_current_user),
+            ) -> Any:
+                blob_field = await get_blob_field(ResourceMethod.get, field)
+                db = await self.read_db(current_user, request)
+                objs = await self.get(
+                    id, [], current_user, request, ResourceMethod.get, db
+                )
+                if len(objs) != 1:
+                    raise HTTPNotFoundError
+                blob: Blob | None = getattr(objs[0], field, None)
+                if blob is None:
+                    raise HTTPNotFoundError
+                return blob_response(
+                    request, blob_field.store, blob, blob_field.media_type
+                )
+
+            methods["download"] = download
+
+        if blob_fields and self.enable_update:
+
+            @router.put(
+                "/{id}/{field}",
+                response_model=Blob,
+                description=f"上传 {table_description} 文件, 请求体为文件内容",
+                openapi_extra={
+                    "requestBody": {
+                        "required": True,
+                        "content": {
+                            "application/octet-stream": {
+                                "schema": {"type": "string", "format": "binary"}
+                            }
+                        },
+                    }
+                },
+            )
+            async def upload(
+                request: Request,
+                background_tasks: BackgroundTasks,
+                id: str = Path(..., title="ID"),
+                field: str = Path(
+                    ..., title="字段", description=", ".join(blob_fields)
+                ),
+                current_user: UserModel = Depends(self.get_current_user),
+            ) -> Blob:
+                blob_field = await get_blob_field(ResourceMethod.put, field)
+                max_size = blob_field.max_size
+                length = request.headers.get("content-length", "")
+                if max_size is not None and length.isdigit() and int(length) > max_size:
+                    raise HTTPPayloadTooLargeError
+
+                # 先校验权限及钩子再写入存储, 上传期间不占用数据库连接
+                objs = await self.get(id, [], current_user, request, ResourceMethod.put)
+                if len(objs) != 1:
+                    raise HTTPNotFoundError
+                obj = objs[0]
+                # 文件字段不在表单中, 钩子收到空的表单
+                input = self.update_form.model_construct()
+                r = await self.run_hook(
+                    "before_update",
+                    self.before_update(
+                        current_user, obj, input, request, background_tasks
+                    ),
+                )
+                if r:
+                    obj = r
+
+                async def body() -> AsyncIterator[bytes]:
+                    size = 0
+                    async for chunk in request.stream():
+                        size += len(chunk)
+                        if max_size is not None and size > max_size:
+                            raise HTTPPayloadTooLargeError
+                        yield chunk
+
+                blob = await blob_field.store.put(body())
+                async with self.write_transaction(current_user, request):
+                    old_obj = copy(obj)
+                    setattr(obj, field, blob)
+                    obj = await self.run_hook(
+                        "before_save",
+                        self.before_save(current_user, obj, {field: blob}, request),
+                    )
+                    await obj.save(update_fields=[field])
+                    await self.run_hook(
+                        "after_update",
+                        self.after_update(
+                            current_user,
+                            old_obj,
+                            input,
+                            obj,
+                            request,
+                            background_tasks,
+                        ),
+                    )
+                return blob
+
+            methods["upload"] = upload
+
         return methods
 
 
 def get_anonymous_user() -> str:
-    return "anonymous"
+    with tracing.span("auth"):
+        return "anonymous"
 
 
 class PublicAPI(API[str, Model, CreateForm, UpdateForm]):
@@ -819,6 +1338,10 @@ class PublicAPI(API[str, Model, CreateForm, UpdateForm]):
             enable_get=enable_get,
         )
 
+    def sticky_key(self, user: str, request: Request) -> Hashable | None:
+        # 匿名用户共用同一个 user, 只按 session 中的写入时间读主库
+        return None
+
 
 class DistinctCountQuery(CountQuery):
     def __init__(self, q: CountQuery) -> None:
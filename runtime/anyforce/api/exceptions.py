@@ -22,6 +22,10 @@ HTTPNotFoundError = HTTPException(
 HTTPUnAuthorizedError = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED, detail={"errors": "未认证"}
 )
+HTTPPayloadTooLargeError = HTTPException(
+    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    detail={"errors": "内容过大"},
+)
 HTTPPreconditionRequiredError = HTTPException(
     status_code=status.HTTP_428_PRECONDITION_REQUIRED,
     detail={"errors": "请求数据已过期"},
@@ -0,0 +1,17 @@
+from .admission import AdmissionController, AdmissionMiddleware
+from .inflight import InFlight, InFlightMiddleware
+from .metrics import MetricsMiddleware
+from .profile import ProfileMiddleware
+from .sql import SQLMiddleware
+from .tracing import TracingMiddleware
+
+__all__ = [
+    "AdmissionController",
+    "AdmissionMiddleware",
+    "InFlight",
+    "InFlightMiddleware",
+    "MetricsMiddleware",
+    "ProfileMiddleware",
+    "SQLMiddleware",
+    "TracingMiddleware",
+]
@@ -0,0 +1,203 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import suppress
+from typing import Iterable
+
+import orjson
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ... import metrics
+
+read_methods = {"GET", "HEAD", "OPTIONS"}
+
+
+class Limiter:
+    """
+    并发限额, 超出时在有界队列中等待
+
+    adaptive 时按 AIMD 调整限额: 请求耗时超过 latency_target 时乘以 backoff,
+    否则每完成一整个窗口的请求加 1; 降低限额时仍在处理的请求完成前不再降低,
+    避免同一批慢请求连续降低限额
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        max_queue: int = 0,
+        adaptive: bool = False,
+        min_limit: int = 1,
+        latency_target: float = 1,
+        backoff: float = 0.9,
+    ) -> None:
+        self.limit = float(limit)
+        self.max_limit = limit
+        self.min_limit = min(min_limit, limit)
+        self.max_queue = max_queue
+        self.adaptive = adaptive
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.in_flight = 0
+        # 上次降低限额后还需完成的请求数, 小于 0 时才能再次降低
+        self.backoff_window = 0
+        self.waiters: deque[asyncio.Future[bool]] = deque()
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= int(self.limit) and len(self.waiters) >= (
+            self.max_queue
+        )
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.in_flight < int(self.limit) and not self.waiters:
+            self.in_flight += 1
+            return True
+        if len(self.waiters) >= self.max_queue or timeout <= 0:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            # release 时直接把名额转交给等待者
+            return await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            # 超时与转交名额同时发生
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                self.release()
+            return False
+        except BaseException:
+            # 已获得名额但请求被取消
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                self.release()
+            raise
+        finally:
+            with suppress(ValueError):
+                self.waiters.remove(waiter)
+
+    def release(self, latency: float | None = None):
+        self.in_flight -= 1
+        if self.adaptive and latency is not None:
+            self.backoff_window -= 1
+            if latency <= self.latency_target:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            elif self.backoff_window < 0:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.backoff_window = self.in_flight
+        while self.waiters and self.in_flight < int(self.limit):
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(True)
+
+    def reject_waiters(self):
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(False)
+
+
+class AdmissionController:
+    """
+    按 worker 限制处理中的请求数, 读写分别限额, 饱和时快速返回 503
+
+    - max_in_flight: 整个 worker 的并发上限, 0 表示不限
+    - max_reads / max_writes: 读 (GET/HEAD/OPTIONS) 与写请求的并发上限
+    - max_queue: 每类请求排队上限, queue_timeout 秒内未获得名额则拒绝
+    - adaptive: 根据观察到的耗时调整读写限额 (AIMD)
+    - exempt: 不受限制的路径, 例如 /healthz
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 0,
+        max_reads: int = 100,
+        max_writes: int = 50,
+        max_queue: int = 100,
+        queue_timeout: float = 1,
+        retry_after: int = 1,
+        adaptive: bool = False,
+        latency_target: float = 1,
+        exempt: Iterable[str] = (),
+    ) -> None:
+        self.limiters = {
+            "read": Limiter(
+                max_reads, max_queue, adaptive, latency_target=latency_target
+            ),
+            "write": Limiter(
+                max_writes, max_queue, adaptive, latency_target=latency_target
+            ),
+        }
+        self.total = Limiter(max_in_flight, max_queue) if max_in_flight else None
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.exempt = set(exempt)
+        self.draining = False
+
+    @property
+    def saturated(self) -> bool:
+        limiters = [*self.limiters.values(), self.total]
+        return any(limiter and limiter.saturated for limiter in limiters)
+
+    def drain(self):
+        # 停机时不再排队, 等待中的请求立即拒绝
+        self.draining = True
+        for limiter in [*self.limiters.values(), self.total]:
+            if limiter:
+                limiter.reject_waiters()
+
+    async def acquire(self, kind: str) -> bool:
+        deadline = time.monotonic() + (0 if self.draining else self.queue_timeout)
+        limiter = self.limiters[kind]
+        if not await limiter.acquire(deadline - time.monotonic()):
+            return False
+        if not self.total:
+            return True
+        try:
+            if await self.total.acquire(deadline - time.monotonic()):
+                return True
+        except BaseException:
+            limiter.release()
+            raise
+        limiter.release()
+        return False
+
+    def release(self, kind: str, latency: float):
+        if self.total:
+            self.total.release()
+        self.limiters[kind].release(latency)
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp, controller: AdmissionController) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.controller.exempt:
+            return await self.app(scope, receive, send)
+
+        kind = "read" if scope["method"] in read_methods else "write"
+        if not await self.controller.acquire(kind):
+            metrics.http_requests_rejected.inc(kind)
+            return await self.reject(send)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(kind, time.perf_counter() - start)
+
+    async def reject(self, send: Send):
+        body = orjson.dumps({"detail": {"errors": "服务繁忙"}})
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.controller.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
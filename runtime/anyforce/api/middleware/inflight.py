@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ...logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class InFlight:
+    def __init__(self) -> None:
+        self.count = 0
+        self.unhealthy_probes = 0
+
+    async def drain(self, delay: float, timeout: float, probes: int = 0):
+        """
+        等待负载均衡摘除 (delay 秒, 或 /healthz 已返回 probes 次 503) 且没有处理中的请求,
+        最多等待 timeout 秒
+        """
+        start = time.monotonic()
+        logged = 0.0
+        while True:
+            elapsed = time.monotonic() - start
+            removed = elapsed >= delay or (probes and self.unhealthy_probes >= probes)
+            if removed and self.count == 0:
+                logger.bind(elapsed=elapsed).info("drained")
+                return
+            if elapsed >= timeout:
+                logger.bind(elapsed=elapsed, in_flight=self.count).warning(
+                    "drain timeout"
+                )
+                return
+            if elapsed - logged >= 1:
+                logged = elapsed
+                logger.bind(
+                    elapsed=elapsed,
+                    in_flight=self.count,
+                    unhealthy_probes=self.unhealthy_probes,
+                ).info("draining")
+            await asyncio.sleep(0.1)
+
+
+class InFlightMiddleware:
+    """
+    统计处理中的请求, 包括流式响应与 websocket, 直到响应完全发送
+    """
+
+    def __init__(self, app: ASGIApp, in_flight: InFlight) -> None:
+        self.app = app
+        self.in_flight = in_flight
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        self.in_flight.count += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight.count -= 1
@@ -0,0 +1,60 @@
+import time
+from contextvars import ContextVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ... import metrics
+from ...model import instrument
+
+# 当前请求累计的数据库耗时
+db_duration: ContextVar[list[float] | None] = ContextVar(
+    "anyforce.api.middleware.metrics.db_duration", default=None
+)
+
+
+def record(event: instrument.QueryEvent):
+    duration = db_duration.get()
+    if duration is not None:
+        duration[0] += event.duration
+
+
+class MetricsMiddleware:
+    """
+    记录请求数、耗时、处理中请求数、响应大小及数据库耗时, 路由使用模板而非原始路径
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        instrument.add_listener(record)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        duration = [0.0]
+        token = db_duration.set(duration)
+        status_code = [500]
+        size = [0]
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                size[0] += len(message.get("body", b""))
+            await send(message)
+
+        metrics.http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.http_requests_in_flight.dec()
+            db_duration.reset(token)
+            method: str = scope["method"]
+            route = getattr(scope.get("route"), "path", "")
+            metrics.http_requests.inc(method, route, str(status_code[0]))
+            metrics.http_request_duration.observe(
+                time.perf_counter() - start, method, route
+            )
+            metrics.http_response_size.observe(size[0], method, route)
+            metrics.db_duration.observe(duration[0], method, route)
@@ -0,0 +1,176 @@
+import asyncio
+import hmac
+import os
+import re
+import time
+from ipaddress import ip_address, ip_network
+from typing import Any, Literal, Sequence
+from urllib.parse import parse_qs
+
+import orjson
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ...logging import get_logger
+from ...model.slow_query import TokenBucket
+from ...profiler import Profiler, Sampler
+
+logger = get_logger(__name__)
+
+Format = Literal["collapsed", "speedscope", "cprofile"]
+
+formats: dict[str, tuple[str, str]] = {
+    "collapsed": ("collapsed.txt", "text/plain; charset=utf-8"),
+    "speedscope": ("speedscope.json", "application/json"),
+    "cprofile": ("cprofile.txt", "text/plain; charset=utf-8"),
+}
+
+
+def write(path: str, body: bytes):
+    with open(path, "wb") as f:
+        f.write(body)
+
+
+class ProfileMiddleware:
+    """
+    请求头 `X-Anyforce-Profile: <token>[,format]` 或查询参数 `_profile=<token>[,format]`
+    触发单个请求的性能分析, format 可选 collapsed / speedscope / cprofile
+
+    - allow: 允许的客户端 IP 或网段
+    - max_per_minute: 速率上限, 同一时间只分析一个请求
+    - directory: 保存到目录并在响应头返回文件名, 为空时用分析结果替换响应内容
+
+    采样器与 cProfile 均作用于整个线程, 分析期间事件循环上并发处理的其他请求
+    也会计入结果, 需要单独的结果时应在无其他流量的实例上分析
+    """
+
+    header = b"x-anyforce-profile"
+    query = "_profile"
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        token: str,
+        allow: Sequence[str] = ("127.0.0.1", "::1"),
+        max_per_minute: float = 6,
+        interval: float = 0.001,
+        directory: str | None = None,
+    ) -> None:
+        self.app = app
+        self.token = token.encode()
+        self.networks: list[Any] = []
+        self.hosts: set[str] = set()
+        for item in allow:
+            try:
+                self.networks.append(ip_network(item, strict=False))
+            except ValueError:
+                self.hosts.add(item)
+        self.bucket = TokenBucket(max_per_minute / 60, 1)
+        self.interval = interval
+        self.directory = directory
+        self.running = False
+
+    def allowed(self, scope: Scope) -> bool:
+        client = scope.get("client")
+        if not client:
+            return False
+        host = client[0]
+        if host in self.hosts:
+            return True
+        try:
+            address = ip_address(host)
+        except ValueError:
+            return False
+        return any(address in network for network in self.networks)
+
+    def requested(self, scope: Scope) -> Format | None:
+        value = b""
+        for k, v in scope["headers"]:
+            if k == self.header:
+                value = v
+                break
+        else:
+            values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(
+                self.query
+            )
+            if values:
+                value = values[0].encode("latin-1")
+        if not value:
+            return None
+
+        token, _, format = value.partition(b",")
+        if not hmac.compare_digest(token.strip(), self.token):
+            return None
+        format = format.strip().decode("latin-1") or "collapsed"
+        return format if format in formats else None  # type: ignore
+
+    def filename(self, scope: Scope, format: Format) -> str:
+        path = re.sub(r"[^\w.-]+", "_", scope["path"]).strip("_") or "root"
+        ext, _ = formats[format]
+        return f"{int(time.time() * 1000)}-{scope['method']}-{path}.{ext}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        format = self.requested(scope)
+        if format is None or not self.allowed(scope):
+            return await self.app(scope, receive, send)
+        if self.running or not self.bucket.acquire():
+            logger.bind(path=scope["path"]).warning("profile rejected")
+            return await self.app(scope, receive, send)
+
+        self.running = True
+        try:
+            await self.profile(scope, receive, send, format)
+        finally:
+            self.running = False
+
+    async def profile(self, scope: Scope, receive: Receive, send: Send, format: Format):
+        filename = self.filename(scope, format)
+        status = [0]
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if self.directory:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-Anyforce-Profile", filename)
+            if self.directory:
+                await send(message)
+
+        profiler = Profiler() if format == "cprofile" else Sampler(self.interval)
+        start = time.perf_counter()
+        with profiler:
+            await self.app(scope, receive, send_wrapper)
+        duration = time.perf_counter() - start
+
+        if isinstance(profiler, Profiler):
+            body = profiler.text().encode()
+        elif format == "speedscope":
+            body = orjson.dumps(
+                profiler.speedscope(f"{scope['method']} {scope['path']}")
+            )
+        else:
+            body = profiler.collapsed().encode()
+
+        logger.bind(
+            path=scope["path"], format=format, duration=duration, filename=filename
+        ).info("request profiled")
+        if self.directory:
+            await asyncio.to_thread(write, os.path.join(self.directory, filename), body)
+            return
+
+        _, content_type = formats[format]
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", content_type.encode()),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"x-anyforce-profile-status", str(status[0]).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,125 @@
+import asyncio
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any
+
+import structlog
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ...logging import get_logger
+from ...model import instrument
+
+logger = get_logger(__name__)
+
+
+class QueryStats:
+    def __init__(self, scope: Scope, repeated_threshold: int) -> None:
+        self.scope = scope
+        self.repeated_threshold = repeated_threshold
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_fingerprint = ""
+        self.slowest_duration = 0.0
+        self.fingerprints = Counter[str]()
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", "") or self.scope.get("path", "")
+
+    def record(self, event: instrument.QueryEvent):
+        self.count += 1
+        self.duration += event.duration
+        fingerprint = event.fingerprint
+        if event.duration > self.slowest_duration:
+            self.slowest_duration = event.duration
+            self.slowest_fingerprint = fingerprint
+
+        self.fingerprints[fingerprint] += 1
+        if self.fingerprints[fingerprint] == self.repeated_threshold + 1:
+            logger.bind(
+                route=self.route,
+                fingerprint=fingerprint,
+                threshold=self.repeated_threshold,
+            ).warning("repeated query, possible N+1")
+
+    def repeated(self) -> dict[str, int]:
+        return {k: v for k, v in self.fingerprints.items() if v > 1}
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries"'
+
+    def context(self) -> dict[str, Any]:
+        return {
+            "db_count": self.count,
+            "db_duration": round(self.duration, 6),
+            "db_slowest_duration": round(self.slowest_duration, 6),
+            # 只记录指纹, 不在日志中写入参数值
+            "db_slowest_sql": self.slowest_fingerprint,
+        }
+
+
+current: ContextVar[QueryStats | None] = ContextVar(
+    "anyforce.api.middleware.sql.current", default=None
+)
+
+
+def current_route() -> str:
+    stats = current.get()
+    return stats.route if stats else ""
+
+
+def record(event: instrument.QueryEvent):
+    stats = current.get()
+    if stats is not None:
+        stats.record(event)
+
+
+class SQLMiddleware:
+    """
+    统计每个请求的 SQL 数量、耗时、最慢语句及重复语句指纹
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        server_timing: bool = False,
+        repeated_threshold: int = 10,
+    ) -> None:
+        self.app = app
+        self.server_timing = server_timing
+        self.repeated_threshold = repeated_threshold
+        instrument.add_listener(record)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats(scope, self.repeated_threshold)
+        token = current.set(stats)
+        task = asyncio.current_task()
+        tokens: dict[str, Any] = {}
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # 每个请求只在开始响应时更新一次, 之后的日志携带统计
+                bound = structlog.contextvars.bind_contextvars(**stats.context())
+                # spec 2.3 下 StreamingResponse 在子 task 中调用 send,
+                # 子 task 的上下文随之结束, 只需重置当前 task 中的绑定
+                if asyncio.current_task() is task:
+                    tokens.update(bound)
+                if self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current.reset(token)
+            if stats.count:
+                logger.bind(
+                    route=stats.route, repeated=stats.repeated(), **stats.context()
+                ).debug("request queries")
+            structlog.contextvars.reset_contextvars(**tokens)
@@ -0,0 +1,57 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ... import tracing
+from ...model import instrument
+
+
+def record(event: instrument.QueryEvent):
+    # 查询结束后才知道耗时, 补记一个 span
+    with tracing.span(
+        "db", connection=event.client.connection_name, sql=event.sql
+    ) as span:
+        if span is not None:
+            span.start = time.time_ns() - int(event.duration * 1e9)
+            if event.rows is not None:
+                span.set(rows=event.rows)
+            if event.error is not None:
+                span.error = repr(event.error)
+
+
+class TracingMiddleware:
+    """
+    在请求入口做头部采样并创建根 span, 兼容 W3C traceparent
+    """
+
+    def __init__(self, app: ASGIApp, tracer: tracing.Tracer) -> None:
+        self.app = app
+        self.tracer = tracer
+        instrument.add_listener(record)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        traceparent = ""
+        for k, v in scope["headers"]:
+            if k == b"traceparent":
+                traceparent = v.decode("latin-1")
+                break
+
+        method = scope["method"]
+        with self.tracer.trace(method, traceparent) as root:
+            if root is None:
+                return await self.app(scope, receive, send)
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    root.set(status=message["status"])
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", "") or scope["path"]
+                root.name = f"{method} {route}"
+                root.set(method=method, route=route)
@@ -0,0 +1,101 @@
+import re
+from typing import Any, Mapping
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+
+from ..model.blob import Blob, BlobStore
+from ..model.fields import RawJSONFragments
+from ..openapi import etag_matches
+
+
+class RawJSONResponse(JSONResponse):
+    """
+    将序列化时收集的 JSON 原文替换回占位符, 见 RawJSON
+    """
+
+    def __init__(
+        self,
+        content: Any,
+        status_code: int = 200,
+        headers: Mapping[str, str] | None = None,
+        media_type: str | None = None,
+        background: BackgroundTask | None = None,
+        fragments: RawJSONFragments | None = None,
+    ) -> None:
+        self.fragments = fragments
+        super().__init__(content, status_code, headers, media_type, background)
+
+    def render(self, content: Any) -> bytes:
+        body = super().render(content)
+        fragments = self.fragments
+        if not fragments or not fragments.items:
+            return body
+        items = fragments.items
+        pattern = re.compile(
+            re.escape(('"' + fragments.prefix.replace("\x00", "\\u0000")).encode())
+            + rb'(\d+)"'
+        )
+
+        def replace(m: re.Match[bytes]) -> bytes:
+            i = int(m[1])
+            return items[i] if i < len(items) else m[0]
+
+        return pattern.sub(replace, body)
+
+
+range_pattern = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def parse_range(value: str, size: int) -> tuple[int, int] | None:
+    """
+    解析单个 Range, 返回 [start, end); 无法满足时抛出 ValueError, 多个范围时忽略
+    """
+    m = range_pattern.fullmatch(value.strip())
+    if not m or (not m[1] and not m[2]):
+        return None
+    if not m[1]:
+        # bytes=-n: 最后 n 个字节
+        start, end = max(size - int(m[2]), 0), size
+    else:
+        start = int(m[1])
+        end = min(int(m[2]) + 1, size) if m[2] else size
+    if start >= size or start >= end:
+        raise ValueError(value)
+    return start, end
+
+
+def blob_response(
+    request: Request, store: BlobStore, blob: Blob, media_type: str
+) -> Response:
+    """
+    流式返回 Blob 内容, 支持 Range 与 If-None-Match, 内容不可变因此以哈希作为 ETag
+    """
+    headers = {"ETag": f'"{blob.hash}"', "Accept-Ranges": "bytes"}
+    if etag_matches(headers["ETag"], request.headers.get("if-none-match", "")):
+        return Response(status_code=304, headers=headers)
+
+    start, end = 0, blob.size
+    status_code = 200
+    value = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if value and (not if_range or if_range == headers["ETag"]):
+        try:
+            r = parse_range(value, blob.size)
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{blob.size}"},
+            )
+        if r:
+            start, end = r
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{blob.size}"
+    headers["Content-Length"] = str(end - start)
+    return StreamingResponse(
+        store.read(blob.hash, start, end),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type,
+    )
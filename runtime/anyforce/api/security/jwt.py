@@ -2,8 +2,8 @@ from datetime import datetime, timedelta
 
 from fastapi import Request
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt as jwt_lib
 
+from ... import tracing
 from ..exceptions import HTTPUnAuthorizedError
 
 
@@ -13,20 +13,23 @@ def gen(
     expire_after_seconds: int = 3600 * 24 * 30,
     algorithm: str = "HS256",
 ):
+    from jose import jwt as jwt_lib
+
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl=token_url)
 
     async def get_current_user(request: Request) -> str:
-        token = await oauth2_scheme(request)
-        if not token:
-            raise HTTPUnAuthorizedError
-        payload = jwt_lib.decode(token, secret, algorithms=[algorithm])
-        user_id: str = payload.get("sub", "")
-        if not user_id:
-            raise HTTPUnAuthorizedError
-        exp = float(payload.get("exp", 0))
-        if exp < datetime.now().timestamp():
-            raise HTTPUnAuthorizedError
-        return user_id
+        with tracing.span("auth"):
+            token = await oauth2_scheme(request)
+            if not token:
+                raise HTTPUnAuthorizedError
+            payload = jwt_lib.decode(token, secret, algorithms=[algorithm])
+            user_id: str = payload.get("sub", "")
+            if not user_id:
+                raise HTTPUnAuthorizedError
+            exp = float(payload.get("exp", 0))
+            if exp < datetime.now().timestamp():
+                raise HTTPUnAuthorizedError
+            return user_id
 
     def authorize(user_id: str) -> str:
         exp = datetime.now() + timedelta(seconds=expire_after_seconds)
@@ -1,7 +1,6 @@
 from typing import Any, Callable
 from urllib.parse import urlencode, urljoin
 
-import aiohttp
 import orjson
 from fastapi import APIRouter, Request
 from starlette.responses import RedirectResponse
@@ -45,6 +44,8 @@ class OAuth2(object):
         )
 
     async def auth(self, code: str, redirect_uri: str):
+        import aiohttp
+
         async with aiohttp.ClientSession() as session:
             async with session.post(
                 self.join("token"),
@@ -62,6 +63,8 @@ class OAuth2(object):
                 return r["access_token"], r["id_token"]
 
     async def userinfo(self, token: str):
+        import aiohttp
+
         async with aiohttp.ClientSession() as session:
             async with session.get(
                 self.join("userinfo"), headers={"Authorization": f"Bearer {token}"}
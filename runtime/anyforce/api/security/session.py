@@ -1,14 +1,16 @@
 from fastapi import Request
 
+from ... import tracing
 from ..exceptions import HTTPUnAuthorizedError
 
 
 def gen():
     async def get_current_user(request: Request) -> str:
-        user_id: str = request.session.get("user_id", "")
-        if not user_id:
-            raise HTTPUnAuthorizedError
-        return user_id
+        with tracing.span("auth"):
+            user_id: str = request.session.get("user_id", "")
+            if not user_id:
+                raise HTTPUnAuthorizedError
+            return user_id
 
     def authorize(request: Request, user_id: str):
         request.session["user_id"] = user_id
@@ -0,0 +1,239 @@
+import inspect
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Literal, Sequence
+
+from fastapi import APIRouter, FastAPI, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette_context.middleware import RawContextMiddleware
+from tortoise import Tortoise
+
+from .api import admin
+from .api.api import (
+    iter_resolve_lazy_response_models,
+    resolve_lazy_response_models,
+)
+from .api.exceptions import register
+from .api.middleware import (
+    AdmissionController,
+    AdmissionMiddleware,
+    InFlight,
+    InFlightMiddleware,
+    MetricsMiddleware,
+    ProfileMiddleware,
+    SQLMiddleware,
+    TracingMiddleware,
+)
+from .api.middleware.sql import current_route
+from .gc_tuner import GCTuner
+from .loop_monitor import LoopMonitor
+from .metrics import registry
+from .model import blob, init, instrument, warm_up
+from .model.blob import BlobStore
+from .model.query_stats import query_statistics
+from .model.slow_query import SlowQueryLog
+from .openapi import OpenAPICache, OpenAPIHandler, metadata_hash
+from .tracing import Tracer
+
+
+def create_app(
+    secret_key: str,
+    allow_origins: list[str],
+    tortoise_config: dict[str, Any],
+    max_age: int = 14 * 24 * 60 * 60,
+    same_site: Literal["lax", "strict", "none"] = "lax",
+    https_only: bool = True,
+    shutdown_delay_in_seconds: int = 15,
+    shutdown_timeout_in_seconds: int = 60,
+    shutdown_unhealthy_probes: int = 0,
+    on_startup: Sequence[Callable[[], Any]] = [],
+    on_shutdown: Sequence[Callable[[], Any]] = [],
+    instrument_sql: bool = False,
+    server_timing: bool = False,
+    repeated_query_threshold: int = 10,
+    slow_query_log: SlowQueryLog | None = None,
+    query_stats: bool = False,
+    admin_prefix: str = "/_admin",
+    admin_dependencies: Sequence[Any] = [],
+    enable_metrics: bool = False,
+    metrics_path: str = "/metrics",
+    tracer: Tracer | None = None,
+    profile_token: str | None = None,
+    profile_allow: Sequence[str] = ("127.0.0.1", "::1"),
+    profile_directory: str | None = None,
+    loop_monitor: LoopMonitor | None = None,
+    admission: AdmissionController | None = None,
+    warm_up_connections: bool = True,
+    warm_up_timeout_in_seconds: int = 30,
+    openapi_cache_dir: str | None = None,
+    openapi_prebuild: bool = True,
+    gc_tuner: GCTuner | None = None,
+    blob_stores: dict[str, BlobStore] | None = None,
+):
+    if query_stats and not admin_dependencies:
+        # 查询统计暴露 SQL 结构与路由, 管理接口必须带鉴权依赖
+        raise ValueError("query_stats requires admin_dependencies")
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if loop_monitor:
+            await loop_monitor.start()
+        if gc_tuner:
+            gc_tuner.install()
+        await init(tortoise_config)
+        if warm_up_connections:
+            await warm_up(tortoise_config, warm_up_timeout_in_seconds)
+        if instrument_sql or enable_metrics or tracer:
+            instrument.install()
+        if slow_query_log:
+            slow_query_log.install(route=current_route)
+        if query_stats:
+            query_statistics.install(route=current_route)
+        for c in on_startup:
+            cr = c()
+            if inspect.isawaitable(cr):
+                await cr
+        if gc_tuner:
+            gc_tuner.warmed_up()
+        state[0] = True
+        if openapi_prebuild:
+            openapi_handler.start()
+        yield
+        # 摘除与等待处理中的请求由 drain 在关闭监听前完成, 这里只释放资源
+        state[0] = False
+        if slow_query_log:
+            slow_query_log.uninstall()
+        if query_stats:
+            query_statistics.uninstall()
+        await Tortoise.close_connections()
+        for c in on_shutdown:
+            cr = c()
+            if inspect.isawaitable(cr):
+                await cr
+        if gc_tuner:
+            gc_tuner.uninstall()
+        if loop_monitor:
+            await loop_monitor.stop()
+
+    if blob_stores:
+        blob.configure(blob_stores)
+
+    app = FastAPI(lifespan=lifespan, openapi_url=None)
+    # anyforce serve 在 fork 前据此初始化模型, 并按 gc_tuner.freeze 决定是否冻结
+    app.state.tortoise_config = tortoise_config
+    app.state.gc_tuner = gc_tuner
+
+    openapi = app.openapi
+
+    openapi_cache = OpenAPICache(openapi_cache_dir) if openapi_cache_dir else None
+
+    def lazy_openapi() -> dict[str, Any]:
+        if app.openapi_schema:
+            return app.openapi_schema
+        # 先补全响应模型, 使缓存的键与 OpenAPIHandler 的 prepare 一致
+        resolve_lazy_response_models(app.routes)
+        key = ""
+        if openapi_cache:
+            key = metadata_hash(app.routes, app.title, app.version, app.description)
+            app.openapi_schema = openapi_cache.load(key)
+            if app.openapi_schema:
+                return app.openapi_schema
+        schema = openapi()
+        if openapi_cache:
+            openapi_cache.store(key, schema)
+        return schema
+
+    setattr(app, "openapi", lazy_openapi)
+    openapi_handler = OpenAPIHandler(
+        app, lazy_openapi, lambda: iter_resolve_lazy_response_models(app.routes)
+    )
+    openapi_handler.bind()
+
+    # 连接预热及启动回调完成后才就绪
+    state: list[bool] = [False]
+    in_flight = InFlight()
+
+    async def drain():
+        """
+        由服务器在收到停止信号、仍在 accept 时调用 (参见 anyforce serve),
+        /healthz 返回 503 直到负载均衡摘除且处理中的请求结束
+        """
+        state[0] = False
+        in_flight.unhealthy_probes = 0
+        if admission:
+            admission.drain()
+        await in_flight.drain(
+            shutdown_delay_in_seconds,
+            shutdown_timeout_in_seconds,
+            shutdown_unhealthy_probes,
+        )
+
+    app.state.drain = drain
+
+    if profile_token:
+        app.add_middleware(
+            ProfileMiddleware,
+            token=profile_token,
+            allow=profile_allow,
+            directory=profile_directory,
+        )
+    # 慢查询与查询统计通过 SQLMiddleware 获取当前路由
+    if instrument_sql or slow_query_log or query_stats:
+        app.add_middleware(
+            SQLMiddleware,
+            server_timing=server_timing,
+            repeated_threshold=repeated_query_threshold,
+        )
+    app.add_middleware(RawContextMiddleware)
+    app.add_middleware(
+        SessionMiddleware,
+        secret_key=secret_key,
+        max_age=max_age,
+        https_only=https_only,
+        same_site=same_site,
+    )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=allow_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    if enable_metrics:
+        app.add_middleware(MetricsMiddleware)
+    if admission:
+        admission.exempt.add("/healthz")
+        if enable_metrics:
+            admission.exempt.add(metrics_path)
+        app.add_middleware(AdmissionMiddleware, controller=admission)
+    if tracer:
+        app.add_middleware(TracingMiddleware, tracer=tracer)
+    app.add_middleware(InFlightMiddleware, in_flight=in_flight)
+    register(app)
+
+    @app.get("/healthz")
+    async def _() -> str:
+        # 只反映就绪与停机状态, 饱和时由准入控制拒绝请求, 不应因此摘除实例
+        if not state[0]:
+            in_flight.unhealthy_probes += 1
+            raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE)
+        return ""
+
+    if enable_metrics:
+
+        @app.get(metrics_path, include_in_schema=False)
+        async def _() -> PlainTextResponse:
+            return PlainTextResponse(
+                registry.expose(), media_type="text/plain; version=0.0.4"
+            )
+
+    admin_router = APIRouter(
+        prefix=admin_prefix, dependencies=admin_dependencies, include_in_schema=False
+    )
+    if query_stats:
+        admin.bind_query_stats(admin_router, query_statistics)
+    if admin_router.routes:
+        app.include_router(admin_router)
+
+    return app
@@ -0,0 +1,99 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from contextlib import suppress
+
+from . import metrics
+from .logging import get_logger
+from .model.query_stats import ShapeStats
+
+logger = get_logger(__name__)
+
+
+class LoopMonitor:
+    """
+    事件循环延迟监控
+
+    - 每 interval 秒调度一次, 实际唤醒时间与预期的差值即为延迟
+    - 看门狗线程发现循环阻塞超过 threshold 时采集事件循环线程的调用栈,
+      恢复后与延迟一起记录日志
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold: float = 0.1,
+        samples: int = 600,
+        quantiles: tuple[float, ...] = (0.5, 0.9, 0.99),
+    ) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.quantiles = quantiles
+        self.lags: list[float] = [0.0] * samples
+        self.i = 0
+        self.beat = 0.0
+        self.stack: str | None = None
+        self.stopped = threading.Event()
+        self.task: asyncio.Task[None] | None = None
+        self.watchdog: threading.Thread | None = None
+        self.thread_id = 0
+
+    async def start(self):
+        self.thread_id = threading.get_ident()
+        self.beat = time.monotonic()
+        self.stopped.clear()
+        self.task = asyncio.get_running_loop().create_task(self.run())
+        self.watchdog = threading.Thread(target=self.watch, daemon=True)
+        self.watchdog.start()
+
+    async def stop(self):
+        self.stopped.set()
+        if self.task:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+            self.task = None
+        if self.watchdog:
+            self.watchdog.join()
+            self.watchdog = None
+
+    async def run(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.beat = time.monotonic()
+            self.record(max(0, self.beat - start - self.interval))
+
+    def record(self, lag: float):
+        self.lags[self.i % len(self.lags)] = lag
+        self.i += 1
+        metrics.event_loop_lag.observe(lag)
+        if self.i % 10 == 0:
+            self.update_quantiles()
+        if lag >= self.threshold:
+            stack, self.stack = self.stack, None
+            logger.bind(lag=lag, stack=stack).warning("event loop blocked")
+
+    def update_quantiles(self):
+        lags = sorted(self.lags[: min(self.i, len(self.lags))])
+        for q in self.quantiles:
+            metrics.event_loop_lag_quantile.set(
+                f"{q:g}", value=ShapeStats.percentile(lags, q)
+            )
+        metrics.event_loop_lag_quantile.set("1", value=lags[-1] if lags else 0)
+
+    def watch(self):
+        reported = 0.0
+        while not self.stopped.wait(self.threshold / 2):
+            beat = self.beat
+            if beat == reported or time.monotonic() - beat < (
+                self.interval + self.threshold
+            ):
+                continue
+            frame = sys._current_frames().get(self.thread_id)  # pyright: ignore[reportPrivateUsage]
+            if frame is not None:
+                self.stack = "".join(traceback.format_stack(frame))
+                reported = beat
+            del frame
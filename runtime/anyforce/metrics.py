@@ -0,0 +1,294 @@
+import gc
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Any, Callable, Iterable
+
+from tortoise import connections
+
+Labels = tuple[str, ...]
+
+
+class Metric(ABC):
+    """
+    每个线程独立写入自己的分片, 采集时再合并, 记录时不需要加锁
+    """
+
+    typ = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.local = threading.local()
+        self.shards: list[dict[Labels, Any]] = []
+        self.lock = threading.Lock()
+
+    def shard(self) -> dict[Labels, Any]:
+        shard: dict[Labels, Any] | None = getattr(self.local, "shard", None)
+        if shard is None:
+            shard = self.local.shard = {}
+            with self.lock:
+                self.shards.append(shard)
+        return shard
+
+    def reset(self):
+        for shard in self.shards:
+            shard.clear()
+
+    @abstractmethod
+    def merged(self) -> dict[Labels, Any]: ...
+
+    @abstractmethod
+    def samples(self) -> Iterable[tuple[str, Labels, Labels, float]]: ...
+
+    def expose(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.typ}"]
+        for suffix, names, values, v in self.samples():
+            lines.append(f"{self.name}{suffix}{format_labels(names, values)} {v:g}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    typ = "counter"
+
+    def inc(self, *labels: str, value: float = 1):
+        shard = self.shard()
+        shard[labels] = shard.get(labels, 0) + value
+
+    def merged(self) -> dict[Labels, float]:
+        rs: dict[Labels, float] = {}
+        for shard in list(self.shards):
+            for labels, v in shard.copy().items():
+                rs[labels] = rs.get(labels, 0) + v
+        return rs
+
+    def samples(self):
+        for labels, v in sorted(self.merged().items()):
+            yield "", self.labelnames, labels, v
+
+
+class Gauge(Counter):
+    typ = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        collect: Callable[[], dict[Labels, float]] | None = None,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+
+    def dec(self, *labels: str, value: float = 1):
+        self.inc(*labels, value=-value)
+
+    def set(self, *labels: str, value: float):
+        self.shard()[labels] = value
+
+    def merged(self) -> dict[Labels, float]:
+        if self.collect:
+            return self.collect()
+        return super().merged()
+
+
+class Histogram(Metric):
+    typ = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = (
+            0.005,
+            0.01,
+            0.025,
+            0.05,
+            0.1,
+            0.25,
+            0.5,
+            1,
+            2.5,
+            5,
+            10,
+        ),
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        shard = self.shard()
+        # [bucket..., +Inf, sum]
+        counts: list[float] | None = shard.get(labels)
+        if counts is None:
+            counts = [0.0] * (len(self.buckets) + 2)
+            shard[labels] = counts
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def merged(self) -> dict[Labels, list[float]]:
+        rs: dict[Labels, list[float]] = {}
+        for shard in list(self.shards):
+            for labels, counts in shard.copy().items():
+                merged = rs.get(labels)
+                if merged is None:
+                    rs[labels] = list(counts)
+                else:
+                    for i, v in enumerate(counts):
+                        merged[i] += v
+        return rs
+
+    def samples(self):
+        names = (*self.labelnames, "le")
+        for labels, counts in sorted(self.merged().items()):
+            cumulative = 0.0
+            for i, le in enumerate((*self.buckets, float("inf"))):
+                cumulative += counts[i]
+                yield "_bucket", names, (*labels, format_le(le)), cumulative
+            yield "_sum", self.labelnames, labels, counts[-1]
+            yield "_count", self.labelnames, labels, cumulative
+
+
+def format_le(le: float) -> str:
+    return "+Inf" if le == float("inf") else f"{le:g}"
+
+
+def escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: Labels, values: Labels) -> str:
+    if not names:
+        return ""
+    return (
+        "{" + ",".join(f'{k}="{escape(str(v))}"' for k, v in zip(names, values)) + "}"
+    )
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        metric = self.register(Counter(name, help, labelnames))
+        assert isinstance(metric, Counter)
+        return metric
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        collect: Callable[[], dict[Labels, float]] | None = None,
+    ) -> Gauge:
+        metric = self.register(Gauge(name, help, labelnames, collect))
+        assert isinstance(metric, Gauge)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] | None = None,
+    ) -> Histogram:
+        metric = self.register(
+            Histogram(name, help, labelnames, buckets)
+            if buckets
+            else Histogram(name, help, labelnames)
+        )
+        assert isinstance(metric, Histogram)
+        return metric
+
+    def expose(self) -> str:
+        return "\n".join([m.expose() for m in self.metrics.values()]) + "\n"
+
+
+registry = Registry()
+
+
+def gc_objects() -> dict[Labels, float]:
+    counts = gc.get_count()
+    rs: dict[Labels, float] = {
+        (str(generation),): count for generation, count in enumerate(counts)
+    }
+    rs[("frozen",)] = gc.get_freeze_count()
+    return rs
+
+
+def pool_usage() -> dict[Labels, float]:
+    rs: dict[Labels, float] = {}
+    for conn in connections.all():
+        pool: Any = getattr(conn, "_pool", None)
+        if pool is None:
+            continue
+        name = conn.connection_name
+        if hasattr(pool, "get_size"):  # asyncpg
+            size, idle = pool.get_size(), pool.get_idle_size()
+        elif hasattr(pool, "freesize"):  # aiomysql / asyncmy
+            size, idle = pool.size, pool.freesize
+        else:
+            continue
+        rs[(name, "size")] = size
+        rs[(name, "used")] = size - idle
+    return rs
+
+
+http_requests = registry.counter(
+    "anyforce_http_requests_total", "HTTP 请求数", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "anyforce_http_request_duration_seconds", "HTTP 请求耗时", ("method", "route")
+)
+http_requests_in_flight = registry.gauge(
+    "anyforce_http_requests_in_flight", "处理中的 HTTP 请求数"
+)
+http_requests_rejected = registry.counter(
+    "anyforce_http_requests_rejected_total", "因过载被拒绝的 HTTP 请求数", ("kind",)
+)
+http_response_size = registry.histogram(
+    "anyforce_http_response_size_bytes",
+    "HTTP 响应大小",
+    ("method", "route"),
+    buckets=(100, 1000, 10_000, 100_000, 1_000_000, 10_000_000),
+)
+db_duration = registry.histogram(
+    "anyforce_db_duration_seconds", "每个请求的数据库耗时", ("method", "route")
+)
+db_pool = registry.gauge(
+    "anyforce_db_pool_connections",
+    "数据库连接池使用情况",
+    ("connection", "state"),
+    collect=pool_usage,
+)
+api_hook_duration = registry.histogram(
+    "anyforce_api_hook_duration_seconds", "API 钩子耗时", ("model", "hook")
+)
+event_loop_lag = registry.histogram(
+    "anyforce_event_loop_lag_seconds",
+    "事件循环延迟",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+event_loop_lag_quantile = registry.gauge(
+    "anyforce_event_loop_lag_quantile_seconds", "事件循环延迟分位数", ("quantile",)
+)
+gc_pause = registry.histogram(
+    "anyforce_gc_pause_seconds",
+    "垃圾回收停顿时间",
+    ("generation",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+gc_collected = registry.counter(
+    "anyforce_gc_collected_objects_total", "垃圾回收的对象数", ("generation",)
+)
+gc_objects_count = registry.gauge(
+    "anyforce_gc_objects",
+    "各代待回收对象数及冻结对象数",
+    ("generation",),
+    collect=gc_objects,
+)
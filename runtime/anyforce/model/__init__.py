@@ -1,18 +1,49 @@
+import asyncio
+import time
 from typing import Any
 
-from tortoise import Tortoise
+from tortoise import Tortoise, connections
 
+from ..logging import get_logger
 from .base import BaseModel, BaseUpdateModel
 from .enum import IntEnum, StrEnum
 from .recoverable import RecoverableModel
+from .replica import configure as configure_replicas
+
+logger = get_logger(__name__)
 
 
 async def init(config: dict[str, Any]):
     await Tortoise.init(config=config)  # type: ignore
+    configure_replicas(config)
     for k in config["apps"]:
         Tortoise.get_connection(k)
 
 
+async def warm_up(config: dict[str, Any], timeout: float = 30) -> dict[str, float]:
+    """
+    并发为每个连接打开 minsize 个连接并执行一次简单查询, 返回各连接耗时
+    """
+
+    async def f(name: str) -> float:
+        start = time.perf_counter()
+        conn = connections.get(name)
+        size = int(getattr(conn, "pool_minsize", 1))
+        await asyncio.gather(*[conn.execute_script("SELECT 1") for _ in range(size)])
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    names = list(config["connections"])
+    durations = await asyncio.wait_for(
+        asyncio.gather(*[f(name) for name in names]), timeout
+    )
+    rs = dict(zip(names, durations))
+    logger.bind(durations=rs, elapsed=time.perf_counter() - start).info(
+        "connections warmed up"
+    )
+    return rs
+
+
 def init_models(config: dict[str, Any]):
     for name, info in config["apps"].items():
         Tortoise.init_models(info["models"], name)
@@ -2,10 +2,13 @@ import inspect
 from datetime import datetime, time, timedelta, timezone
 from functools import lru_cache
 from typing import (
+    TYPE_CHECKING,
     Annotated,
     Any,
     Callable,
+    ClassVar,
     Dict,
+    Iterable,
     Literal,
     Optional,
     Type,
@@ -15,12 +18,11 @@ from typing import (
     get_type_hints,
 )
 
-from fastapi import BackgroundTasks
+from pydantic import AliasChoices, ConfigDict, create_model
 from pydantic import BaseModel as PydanticModel
-from pydantic import ConfigDict, create_model
 from pydantic.fields import FieldInfo
-from pydantic.functional_serializers import PlainSerializer
-from pydantic.functional_validators import BeforeValidator
+from pydantic.functional_serializers import PlainSerializer, WrapSerializer
+from pydantic.functional_validators import BeforeValidator, WrapValidator
 from pydantic_core import PydanticUndefined
 from tortoise import Tortoise
 from tortoise import fields as tortoise_fields
@@ -35,15 +37,30 @@ from tortoise.fields.relational import (
     RelationalField,
     ReverseRelation,
 )
+from tortoise.manager import Manager
 from tortoise.models import Model
 from tortoise.queryset import QuerySet
 
+from .. import tracing
 from .fields import (
+    BlobDBField,
+    Compressed,
+    CompressedDBField,
     CurrencyDBField,
     IntField,
+    LazyJSONAttribute,
+    LazyJSONDBField,
     LocalDatetimeField,
+    RawJSON,
     SplitCharDBField,
+    compress_all,
+    restore_compressed,
 )
+from .queryset import ModelManager, compressed_fields, deferred_fields
+from .search import SearchIndex
+
+if TYPE_CHECKING:
+    from fastapi import BackgroundTasks
 
 
 class BaseModel(Model):
@@ -51,6 +68,7 @@ class BaseModel(Model):
     created_at: datetime = LocalDatetimeField(
         null=False, auto_now_add=True, db_index=True
     )
+    search_index: ClassVar[SearchIndex | None] = None  # 全文索引
 
     class Meta(Model.Meta):
         abstract = True
@@ -70,6 +88,64 @@ class BaseModel(Model):
     class FormPydanticMeta(PydanticMeta):
         computed: tuple[str, ...] = tuple()  # set_{property} 函数
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        lazy = False
+        for name, field in cls.fields_map().items():
+            if isinstance(field, CompressedDBField):
+                lazy = True
+                setattr(cls, name, LazyJSONAttribute(name))
+            elif isinstance(field, LazyJSONDBField):
+                lazy = True
+                setattr(cls, name, LazyJSONAttribute(name))
+                setattr(
+                    cls,
+                    LazyJSONAttribute.raw_name(name),
+                    LazyJSONAttribute(name, raw=True),
+                )
+        if cls.search_index:
+            cls.search_index.validate(cls)
+        meta = getattr(cls, "_meta")
+        # 延迟解码的字段只在 ModelQuerySet 中返回原文
+        if (lazy or deferred_fields(cls)) and type(meta.manager) is Manager:
+            meta.manager = ModelManager()
+
+    async def save(
+        self,
+        using_db: BaseDBAsyncClient | None = None,
+        update_fields: Iterable[str] | None = None,
+        force_create: bool = False,
+        force_update: bool = False,
+    ) -> None:
+        compressed = compressed_fields(type(self))
+        if not update_fields and not force_create and self._saved_in_db:
+            # 只缺少 defer 字段时更新已加载的字段, 其余字段缺失时仍由 tortoise 报错;
+            # 未访问过的压缩字段没有修改, 不再写入
+            skip = {k for k in deferred_fields(type(self)) if k not in self.__dict__}
+            skip.update(
+                k for k in compressed if type(self.__dict__.get(k)) is Compressed
+            )
+            if skip:
+                pk_attr = self._meta.pk_attr
+                update_fields = [
+                    k
+                    for k in self._meta.fields_db_projection
+                    if k != pk_attr and k not in skip
+                ]
+        if update_fields is not None:
+            update_fields = list(update_fields)
+            compressed = [k for k in compressed if k in update_fields]
+        packed = await compress_all(self, compressed) if compressed else []
+        try:
+            await super().save(
+                using_db=using_db,
+                update_fields=update_fields,
+                force_create=force_create,
+                force_update=force_update,
+            )
+        finally:
+            restore_compressed(self, packed)
+
     def dict(
         self,
         mode: Literal["json", "python"] = "python",
@@ -266,6 +342,10 @@ class BaseModel(Model):
 
                 continue
 
+            if isinstance(field, BlobDBField) and is_form:
+                # 内容通过上传接口写入, 见 API.bind
+                continue
+
             field_default = field.default
             if required_override is True:
                 field_default = PydanticUndefined
@@ -317,6 +397,17 @@ class BaseModel(Model):
                 if not is_optional:
                     type_hint = Optional[type_hint]
 
+            if isinstance(field, LazyJSONDBField) and not is_form:
+                # 读取未解码的原文, 序列化时直接嵌入
+                type_hint = Annotated[
+                    type_hint,
+                    WrapValidator(RawJSON.validate),
+                    WrapSerializer(RawJSON.serialize),
+                ]
+                f_kwargs["validation_alias"] = AliasChoices(
+                    LazyJSONAttribute.raw_name(name), name
+                )
+
             fields[name] = (
                 type_hint,
                 FieldInfo(
@@ -482,41 +573,94 @@ class BaseModel(Model):
         self,
         *args: Any,
         using_db: BaseDBAsyncClient | None = None,
-        background_tasks: BackgroundTasks | None = None,
+        background_tasks: "BackgroundTasks | None" = None,
     ) -> None:
-        meta = self.PydanticMeta
+        return await self.fetch_related_list(
+            [self], *args, using_db=using_db, background_tasks=background_tasks
+        )
+
+    @classmethod
+    async def fetch_related_list(
+        cls,
+        objs: Iterable["BaseModel"],
+        *args: Any,
+        using_db: BaseDBAsyncClient | None = None,
+        background_tasks: "BackgroundTasks | None" = None,
+    ) -> None:
+        objs = list(objs)
+        if not objs:
+            return
+
+        meta = cls.PydanticMeta
         computed: set[str]
         if meta and hasattr(meta, "computed"):
             computed = set(meta.computed)
             for field in args:
-                if field in computed:
-                    f = getattr(self, field, None)
-                    if not f:
-                        continue
-                    if callable(f):
-                        kwargs: dict[str, Any] = {}
-                        parameters = inspect.signature(f).parameters
-                        if "background_tasks" in parameters:
-                            kwargs["background_tasks"] = background_tasks
-                        v = f(**kwargs)
-                        if inspect.isawaitable(v):
-                            v = await v
-                        setattr(self, field, v)
+                if field not in computed:
+                    continue
+                with tracing.span("computed", field=field):
+                    for obj in objs:
+                        f = getattr(obj, field, None)
+                        if not f:
+                            continue
+                        if callable(f):
+                            kwargs: dict[str, Any] = {}
+                            parameters = inspect.signature(f).parameters
+                            if "background_tasks" in parameters:
+                                kwargs["background_tasks"] = background_tasks
+                            v = f(**kwargs)
+                            if inspect.isawaitable(v):
+                                v = await v
+                            setattr(obj, field, v)
         else:
             computed = set()
 
+        deferred = [field for field in args if field in deferred_fields(cls)]
+        if deferred:
+            await cls.fetch_deferred(objs, *deferred, using_db=using_db)
+
         normalized_args = [
-            self.normalize_field(field) if isinstance(field, str) else field
+            cls.normalize_field(field) if isinstance(field, str) else field
             for field in args
-            if field not in computed
+            if field not in computed and field not in deferred
         ]
-        return await super().fetch_related(*normalized_args, using_db=using_db)
+        if not normalized_args:
+            return
+        # 关系字段整批一次查询, 避免逐个对象 N+1
+        await cls.fetch_for_list(objs, *normalized_args, using_db=using_db)
+
+    @classmethod
+    async def fetch_deferred(
+        cls,
+        objs: Iterable["BaseModel"],
+        *fields: str,
+        using_db: BaseDBAsyncClient | None = None,
+    ) -> None:
+        """
+        整批一次查询加载 defer 字段, 已加载的对象跳过
+        """
+        pending: dict[Any, list[BaseModel]] = {}
+        for obj in objs:
+            if not all(hasattr(obj, field) for field in fields):
+                pending.setdefault(obj.pk, []).append(obj)
+        if not pending:
+            return
+        with tracing.span("deferred", fields=",".join(fields), rows=len(pending)):
+            rows = await (
+                cls.filter(pk__in=list(pending))
+                .using_db(using_db)
+                .values_list(cls._meta.pk_attr, *fields)
+            )
+        for pk, *values in rows:
+            for obj in pending.get(pk, []):
+                for field, value in zip(fields, values):
+                    setattr(obj, field, value)
 
     async def fetch_related_lazy(
         self,
         path: str,
         using_db: BaseDBAsyncClient | None = None,
-        background_tasks: BackgroundTasks | None = None,
+        background_tasks: "BackgroundTasks | None" = None,
     ) -> Any | None:
         instance = getattr(self, path)
         if isinstance(instance, Model):
@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from typing import IO, Any, AsyncIterable, AsyncIterator
+
+from pydantic import BaseModel as PydanticModel
+from pydantic import ConfigDict
+
+hash_pattern = re.compile(r"[0-9a-f]{64}")
+
+
+class Blob(PydanticModel):
+    """
+    外部存储的二进制内容, 数据库中只保存 sha256 与大小
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    hash: str
+    size: int
+
+    @classmethod
+    def parse(cls, value: str) -> "Blob":
+        hash, _, size = value.partition(":")
+        if not hash_pattern.fullmatch(hash) or not size.isdigit():
+            raise ValueError(f"invalid blob: {value!r}")
+        return cls.model_construct(hash=hash, size=int(size))
+
+    def __str__(self) -> str:
+        return f"{self.hash}:{self.size}"
+
+
+class BlobStore(ABC):
+    """
+    以内容哈希寻址的对象存储, 相同内容只保存一份
+    """
+
+    @abstractmethod
+    async def put(self, data: bytes | AsyncIterable[bytes]) -> Blob: ...
+
+    @abstractmethod
+    async def exists(self, hash: str) -> bool: ...
+
+    @abstractmethod
+    def read(
+        self, hash: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """
+        读取 [start, end) 范围内的内容
+        """
+
+    @abstractmethod
+    async def delete(self, hash: str) -> None: ...
+
+
+class LocalBlobStore(BlobStore):
+    """
+    本地文件系统存储, 路径为 directory/ab/cd/abcd...
+
+    写入临时文件后原子替换, 多个 worker 并发写入相同内容也是安全的
+    """
+
+    def __init__(self, directory: str, chunk_size: int = 256 * 1024) -> None:
+        self.directory = directory
+        self.chunk_size = chunk_size
+
+    def path(self, hash: str) -> str:
+        if not hash_pattern.fullmatch(hash):
+            raise ValueError(f"invalid blob hash: {hash!r}")
+        return os.path.join(self.directory, hash[:2], hash[2:4], hash)
+
+    def commit(self, tmp: str, digest: Any) -> str:
+        hash = digest.hexdigest()
+        path = self.path(hash)
+        if os.path.exists(path):
+            os.unlink(tmp)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp, path)
+        return hash
+
+    def put_bytes(self, data: bytes) -> Blob:
+        os.makedirs(self.directory, exist_ok=True)
+        digest = hashlib.sha256(data)
+        path = self.path(digest.hexdigest())
+        if not os.path.exists(path):
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                self.commit(tmp, digest)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                raise
+        return Blob(hash=digest.hexdigest(), size=len(data))
+
+    async def put(self, data: bytes | AsyncIterable[bytes]) -> Blob:
+        if isinstance(data, bytes):
+            return await asyncio.to_thread(self.put_bytes, data)
+
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in data:
+                    if not chunk:
+                        continue
+                    digest.update(chunk)
+                    size += len(chunk)
+                    await asyncio.to_thread(f.write, chunk)
+            hash = await asyncio.to_thread(self.commit, tmp, digest)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return Blob(hash=hash, size=size)
+
+    async def exists(self, hash: str) -> bool:
+        return await asyncio.to_thread(os.path.exists, self.path(hash))
+
+    async def read(
+        self, hash: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterator[bytes]:
+        f: IO[bytes] = await asyncio.to_thread(open, self.path(hash), "rb")
+        try:
+            f.seek(start)
+            remaining = None if end is None else end - start
+            while remaining is None or remaining > 0:
+                n = (
+                    self.chunk_size
+                    if remaining is None
+                    else min(self.chunk_size, remaining)
+                )
+                chunk = await asyncio.to_thread(f.read, n)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            f.close()
+
+    async def delete(self, hash: str):
+        try:
+            await asyncio.to_thread(os.unlink, self.path(hash))
+        except FileNotFoundError:
+            pass
+
+
+stores: dict[str, BlobStore] = {}
+
+
+def configure(blob_stores: dict[str, BlobStore]):
+    stores.update(blob_stores)
+
+
+def get_store(name: str) -> BlobStore:
+    store = stores.get(name)
+    if store is None:
+        raise LookupError(f"blob store {name!r} is not configured")
+    return store
@@ -1,21 +1,34 @@
+import asyncio
 import math
+import secrets
+import zlib
+from abc import ABCMeta, abstractmethod
+from contextvars import ContextVar
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import (
     Any,
     Awaitable,
+    Iterable,
     Literal,
     Type,
+    TypeVar,
     cast,
 )
 
 import orjson
+from pydantic import BaseModel as PydanticModel
+from pydantic import (
+    SerializationInfo,
+    SerializerFunctionWrapHandler,
+    ValidatorFunctionWrapHandler,
+)
 from pypika_tortoise import functions
 from pypika_tortoise.enums import SqlTypes
 from pypika_tortoise.terms import Term
 from tortoise import fields
 from tortoise.fields import DatetimeField, relational
-from tortoise.fields.base import OnDelete
+from tortoise.fields.base import OnDelete, _FieldMeta  # pyright: ignore[reportPrivateUsage]
 from tortoise.fields.data import (
     DatetimeFieldQueryValueType,
     JsonDumpsFunc,
@@ -23,6 +36,10 @@ from tortoise.fields.data import (
 )
 from tortoise.models import Model
 
+from .blob import Blob, BlobStore, get_store
+
+T = TypeVar("T")
+
 
 def SmallIntField(
     source_field: str | None = None,
@@ -177,24 +194,129 @@ def DateField(
 
 TimeDeltaField = fields.TimeDeltaField
 UUIDField = fields.UUIDField
-BinaryField = fields.BinaryField
 
 BackwardFKRelation = fields.BackwardFKRelation
 ReverseRelation = fields.ReverseRelation
 ManyToManyRelation = relational.ManyToManyRelation
 
 
+def deferrable(field: T, defer: bool) -> T:
+    # defer=True 的字段不在默认查询中, 见 queryset.ModelQuerySet
+    setattr(field, "defer", defer)
+    return field
+
+
 def TextField(
     source_field: str | None = None,
     default: Any = None,
     description: str | None = None,
+    defer: bool = False,
+    compress: Literal["zlib", "zstd"] | None = None,
+    compress_threshold: int = 1024,
+    compress_level: int | None = None,
     **kwargs: Any,
 ):
     return cast(
         str | fields.TextField,
-        fields.TextField(
+        deferrable(
+            compressed(
+                fields.TextField,
+                compress,
+                compress_threshold,
+                compress_level,
+                source_field=source_field,
+                default=default,
+                description=description,
+                **kwargs,
+            ),
+            defer,
+        ),
+    )
+
+
+def BinaryField(
+    source_field: str | None = None,
+    null: bool = False,
+    default: Any = None,
+    description: str | None = None,
+    defer: bool = False,
+    **kwargs: Any,
+):
+    return cast(
+        bytes | fields.BinaryField,
+        deferrable(
+            fields.BinaryField(
+                source_field=source_field,
+                null=null,
+                default=default,
+                description=description,
+                **kwargs,
+            ),
+            defer,
+        ),
+    )
+
+
+class BlobDBField(fields.Field[Blob]):
+    """
+    内容保存在 BlobStore 中, 数据库只保存 `{sha256}:{size}`
+
+    max_size 为上传的字节数上限, None 表示不限
+    """
+
+    field_type = Blob
+    SQL_TYPE = "VARCHAR(96)"
+
+    def __init__(
+        self,
+        store: str = "default",
+        media_type: str = "application/octet-stream",
+        max_size: int | None = 100 * 1024 * 1024,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)  # type: ignore
+        self.store_name = store
+        self.media_type = media_type
+        self.max_size = max_size
+
+    @property
+    def store(self) -> BlobStore:
+        return get_store(self.store_name)
+
+    def to_python_value(self, value: Any) -> Blob | None:
+        if value is None or isinstance(value, Blob):
+            return value
+        if isinstance(value, dict):
+            return Blob.model_validate(value)
+        return Blob.parse(value)
+
+    def to_db_value(
+        self, value: Blob | str | None, instance: Type[Model] | Model
+    ) -> str | None:
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            raise TypeError("use `await field.store.put(data)` to store blob content")
+        return str(self.to_python_value(value))
+
+
+def BlobField(
+    store: str = "default",
+    media_type: str = "application/octet-stream",
+    max_size: int | None = 100 * 1024 * 1024,
+    source_field: str | None = None,
+    null: bool = False,
+    description: str | None = None,
+    **kwargs: Any,
+):
+    return cast(
+        Blob | BlobDBField,
+        BlobDBField(
+            store=store,
+            media_type=media_type,
+            max_size=max_size,
             source_field=source_field,
-            default=default,
+            null=null,
             description=description,
             **kwargs,
         ),
@@ -253,17 +375,404 @@ class TimeField(fields.TimeField):
         return value
 
 
+class RawJSONFragments:
+    """
+    序列化响应时收集的未解码 JSON 原文, 由响应替换占位符, 见 RawJSONResponse
+
+    占位符带有每个响应随机生成的 nonce, 字段中的字符串无法伪造
+    """
+
+    __slots__ = ("prefix", "items")
+
+    def __init__(self) -> None:
+        self.prefix = f"\x00anyforce.raw_json:{secrets.token_hex(16)}:"
+        self.items: list[bytes] = []
+
+    def add(self, raw: str | bytes) -> str:
+        self.items.append(raw.encode() if isinstance(raw, str) else raw)
+        return f"{self.prefix}{len(self.items) - 1}"
+
+
+raw_json_fragments: ContextVar[RawJSONFragments | None] = ContextVar(
+    "raw_json_fragments", default=None
+)
+
+
+class RawJSON:
+    """
+    从数据库读取的 JSON 原文, 访问字段时才解码
+
+    序列化为 JSON 且字段从未被访问时直接嵌入原文, 不经过解码与再编码
+    """
+
+    __slots__ = ("raw", "decoder")
+
+    def __init__(self, raw: str | bytes, decoder: JsonLoadsFunc) -> None:
+        self.raw = raw
+        self.decoder = decoder
+
+    def loads(self) -> Any:
+        return self.decoder(self.raw)
+
+    @staticmethod
+    def validate(v: Any, handler: ValidatorFunctionWrapHandler) -> Any:
+        return v if isinstance(v, RawJSON) else handler(v)
+
+    @staticmethod
+    def serialize(
+        v: Any, handler: SerializerFunctionWrapHandler, info: SerializationInfo
+    ):
+        if isinstance(v, RawJSON):
+            fragments = raw_json_fragments.get()
+            if fragments is not None and info.mode_is_json():
+                return fragments.add(v.raw)
+            v = v.loads()
+        return handler(v)
+
+
+class LazyJSONAttribute:
+    """
+    LazyJSONDBField / CompressedDBField 在模型 (或只读记录) 上的描述符, 首次访问时解码并缓存
+
+    raw 为 True 时返回未解码的 RawJSON (已解码则返回解码后的值), 供序列化使用
+    """
+
+    def __init__(self, name: str, slot: Any = None, raw: bool = False) -> None:
+        self.name = name
+        self.slot = slot
+        self.raw = raw
+
+    def load(self, obj: Any) -> Any:
+        if self.slot is not None:
+            return self.slot.__get__(obj)
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def store(self, obj: Any, value: Any):
+        if self.slot is not None:
+            self.slot.__set__(obj, value)
+        else:
+            obj.__dict__[self.name] = value
+
+    def __get__(self, obj: Any, cls: Any = None) -> Any:
+        if obj is None:
+            return self
+        v = self.load(obj)
+        if self.raw:
+            return v
+        t = v.__class__
+        if t is RawJSON:
+            v = v.loads()
+            self.store(obj, v)
+        elif t is Compressed:
+            if v.value is not None:
+                return v.value
+            v = v.loads()
+            self.store(obj, v)
+        return v
+
+    def __set__(self, obj: Any, value: Any):
+        if self.raw:
+            raise AttributeError(self.name)
+        self.store(obj, value)
+
+    @staticmethod
+    def raw_name(name: str) -> str:
+        return f"{name}__raw"
+
+
+# 查询结果由 LazyJSONAttribute 持有 (模型实例 / 只读记录) 时为 True, 此时返回 RawJSON;
+# 其余情况 (如 values / values_list) 与 JSONField 一样直接解码
+raw_json_lazy: ContextVar[bool] = ContextVar("raw_json_lazy", default=False)
+
+
+class LazyJSONDBField(fields.JSONField[Any]):
+    def to_python_value(self, value: Any) -> Any:
+        if isinstance(value, (str, bytes)) and raw_json_lazy.get():
+            return RawJSON(value, self.decoder)
+        return super().to_python_value(value)  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+
+    def to_db_value(self, value: Any, instance: Type[Model] | Model) -> Any:
+        if isinstance(value, RawJSON):
+            return value.raw if isinstance(value.raw, str) else value.raw.decode()
+        return super().to_db_value(value, instance)  # pyright: ignore[reportUnknownMemberType]
+
+
+compressed_lazy: ContextVar[bool] = ContextVar("compressed_lazy", default=False)
+
+# 单次批量解压 / 压缩的总字节数超过该值时在线程池中执行
+compress_offload_threshold = 64 * 1024
+
+# 格式标记, 不以标记开头的数据视为压缩前写入的原文
+compress_markers = {"raw": b"\x00", "zlib": b"\x01", "zstd": b"\x02"}
+
+
+def zstandard() -> Any:
+    try:
+        import zstandard  # pyright: ignore[reportMissingModuleSource]
+    except ImportError as e:  # pragma: no cover
+        raise ImportError("compress='zstd' requires the zstandard package") from e
+    return zstandard
+
+
+def compress(payload: bytes, algorithm: str, threshold: int, level: int) -> bytes:
+    if len(payload) >= threshold:
+        if algorithm == "zstd":
+            data = zstandard().ZstdCompressor(level=level).compress(payload)
+        else:
+            data = zlib.compress(payload, level)
+        if len(data) < len(payload):
+            return compress_markers[algorithm] + data
+    return compress_markers["raw"] + payload
+
+
+def decompress(data: bytes) -> bytes:
+    marker = data[:1]
+    if marker == compress_markers["raw"]:
+        return data[1:]
+    if marker == compress_markers["zlib"]:
+        return zlib.decompress(data[1:])
+    if marker == compress_markers["zstd"]:
+        return zstandard().ZstdDecompressor().decompress(data[1:])
+    return data
+
+
+class Compressed:
+    """
+    从数据库读取的压缩内容, 访问字段时才解压 (见 decompress_all)
+
+    保存时 value 为待写入的值, data 为其压缩结果
+    """
+
+    __slots__ = ("data", "field", "value")
+
+    def __init__(self, data: bytes, field: "CompressedDBField", value: Any = None):
+        self.data = data
+        self.field = field
+        self.value = value
+
+    def loads(self) -> Any:
+        return self.field.loads(decompress(self.data))
+
+
+# 与 tortoise 字段的元类合并, CompressedDBField 才能与字段类一同继承
+class CompressedFieldMeta(ABCMeta, _FieldMeta):
+    pass
+
+
+class CompressedDBField(metaclass=CompressedFieldMeta):
+    """
+    压缩存储的字段, 数据库中为格式标记 + (压缩后的) 内容
+
+    通过模型查询读取时返回 Compressed, 由 LazyJSONAttribute 在访问时解压
+    """
+
+    SQL_TYPE = "BLOB"
+    skip_to_python_if_native = False
+
+    class _db_postgres:
+        SQL_TYPE = "BYTEA"
+
+    class _db_mysql:
+        SQL_TYPE = "LONGBLOB"
+
+    class _db_mssql:
+        SQL_TYPE = "VARBINARY(MAX)"
+
+    class _db_oracle:
+        SQL_TYPE = "BLOB"
+
+    model_field_name: str
+
+    def __init__(
+        self,
+        compress: str = "zlib",
+        compress_threshold: int = 1024,
+        compress_level: int | None = None,
+        **kwargs: Any,
+    ) -> None:
+        if compress not in ("zlib", "zstd"):
+            raise ValueError(f"unsupported compress: {compress}")
+        if compress == "zstd":
+            zstandard()
+        super().__init__(**kwargs)
+        self.compress = compress
+        self.compress_threshold = compress_threshold
+        self.compress_level = (
+            compress_level
+            if compress_level is not None
+            else (3 if compress == "zstd" else 6)
+        )
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes: ...
+
+    @abstractmethod
+    def loads(self, payload: bytes) -> Any: ...
+
+    def pack(self, value: Any) -> bytes:
+        return self.compress_payload(self.dumps(value))
+
+    def compress_payload(self, payload: bytes) -> bytes:
+        return compress(
+            payload, self.compress, self.compress_threshold, self.compress_level
+        )
+
+    def to_python_value(self, value: Any) -> Any:
+        if isinstance(value, (bytearray, memoryview)):
+            value = bytes(cast(bytes, value))
+        if isinstance(value, bytes):
+            if compressed_lazy.get():
+                return Compressed(value, self)
+            return self.loads(decompress(value))
+        return value
+
+    def to_db_value(self, value: Any, instance: Type[Model] | Model) -> Any:
+        if value is None:
+            return None
+        if type(value) is Compressed:
+            return value.data
+        # 保存前已在 BaseModel.save 中压缩
+        holder = getattr(instance, "__dict__", {}).get(self.model_field_name)
+        if type(holder) is Compressed and holder.value is value:
+            return holder.data
+        return self.pack(value)
+
+
+class CompressedTextDBField(CompressedDBField, fields.TextField):
+    def dumps(self, value: Any) -> bytes:
+        return str(value).encode()
+
+    def loads(self, payload: bytes) -> Any:
+        return payload.decode()
+
+    def to_python_value(self, value: Any) -> Any:
+        return CompressedDBField.to_python_value(self, value)
+
+
+class CompressedJSONDBField(CompressedDBField, fields.JSONField[Any]):  # type: ignore
+    def dumps(self, value: Any) -> bytes:
+        if isinstance(value, PydanticModel):
+            value = value.model_dump()
+        # 自定义 encoder 可能返回 bytes (如 orjson.dumps)
+        v = cast(str | bytes, self.encoder(value))
+        return v.encode() if isinstance(v, str) else v
+
+    def loads(self, payload: bytes) -> Any:
+        return self.decoder(payload)
+
+    def to_python_value(self, value: Any) -> Any:
+        if isinstance(value, str):
+            # 压缩前以文本写入的数据
+            return fields.JSONField.to_python_value(self, value)  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+        return CompressedDBField.to_python_value(self, value)
+
+
+def compressed(
+    field_class: Type[fields.Field[Any]],
+    compress: str | None,
+    compress_threshold: int,
+    compress_level: int | None,
+    **kwargs: Any,
+) -> Any:
+    if compress is None:
+        return field_class(**kwargs)
+    compressed_class = (
+        CompressedJSONDBField
+        if issubclass(field_class, fields.JSONField)
+        else CompressedTextDBField
+    )
+    return compressed_class(
+        compress=compress,
+        compress_threshold=compress_threshold,
+        compress_level=compress_level,
+        **kwargs,
+    )
+
+
+async def decompress_all(objs: Iterable[Any], names: Iterable[str]):
+    """
+    整批解压模型 (或只读记录) 上未解压的字段, 总量较大时在线程池中执行
+    """
+    names = tuple(names)
+    pending: list[tuple[Any, str, Compressed]] = []
+    size = 0
+    for obj in objs:
+        cls = obj.__class__
+        for name in names:
+            attr = getattr(cls, name, None)
+            if not isinstance(attr, LazyJSONAttribute):
+                continue
+            try:
+                v = attr.load(obj)
+            except AttributeError:
+                continue
+            if type(v) is Compressed:
+                pending.append((obj, name, v))
+                size += len(v.data)
+    if size < compress_offload_threshold:
+        # 较小时访问字段时再解压
+        return
+    values = await asyncio.to_thread(lambda: [v.loads() for _, _, v in pending])
+    for (obj, name, _), value in zip(pending, values):
+        setattr(obj, name, value)
+
+
+async def compress_all(obj: Model, names: Iterable[str]) -> list[str]:
+    """
+    保存前压缩修改过的字段, 总量较大时在线程池中执行, 返回压缩的字段
+
+    保存完成后需调用 restore_compressed
+    """
+    fields_map = getattr(obj, "_meta").fields_map
+    pending: list[tuple[str, CompressedDBField, bytes, Any]] = []
+    for name in names:
+        v = obj.__dict__.get(name)
+        if v is None or type(v) is Compressed:
+            continue
+        field: CompressedDBField = fields_map[name]
+        pending.append((name, field, field.dumps(v), v))
+    if sum(len(payload) for _, _, payload, _ in pending) >= compress_offload_threshold:
+        data = await asyncio.to_thread(
+            lambda: [
+                field.compress_payload(payload) for _, field, payload, _ in pending
+            ]
+        )
+    else:
+        data = [field.compress_payload(payload) for _, field, payload, _ in pending]
+    for (name, field, _, v), d in zip(pending, data):
+        vars(obj)[name] = Compressed(d, field, v)
+    return [name for name, *_ in pending]
+
+
+def restore_compressed(obj: Model, names: Iterable[str]):
+    for name in names:
+        v = obj.__dict__.get(name)
+        if type(v) is Compressed:
+            vars(obj)[name] = v.value
+
+
 def JSONField(
     source_field: str | None = None,
     default: Any = None,
     description: str | None = None,
     encoder: JsonDumpsFunc = lambda x: orjson.dumps(x).decode(),
     decoder: JsonLoadsFunc = orjson.loads,
+    lazy: bool = False,
+    compress: Literal["zlib", "zstd"] | None = None,
+    compress_threshold: int = 1024,
+    compress_level: int | None = None,
     **kwargs: Any,
 ):
     return cast(
         dict[str, Any],
-        fields.JSONField(
+        compressed(
+            LazyJSONDBField if lazy else fields.JSONField,
+            compress,
+            compress_threshold,
+            compress_level,
             source_field=source_field,
             default=default,
             description=description,
@@ -280,11 +789,19 @@ def JSONListField(
     description: str | None = None,
     encoder: JsonDumpsFunc = lambda x: orjson.dumps(x).decode(),
     decoder: JsonLoadsFunc = orjson.loads,
+    lazy: bool = False,
+    compress: Literal["zlib", "zstd"] | None = None,
+    compress_threshold: int = 1024,
+    compress_level: int | None = None,
     **kwargs: Any,
 ):
     return cast(
         list[Any],
-        fields.JSONField(
+        compressed(
+            LazyJSONDBField if lazy else fields.JSONField,
+            compress,
+            compress_threshold,
+            compress_level,
             source_field=source_field,
             default=default,
             description=description,
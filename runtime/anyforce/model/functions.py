@@ -1,5 +1,10 @@
-from typing import Any, AsyncContextManager, Type
+import re
+from typing import Any, AsyncContextManager, Sequence, Type
 
+from pypika_tortoise.context import SqlContext
+from pypika_tortoise.enums import Dialects
+from pypika_tortoise.terms import Term
+from pypika_tortoise.utils import format_alias_sql
 from tortoise import transactions
 from tortoise.backends.base.client import (
     BaseDBAsyncClient,
@@ -35,3 +40,54 @@ def case(
     *args: When, default: str | float | F | Expression | Function | None = None
 ) -> CombinedExpression:
     return Case(*args, default=default)  # type: ignore
+
+
+# 路径中的键以双引号引用, 支持中文、空格等, 但不能包含引号、反斜杠及控制字符
+json_path_invalid = re.compile(r'["\\\x00-\x1f]')
+
+
+def check_json_path(path: Sequence[str]):
+    for segment in path:
+        if not segment or json_path_invalid.search(segment):
+            raise ValueError(f"invalid json path: {'.'.join(path)}")
+
+
+def json_path_sql(
+    dialect: Dialects, column: str, path: Sequence[str], cast: str | None = None
+) -> str:
+    """
+    按数据库生成 JSON 路径提取 (返回标量) 的 SQL, 也可用于声明生成列
+
+    path 中的数字视为数组下标, cast 仅用于 PostgreSQL (其余数据库比较时自动转换)
+    """
+    check_json_path(path)
+    if dialect == Dialects.POSTGRESQL:
+        elements = ",".join(f'"{segment}"' for segment in path).replace("'", "''")
+        sql = f"({column}#>>'{{{elements}}}')"
+        return f"{sql}::{cast}" if cast else sql
+    json_path = "$" + "".join(
+        f"[{segment}]" if segment.isdigit() else f'."{segment}"' for segment in path
+    ).replace("'", "''")
+    if dialect == Dialects.MYSQL:
+        return f"JSON_UNQUOTE(JSON_EXTRACT({column},'{json_path}'))"
+    return f"json_extract({column},'{json_path}')"
+
+
+class JSONExtract(Term):
+    """
+    JSON 字段中指定路径的值, 用于 annotate 后过滤, 见 API.translate_json_path
+    """
+
+    def __init__(
+        self, field: Term, path: Sequence[str], cast: str | None = None
+    ) -> None:
+        super().__init__()
+        self.field = field
+        self.path = tuple(path)
+        self.cast = cast
+
+    def get_sql(self, ctx: SqlContext) -> str:
+        # 字段没有别名, 直接使用 ctx 渲染
+        column = self.field.get_sql(ctx)
+        sql = json_path_sql(ctx.dialect, column, self.path, self.cast)
+        return format_alias_sql(sql, self.alias, ctx)
@@ -0,0 +1,127 @@
+import re
+import time
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+from typing import Any, Callable, Coroutine
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+methods = (
+    "execute_insert",
+    "execute_query",
+    "execute_script",
+    "execute_many",
+    "execute_query_dict",
+)
+
+
+class QueryEvent:
+    __slots__ = ("client", "sql", "values", "duration", "rows", "error")
+
+    def __init__(
+        self,
+        client: BaseDBAsyncClient,
+        sql: str,
+        values: Any,
+        duration: float,
+        rows: int | None,
+        error: BaseException | None,
+    ) -> None:
+        self.client = client
+        self.sql = sql
+        self.values = values
+        self.duration = duration
+        self.rows = rows
+        self.error = error
+
+    @property
+    def fingerprint(self) -> str:
+        return fingerprint(self.sql)
+
+
+listeners: list[Callable[[QueryEvent], Any]] = []
+
+# 嵌套调用 (子类 super()) 只记录最外层
+depth: ContextVar[int] = ContextVar("anyforce.model.instrument.depth", default=0)
+
+fingerprint_patterns = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\$\d+|%s"), "?"),
+    (re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)"), "(?+)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql: str) -> str:
+    for pattern, repl in fingerprint_patterns:
+        sql = pattern.sub(repl, sql)
+    return sql.strip()
+
+
+def count_rows(r: Any) -> int | None:
+    if isinstance(r, tuple):
+        r = r[-1]  # pyright: ignore[reportUnknownVariableType]
+    if isinstance(r, list):
+        return len(r)  # pyright: ignore[reportUnknownArgumentType]
+    return None
+
+
+def wrap(f: Callable[..., Coroutine[Any, Any, Any]]):
+    @wraps(f)
+    async def wrapper(self: BaseDBAsyncClient, *args: Any, **kwargs: Any) -> Any:
+        if not listeners or depth.get():
+            return await f(self, *args, **kwargs)
+
+        sql: str = args[0] if args else kwargs.get("query", "")
+        values = args[1] if len(args) > 1 else kwargs.get("values")
+        token = depth.set(1)
+        start = time.perf_counter()
+        r: Any = None
+        error: BaseException | None = None
+        try:
+            r = await f(self, *args, **kwargs)
+            return r
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            depth.reset(token)
+            event = QueryEvent(self, sql, values, duration, count_rows(r), error)
+            for listener in listeners:
+                listener(event)
+
+    setattr(wrapper, "__anyforce_instrumented__", True)
+    return wrapper
+
+
+def subclasses(cls: type) -> list[type]:
+    rs: list[type] = []
+    for sub in cls.__subclasses__():
+        rs.append(sub)
+        rs += subclasses(sub)
+    return rs
+
+
+def install():
+    """
+    包装所有已加载的数据库客户端类, 需要在 Tortoise.init 之后调用
+    """
+    for cls in [BaseDBAsyncClient, *subclasses(BaseDBAsyncClient)]:
+        for name in methods:
+            f = cls.__dict__.get(name)
+            if f is None or getattr(f, "__anyforce_instrumented__", False):
+                continue
+            setattr(cls, name, wrap(f))
+
+
+def add_listener(listener: Callable[[QueryEvent], Any]):
+    if listener not in listeners:
+        listeners.append(listener)
+
+
+def remove_listener(listener: Callable[[QueryEvent], Any]):
+    if listener in listeners:
+        listeners.remove(listener)
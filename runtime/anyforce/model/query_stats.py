@@ -0,0 +1,104 @@
+from collections import Counter, OrderedDict
+from typing import Any, Callable
+
+from . import instrument
+
+
+class ShapeStats:
+    __slots__ = ("count", "errors", "total", "max", "rows", "durations", "i", "routes")
+
+    def __init__(self, samples: int) -> None:
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.durations: list[float] = [0.0] * samples
+        self.i = 0
+        self.routes = Counter[str]()
+
+    def record(self, duration: float, rows: int | None, error: bool, route: str):
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+        if rows:
+            self.rows += rows
+        if error:
+            self.errors += 1
+        # 环形缓冲区保存最近的耗时用于计算分位数
+        self.durations[self.i % len(self.durations)] = duration
+        self.i += 1
+        if route and (route in self.routes or len(self.routes) < 16):
+            self.routes[route] += 1
+
+    @staticmethod
+    def percentile(sorted_durations: list[float], p: float) -> float:
+        if not sorted_durations:
+            return 0
+        return sorted_durations[
+            min(len(sorted_durations) - 1, int(len(sorted_durations) * p))
+        ]
+
+    def dict(self) -> dict[str, Any]:
+        durations = sorted(self.durations[: min(self.i, len(self.durations))])
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0,
+            "p95": self.percentile(durations, 0.95),
+            "p99": self.percentile(durations, 0.99),
+            "max": self.max,
+            "rows": self.rows,
+            "routes": dict(self.routes.most_common()),
+        }
+
+
+class QueryStatistics:
+    """
+    按 SQL 指纹聚合的统计, 最多保留 max_shapes 个指纹, 超出时淘汰最久未出现的
+    """
+
+    def __init__(self, max_shapes: int = 1000, samples: int = 256) -> None:
+        self.max_shapes = max_shapes
+        self.samples = samples
+        self.shapes: OrderedDict[str, ShapeStats] = OrderedDict()
+        self.evicted = 0
+        self.route: Callable[[], str] = lambda: ""
+
+    def install(self, route: Callable[[], str] | None = None):
+        if route:
+            self.route = route
+        instrument.install()
+        instrument.add_listener(self.record)
+
+    def uninstall(self):
+        instrument.remove_listener(self.record)
+
+    def record(self, event: instrument.QueryEvent):
+        fingerprint = event.fingerprint
+        stats = self.shapes.get(fingerprint)
+        if stats is None:
+            if len(self.shapes) >= self.max_shapes:
+                self.shapes.popitem(last=False)
+                self.evicted += 1
+            stats = self.shapes[fingerprint] = ShapeStats(self.samples)
+        else:
+            self.shapes.move_to_end(fingerprint)
+        stats.record(event.duration, event.rows, event.error is not None, self.route())
+
+    def reset(self):
+        self.shapes.clear()
+        self.evicted = 0
+
+    def top(self, limit: int = 50, order_by: str = "total") -> list[dict[str, Any]]:
+        rs = [
+            {"fingerprint": fingerprint, **stats.dict()}
+            for fingerprint, stats in list(self.shapes.items())
+        ]
+        rs.sort(key=lambda r: r.get(order_by, 0), reverse=True)
+        return rs[:limit]
+
+
+query_statistics = QueryStatistics()
@@ -1,6 +1,18 @@
-from typing import Literal
+import re
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Literal, Sequence, Type
 
-from tortoise.queryset import ValuesQuery
+import tortoise
+from tortoise.manager import Manager
+from tortoise.models import Model
+from tortoise.queryset import MODEL, QuerySet, ValuesListQuery, ValuesQuery
+
+from .fields import (
+    CompressedDBField,
+    compressed_lazy,
+    decompress_all,
+    raw_json_lazy,
+)
 
 
 class ValuesWithoutGroupByQuery(ValuesQuery[Literal[False]]):
@@ -28,3 +40,106 @@ class ValuesWithoutGroupByQuery(ValuesQuery[Literal[False]]):
         if not self._group_bys:
             # NOTE: resolve_filters will append joined table as groupbys
             setattr(self.query, "_groupbys", [])
+
+
+@lru_cache
+def deferred_fields(model: Type[Model]) -> tuple[str, ...]:
+    fields_map = getattr(model, "_meta").fields_map
+    return tuple(k for k, field in fields_map.items() if getattr(field, "defer", False))
+
+
+@lru_cache
+def default_projection(model: Type[Model]) -> tuple[str, ...]:
+    """
+    默认查询的数据库字段, 不包含 defer=True 的字段
+    """
+    deferred = deferred_fields(model)
+    projection = getattr(model, "_meta").fields_db_projection
+    return tuple(k for k in projection if k not in deferred)
+
+
+@lru_cache
+def compressed_fields(model: Type[Model]) -> tuple[str, ...]:
+    fields_map = getattr(model, "_meta").fields_map
+    return tuple(
+        k for k, field in fields_map.items() if isinstance(field, CompressedDBField)
+    )
+
+
+class ModelQuerySet(QuerySet[MODEL]):
+    """
+    - 未指定 only 时查询 default_projection, 查询得到的实例为 partial;
+      select_related 在 only 下不生效, 此时仍查询全部字段
+    - 压缩字段读取时不解压, 总量较大时整批在线程池中解压, 否则在访问时解压
+    """
+
+    __slots__ = ()
+
+    def _make_query(self) -> None:
+        if (
+            self._fields_for_select
+            or self._select_related
+            or not deferred_fields(self.model)
+        ):
+            return super()._make_query()
+        self._fields_for_select = (
+            *default_projection(self.model),
+            *self._annotations,
+        )
+        try:
+            super()._make_query()
+        finally:
+            self._fields_for_select = ()
+
+    async def _execute(self) -> Any:
+        compressed = compressed_fields(self.model)
+        lazy = raw_json_lazy.set(True)
+        try:
+            if not compressed:
+                return await super()._execute()
+            token = compressed_lazy.set(True)
+            try:
+                rs: Any = await super()._execute()
+            finally:
+                compressed_lazy.reset(token)
+        finally:
+            raw_json_lazy.reset(lazy)
+        # get/first 时为单个实例
+        await decompress_all([rs] if self._single else rs, compressed)
+        return rs
+
+
+class ModelManager(Manager):
+    def get_queryset(self) -> QuerySet[Any]:
+        model: Type[Model] = getattr(self, "_model")
+        return ModelQuerySet(model)
+
+
+# raw_values_list 依赖的私有接口已在这些版本上验证
+raw_values_versions = ((0, 25),)
+tortoise_version = tuple(int(v) for v in re.findall(r"\d+", tortoise.__version__)[:2])
+
+
+async def raw_values_list(
+    vq: ValuesListQuery[Literal[False]],
+) -> tuple[tuple[Any, ...], Sequence[Any], bool]:
+    """
+    执行 values_list 查询, 返回 (列键, 行, 是否未经 to_python_value 转换)
+
+    已验证的 Tortoise 版本上直接返回数据库驱动的行 (按列键取值), 跳过逐列转换;
+    其余版本退回公开的 await vq, 行为已转换的 tuple, 列键为下标。
+    两种方式都经过连接的 execute_query, 因此 instrument 的统计同样生效
+    """
+    if tortoise_version not in raw_values_versions:
+        rows: Sequence[Any] = await vq
+        return tuple(range(len(vq.fields))), rows, False
+
+    vq._choose_db_if_not_chosen()  # pyright: ignore[reportPrivateUsage]
+    vq._make_query()  # pyright: ignore[reportPrivateUsage]
+    db = vq._db  # pyright: ignore[reportPrivateUsage]
+    execute: Callable[..., Awaitable[tuple[int, Sequence[Any]]]] = getattr(
+        db, "execute_query"
+    )
+    sql: tuple[str, list[Any]] = getattr(vq.query, "get_parameterized_sql")()
+    _, rows = await execute(*sql)
+    return tuple(vq.fields), rows, True
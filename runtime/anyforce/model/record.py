@@ -0,0 +1,178 @@
+import inspect
+from functools import lru_cache
+from types import MemberDescriptorType
+from typing import Any, Callable, ClassVar, Type
+
+from tortoise.fields.relational import RelationalField
+from tortoise.models import Model
+from tortoise.queryset import QuerySet
+
+from .fields import (
+    CompressedDBField,
+    LazyJSONAttribute,
+    LazyJSONDBField,
+    compressed_lazy,
+    decompress_all,
+    raw_json_lazy,
+)
+from .queryset import compressed_fields, raw_values_list
+
+missing = object()
+
+
+class Computed:
+    """
+    计算字段: 已获取时返回值, 否则与 Model 一样返回绑定到记录的函数
+    """
+
+    __slots__ = ("slot", "f")
+
+    def __init__(self, slot: Any, f: Any) -> None:
+        self.slot = slot
+        self.f = f
+
+    def __get__(self, obj: Any, cls: Any = None) -> Any:
+        if obj is None:
+            return self
+        try:
+            return self.slot.__get__(obj, cls)
+        except AttributeError:
+            return self.f.__get__(obj, cls)
+
+    def __set__(self, obj: Any, value: Any):
+        self.slot.__set__(obj, value)
+
+
+class Record:
+    """
+    只读行记录, 由 values_list 的结果直接构造, 不经过 Model 实例化
+
+    - 只包含查询的数据库字段与计算字段, 使用 __slots__ 避免逐行分配 __dict__
+    - 未查询的数据库字段访问时抛出 AttributeError, 序列化时视为未设置
+    - 关系字段恒为 None, 需要关系字段时应使用 Model
+    - 其他属性 (方法、property、_meta 等) 从 Model 上获取并绑定到记录,
+      计算字段的函数因此可以直接使用
+    """
+
+    __slots__ = ()
+
+    model: ClassVar[Type[Model]]
+    fields: ClassVar[tuple[str, ...]]
+    setters: ClassVar[tuple[Callable[[Any, Any], None], ...]]
+    statics: ClassVar[dict[str, Any]]
+
+    def __getattr__(self, name: str) -> Any:
+        statics = self.statics
+        attr = statics.get(name, statics)
+        if attr is statics:
+            attr = statics[name] = self.static(name)
+        if attr is missing:
+            raise AttributeError(name)
+        get = getattr(attr.__class__, "__get__", None)
+        return get(attr, self, self.model) if get else attr
+
+    @classmethod
+    def static(cls, name: str) -> Any:
+        if name in cls.fields or name.startswith("__"):
+            return missing
+        attr = inspect.getattr_static(cls.model, name, missing)
+        return missing if isinstance(attr, MemberDescriptorType) else attr
+
+    def __repr__(self) -> str:
+        values = ", ".join(
+            f"{k}={getattr(self, k)!r}" for k in self.fields if hasattr(self, k)
+        )
+        return f"<{type(self).__name__} {values}>"
+
+
+@lru_cache
+def record_class(
+    model: Type[Model], fields: tuple[str, ...], computed: tuple[str, ...] = ()
+) -> Type[Record]:
+    fields_map = getattr(model, "_meta").fields_map
+    computed = tuple(
+        k
+        for k in computed
+        if k not in fields and callable(inspect.getattr_static(model, k, None))
+    )
+    # JSON 字段延迟解码 (及压缩字段延迟解压), 值存放在 _{name} 中
+    lazy = {
+        k
+        for k in fields
+        if isinstance(fields_map.get(k), (LazyJSONDBField, CompressedDBField))
+    }
+    attrs: dict[str, Any] = {
+        "__slots__": (
+            *[f"_{k}" if k in lazy else k for k in fields],
+            *[f"_{k}" for k in computed],
+        ),
+        "__module__": model.__module__,
+        "model": model,
+        "fields": fields,
+        "statics": {},
+    }
+    for name, field in fields_map.items():
+        if isinstance(field, RelationalField) and name not in fields:
+            attrs[name] = None
+    cls = type(f"{model.__name__}Record", (Record,), attrs)
+    cls.setters = tuple(
+        getattr(cls, f"_{k}" if k in lazy else k).__set__ for k in fields
+    )
+    for k in lazy:
+        slot = getattr(cls, f"_{k}")
+        setattr(cls, k, LazyJSONAttribute(k, slot))
+        if isinstance(fields_map[k], LazyJSONDBField):
+            setattr(
+                cls, LazyJSONAttribute.raw_name(k), LazyJSONAttribute(k, slot, True)
+            )
+    for k in computed:
+        setattr(cls, k, Computed(getattr(cls, f"_{k}"), getattr(model, k)))
+    return cls
+
+
+@lru_cache
+def converters(
+    model: Type[Model], fields: tuple[str, ...]
+) -> tuple[Callable[[Any], Any] | None, ...]:
+    meta = getattr(model, "_meta")
+    native = {k for k, _, _ in meta.db_native_fields}
+    return tuple(
+        None if k in native else meta.fields_map[k].to_python_value for k in fields
+    )
+
+
+async def fetch_records(
+    q: QuerySet[Any], fields: tuple[str, ...], computed: tuple[str, ...] = ()
+) -> list[Any]:
+    """
+    以只读记录的形式获取查询结果, fields 为数据库字段 (fields_db_projection 的键)
+    """
+    model: Type[Model] = q.model
+    cls = record_class(model, fields, computed)
+    setters = cls.setters
+    decoders = converters(model, fields)
+
+    # 字段已由 fields 指定, values_list 不能与 only 同时使用
+    q = q._clone()  # pyright: ignore[reportPrivateUsage]
+    q._fields_for_select = ()  # pyright: ignore[reportPrivateUsage]
+    new = object.__new__
+    records: list[Any] = []
+    token = compressed_lazy.set(True)
+    lazy = raw_json_lazy.set(True)
+    try:
+        keys, rows, raw = await raw_values_list(q.values_list(*fields))
+        if not raw:
+            decoders = (None,) * len(fields)
+        for row in rows:
+            record = new(cls)
+            for key, set, decode in zip(keys, setters, decoders):
+                v = row[key]
+                set(record, v if decode is None or v is None else decode(v))
+            records.append(record)
+    finally:
+        raw_json_lazy.reset(lazy)
+        compressed_lazy.reset(token)
+    compressed = compressed_fields(model)
+    if compressed:
+        await decompress_all(records, [k for k in compressed if k in fields])
+    return records
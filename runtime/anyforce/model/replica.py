@@ -0,0 +1,77 @@
+import itertools
+import time
+from typing import Any, Hashable, Iterator
+
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient, TransactionalDBClient
+
+
+class Replicas:
+    """
+    只读副本路由: 主库连接名 -> 副本连接名列表
+
+    写入后 `sticky_seconds` 内同一 key 的读请求仍走主库, 保证读到自己的写入
+    """
+
+    def __init__(self, sticky_seconds: float = 5, max_sticky_keys: int = 10000):
+        self.sticky_seconds = sticky_seconds
+        self.max_sticky_keys = max_sticky_keys
+        self.pools: dict[str, Iterator[str]] = {}
+        self.written_at: dict[tuple[str, Hashable], float] = {}
+
+    def configure(
+        self,
+        replicas: dict[str, list[str]],
+        sticky_seconds: float | None = None,
+    ):
+        self.pools = {
+            primary: itertools.cycle(names)
+            for primary, names in replicas.items()
+            if names
+        }
+        self.written_at.clear()
+        if sticky_seconds is not None:
+            self.sticky_seconds = sticky_seconds
+
+    def mark_written(self, connection_name: str | None, key: Hashable | None):
+        if connection_name not in self.pools or key is None:
+            return
+        now = time.monotonic()
+        if len(self.written_at) >= self.max_sticky_keys:
+            self.written_at = {
+                k: v
+                for k, v in self.written_at.items()
+                if now - v < self.sticky_seconds
+            }
+        self.written_at[(connection_name, key)] = now
+
+    def is_sticky(self, connection_name: str, key: Hashable | None) -> bool:
+        if key is None:
+            return False
+        written_at = self.written_at.get((connection_name, key))
+        return (
+            written_at is not None
+            and time.monotonic() - written_at < self.sticky_seconds
+        )
+
+    def db_for_read(
+        self, connection_name: str | None, key: Hashable | None = None
+    ) -> BaseDBAsyncClient | None:
+        if connection_name is None:
+            return None
+        pool = self.pools.get(connection_name)
+        if pool is None:
+            return None
+        # 事务内读写一致, 始终使用主库
+        if isinstance(connections.get(connection_name), TransactionalDBClient):
+            return None
+        if self.is_sticky(connection_name, key):
+            return None
+        return connections.get(next(pool))
+
+
+replicas = Replicas()
+
+
+def configure(config: dict[str, Any]):
+    replicas.configure(config.get("replicas", {}), config.get("replica_sticky_seconds"))
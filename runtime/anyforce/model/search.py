@@ -0,0 +1,222 @@
+import re
+from typing import TYPE_CHECKING, Any, Iterable, Type, cast
+
+from pypika_tortoise.context import SqlContext
+from pypika_tortoise.enums import Dialects
+from pypika_tortoise.terms import Field as pikaField
+from pypika_tortoise.terms import Term, ValueWrapper
+from pypika_tortoise.utils import format_alias_sql
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.fields import CharField, Field, TextField
+
+from .fields import CompressedDBField
+
+if TYPE_CHECKING:
+    from tortoise.models import Model
+
+search_token = re.compile(r"\w+")
+
+dialects = {
+    "sqlite": Dialects.SQLITE,
+    "mysql": Dialects.MYSQL,
+    "postgres": Dialects.POSTGRESQL,
+}
+
+
+def dialect_of(db: BaseDBAsyncClient) -> Dialects:
+    return dialects.get(db.capabilities.dialect, Dialects.SQLITE)
+
+
+class SearchIndex:
+    """
+    全文索引声明, 按数据库使用 SQLite FTS5 / MySQL FULLTEXT / PostgreSQL tsvector
+
+        class Article(BaseModel):
+            search_index = SearchIndex("title", "content")
+
+    - 索引由 generate_schemas 创建, 也可将 ddl 的结果写入迁移
+    - 索引均由数据库维护: SQLite 使用以模型表为外部内容的 FTS5 表,
+      由 ddl 中的触发器同步, 因此 QuerySet.update、bulk_create 及原生 SQL 写入
+      也会更新索引; 创建前已有的数据由 rebuild 写入
+    - 查询以单词为单位且需全部命中, language 为 PostgreSQL 的分词配置,
+      tokenize 为 FTS5 的分词器 (中文等可使用 trigram)
+    """
+
+    def __init__(
+        self, *fields: str, language: str = "simple", tokenize: str = "unicode61"
+    ) -> None:
+        assert fields
+        self.fields = fields
+        self.language = language
+        self.tokenize = tokenize
+
+    def validate(self, model: Type["Model"]):
+        meta = getattr(model, "_meta")
+        pk: Field[Any] | None = meta.fields_map.get(meta.pk_attr)
+        if pk is None or pk.field_type is not int:
+            # FTS5 以整数 rowid 关联模型表
+            raise ValueError(f"{model.__name__} needs an integer primary key to search")
+        for name in self.fields:
+            field = meta.fields_map.get(name)
+            if not isinstance(field, (CharField, TextField)) or isinstance(
+                field, CompressedDBField
+            ):
+                raise ValueError(f"{model.__name__}.{name} can not be searched")
+
+    @staticmethod
+    def table(model: Type["Model"]) -> str:
+        return getattr(model, "_meta").db_table
+
+    @staticmethod
+    def db(model: Type["Model"], db: BaseDBAsyncClient | None) -> BaseDBAsyncClient:
+        if db is None:
+            db = cast(BaseDBAsyncClient, getattr(model, "_choose_db")(True))
+        return db
+
+    def index_name(self, model: Type["Model"]) -> str:
+        return f"{self.table(model)}_search"
+
+    def columns(self, model: Type["Model"]) -> list[str]:
+        projection = getattr(model, "_meta").fields_db_projection
+        return [projection[name] for name in self.fields]
+
+    def tsvector(self, columns: Iterable[str]) -> str:
+        document = " || ' ' || ".join(f"coalesce({c}, '')" for c in columns)
+        return f"to_tsvector('{self.language}', {document})"
+
+    def ddl(self, model: Type["Model"], dialect: Dialects) -> list[str]:
+        table = self.table(model)
+        index = self.index_name(model)
+        if dialect == Dialects.MYSQL:
+            columns = ", ".join(f"`{c}`" for c in self.columns(model))
+            return [f"CREATE FULLTEXT INDEX `{index}` ON `{table}` ({columns})"]
+        columns = [f'"{c}"' for c in self.columns(model)]
+        if dialect == Dialects.POSTGRESQL:
+            return [
+                f'CREATE INDEX IF NOT EXISTS "{index}" ON "{table}" '
+                f"USING GIN (({self.tsvector(columns)}))"
+            ]
+
+        pk = f'"{getattr(model, "_meta").db_pk_column}"'
+        names = ", ".join(columns)
+        new = ", ".join(f"new.{c}" for c in columns)
+        old = ", ".join(f"old.{c}" for c in columns)
+        insert = f'INSERT INTO "{index}" (rowid, {names}) VALUES (new.{pk}, {new});'
+        delete = (
+            f'INSERT INTO "{index}" ("{index}", rowid, {names}) '
+            f"VALUES ('delete', old.{pk}, {old});"
+        )
+        return [
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{index}" USING fts5({names}, '
+            f"content='{table}', content_rowid='{pk[1:-1]}', "
+            f"tokenize='{self.tokenize}')",
+            f'CREATE TRIGGER IF NOT EXISTS "{index}_ai" AFTER INSERT ON "{table}" '
+            f"BEGIN {insert} END",
+            f'CREATE TRIGGER IF NOT EXISTS "{index}_ad" AFTER DELETE ON "{table}" '
+            f"BEGIN {delete} END",
+            f'CREATE TRIGGER IF NOT EXISTS "{index}_au" '
+            f'AFTER UPDATE OF {pk}, {names} ON "{table}" BEGIN {delete} {insert} END',
+        ]
+
+    async def create(self, model: Type["Model"], db: BaseDBAsyncClient | None = None):
+        db = self.db(model, db)
+        dialect = dialect_of(db)
+        if dialect == Dialects.MYSQL:
+            # MySQL 不支持 CREATE INDEX IF NOT EXISTS
+            _, rows = await db.execute_query(  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+                f"SHOW INDEX FROM `{self.table(model)}` WHERE Key_name = %s",
+                [self.index_name(model)],
+            )
+            if rows:
+                return
+        for sql in self.ddl(model, dialect):
+            await db.execute_script(sql)
+        await self.rebuild(model, db)
+
+    async def rebuild(self, model: Type["Model"], db: BaseDBAsyncClient | None = None):
+        """
+        按模型表重建 SQLite 的索引, 其余数据库无需重建
+        """
+        db = self.db(model, db)
+        if dialect_of(db) == Dialects.SQLITE:
+            index = self.index_name(model)
+            await db.execute_script(
+                f'INSERT INTO "{index}" ("{index}") VALUES (\'rebuild\')'
+            )
+
+
+def search_query(dialect: Dialects, text: str) -> str:
+    """
+    将用户输入转为各数据库的查询语法, 只保留单词, 避免输入被当作查询运算符
+    """
+    tokens = search_token.findall(text)
+    if dialect == Dialects.MYSQL:
+        return " ".join(f"+{token}" for token in tokens)
+    if dialect == Dialects.POSTGRESQL:
+        return " ".join(tokens)
+    return " ".join(f'"{token}"' for token in tokens)
+
+
+class Search(Term):
+    """
+    全文检索条件 (rank 为 False) 或相关度 (rank 为 True, 越大越相关)
+    """
+
+    def __init__(self, model: Type["Model"], text: str, rank: bool = False) -> None:
+        super().__init__()
+        index: SearchIndex | None = getattr(model, "search_index", None)
+        assert index
+        self.model = model
+        self.index = index
+        self.text = text
+        self.rank = rank
+
+    def get_sql(self, ctx: SqlContext) -> str:
+        meta: Any = getattr(self.model, "_meta")
+        text = search_query(ctx.dialect, self.text)
+        if not text:
+            # 没有可检索的单词时不过滤
+            return format_alias_sql("0" if self.rank else "(1 = 1)", self.alias, ctx)
+        query = ValueWrapper(text).get_sql(ctx)
+
+        if ctx.dialect == Dialects.SQLITE:
+            pk = pikaField(meta.db_pk_column, table=meta.basetable).get_sql(ctx)
+            index = f'"{self.index.index_name(self.model)}"'
+            if self.rank:
+                sql = (
+                    f"(SELECT -bm25({index}) FROM {index} "
+                    f"WHERE {index} MATCH {query} AND {index}.rowid = {pk})"
+                )
+            else:
+                sql = f"{pk} IN (SELECT rowid FROM {index} WHERE {index} MATCH {query})"
+            return format_alias_sql(sql, self.alias, ctx)
+
+        columns = [
+            pikaField(c, table=meta.basetable).get_sql(ctx)
+            for c in self.index.columns(self.model)
+        ]
+        if ctx.dialect == Dialects.MYSQL:
+            sql = f"MATCH ({', '.join(columns)}) AGAINST ({query} IN BOOLEAN MODE)"
+            if not self.rank:
+                sql = f"({sql} > 0)"
+        else:
+            tsquery = f"plainto_tsquery('{self.index.language}', {query})"
+            tsvector = self.index.tsvector(columns)
+            sql = (
+                f"ts_rank({tsvector}, {tsquery})"
+                if self.rank
+                else f"({tsvector} @@ {tsquery})"
+            )
+        return format_alias_sql(sql, self.alias, ctx)
+
+
+async def generate_schemas():
+    """
+    在 Tortoise.generate_schemas 之后为声明了 search_index 的模型创建全文索引
+    """
+    for app in Tortoise.apps.values():
+        for model in app.values():
+            index: SearchIndex | None = getattr(model, "search_index", None)
+            if index and not getattr(model, "_meta").abstract:
+                await index.create(model)
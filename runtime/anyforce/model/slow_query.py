@@ -0,0 +1,151 @@
+import asyncio
+import random
+import re
+import time
+from contextvars import Context
+from typing import Any, Awaitable, Callable, Sequence
+
+from tortoise import connections
+
+from ..logging import get_logger
+from . import instrument
+
+logger = get_logger(__name__)
+
+select_pattern = re.compile(r"^\s*(\(\s*)*(SELECT|WITH)\b", re.IGNORECASE)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def acquire(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+def redact_values(values: Any) -> Any:
+    if isinstance(values, (list, tuple)):
+        return [redact_values(v) for v in values]  # pyright: ignore[reportUnknownVariableType]
+    if values is None:
+        return None
+    return f"<{type(values).__name__}>"
+
+
+class SlowQueryLog:
+    """
+    慢查询日志, 超过阈值的语句记录指纹、参数、路由并异步采集 EXPLAIN
+
+    - sample_rate: 慢查询的采样比例
+    - max_per_second: 日志速率上限
+    - explain_per_minute: EXPLAIN 速率上限, 同一指纹在 explain_interval 秒内只采集一次
+    - redact: True 时参数只记录类型, 也可以传入自定义脱敏函数
+    """
+
+    def __init__(
+        self,
+        threshold: float = 1,
+        sample_rate: float = 1,
+        max_per_second: float = 10,
+        explain: bool = True,
+        explain_per_minute: float = 6,
+        explain_interval: float = 600,
+        explain_timeout: float = 5,
+        redact: bool | Callable[[Any], Any] = True,
+    ) -> None:
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.explain_timeout = explain_timeout
+        self.redact = redact
+        self.log_bucket = TokenBucket(max_per_second)
+        self.explain_bucket = TokenBucket(explain_per_minute / 60, 1)
+        self.explained_at: dict[str, float] = {}
+        self.tasks: set[asyncio.Task[None]] = set()
+        self.route: Callable[[], str] = lambda: ""
+
+    def install(self, route: Callable[[], str] | None = None):
+        if route:
+            self.route = route
+        instrument.install()
+        instrument.add_listener(self.record)
+
+    def uninstall(self):
+        instrument.remove_listener(self.record)
+
+    def values(self, values: Any) -> Any:
+        if callable(self.redact):
+            return self.redact(values)
+        if self.redact:
+            return redact_values(values)
+        return values
+
+    def record(self, event: instrument.QueryEvent):
+        if event.duration < self.threshold:
+            return
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+        if not self.log_bucket.acquire():
+            return
+
+        fingerprint = event.fingerprint
+        log = logger.bind(
+            fingerprint=fingerprint,
+            duration=round(event.duration, 6),
+            rows=event.rows,
+            values=self.values(event.values),
+            route=self.route(),
+            connection=event.client.connection_name,
+        )
+        if self.should_explain(event, fingerprint):
+            # 使用空上下文, 避免复用当前请求中的事务连接, 也不再被统计
+            task = asyncio.get_running_loop().create_task(
+                self.log_with_explain(log, event), context=Context()
+            )
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        else:
+            log.warning("slow query")
+
+    def should_explain(self, event: instrument.QueryEvent, fingerprint: str) -> bool:
+        if not self.explain or event.error or not select_pattern.match(event.sql):
+            return False
+        now = time.monotonic()
+        explained_at = self.explained_at.get(fingerprint)
+        if explained_at is not None and now - explained_at < self.explain_interval:
+            return False
+        if not self.explain_bucket.acquire():
+            return False
+        if len(self.explained_at) > 4096:
+            self.explained_at.clear()
+        self.explained_at[fingerprint] = now
+        return True
+
+    async def log_with_explain(self, log: Any, event: instrument.QueryEvent):
+        instrument.depth.set(1)
+        plan: Any = None
+        try:
+            client = connections.get(event.client.connection_name)
+            prefix: str = getattr(client.executor_class, "EXPLAIN_PREFIX", "EXPLAIN")
+            # tortoise 未标注 execute_query 结果行的类型
+            execute: Callable[..., Awaitable[tuple[int, Sequence[Any]]]] = getattr(
+                client, "execute_query"
+            )
+            _, rows = await asyncio.wait_for(
+                execute(f"{prefix} {event.sql}", event.values), self.explain_timeout
+            )
+            plan = [dict(row) for row in rows]
+        except Exception as e:
+            log = log.bind(explain_error=repr(e))
+        log.bind(explain=plan).warning("slow query")
@@ -0,0 +1,368 @@
+import asyncio
+import gzip
+import hashlib
+import inspect
+import os
+import tempfile
+import time
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Callable, Iterable, cast
+from urllib.parse import quote
+
+import orjson
+from fastapi import FastAPI, Query, Request
+from fastapi.dependencies.utils import get_flat_dependant
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
+from fastapi.responses import Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel as PydanticModel
+from tortoise import Tortoise
+
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+packages = ("anyforce", "fastapi", "pydantic", "tortoise-orm")
+
+
+def stable(v: Any, seen: set[int] | None = None) -> Any:
+    """
+    转换为跨进程稳定的可序列化结构, 函数与类使用限定名代替 repr 中的内存地址
+    """
+    seen = seen if seen is not None else set()
+    if isinstance(v, dict):
+        items = cast(dict[Any, Any], v).items()
+        return sorted(
+            ([str(k), stable(x, seen)] for k, x in items), key=lambda kv: kv[0]
+        )
+    if isinstance(v, (list, tuple)):
+        return [stable(x, seen) for x in cast(Iterable[Any], v)]
+    if isinstance(v, (set, frozenset)):
+        return sorted(str(stable(x, seen)) for x in cast(Iterable[Any], v))
+    if isinstance(v, type) and issubclass(v, PydanticModel):
+        name = f"{v.__module__}.{v.__qualname__}"
+        if id(v) in seen:
+            return name
+        seen.add(id(v))
+        return [
+            name,
+            [
+                [k, stable(field.annotation, seen), repr(field.default)]
+                for k, field in v.model_fields.items()
+            ],
+        ]
+    obj = cast(Any, v)  # 避免被上面的 isinstance 收窄为 type[Unknown]
+    if inspect.isclass(obj) or inspect.isroutine(obj):
+        name = f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', obj)}"
+        annotations = getattr(obj, "__annotations__", None)
+        if inspect.isroutine(obj) and annotations:
+            return [name, stable(dict(annotations), seen)]
+        return name
+    if isinstance(v, (str, int, float, bool)) or v is None:
+        return v
+    r = repr(obj)
+    return obj.__class__.__qualname__ if " at 0x" in r else r
+
+
+def models_metadata() -> list[Any]:
+    rs: list[Any] = []
+    for app, models in sorted(Tortoise.apps.items()):
+        for name, model in sorted(models.items()):
+            meta = getattr(model, "_meta")
+            rs.append(
+                [
+                    app,
+                    name,
+                    [
+                        [k, field.describe(True)]
+                        for k, field in sorted(meta.fields_map.items())
+                    ],
+                    *[
+                        stable(
+                            {
+                                k: getattr(meta_class, k)
+                                for k in dir(meta_class)
+                                if not k.startswith("__")
+                            }
+                        )
+                        for meta_class in (
+                            getattr(model, "PydanticMeta", None),
+                            getattr(model, "FormPydanticMeta", None),
+                        )
+                        if meta_class
+                    ],
+                    stable(
+                        {
+                            k: getattr(model, k, None)
+                            for k in getattr(
+                                getattr(model, "PydanticMeta", None), "computed", ()
+                            )
+                        }
+                    ),
+                ]
+            )
+    return rs
+
+
+def routes_metadata(routes: Iterable[Any]) -> list[Any]:
+    rs: list[Any] = []
+    for route in routes:
+        if not isinstance(route, APIRoute):
+            rs.append([getattr(route, "path", ""), getattr(route, "name", "")])
+            continue
+        dependant = get_flat_dependant(route.dependant)
+        rs.append(
+            [
+                route.path,
+                sorted(route.methods),
+                route.name,
+                route.status_code,
+                route.include_in_schema,
+                route.tags,
+                route.description,
+                stable(route.endpoint),
+                stable(route.response_model),
+                [
+                    [param.name, stable(param.field_info.annotation)]
+                    for params in (
+                        dependant.path_params,
+                        dependant.query_params,
+                        dependant.header_params,
+                        dependant.cookie_params,
+                        dependant.body_params,
+                    )
+                    for param in params
+                ],
+            ]
+        )
+    return rs
+
+
+def versions() -> list[str]:
+    rs: list[str] = []
+    for package in packages:
+        try:
+            rs.append(f"{package}=={version(package)}")
+        except PackageNotFoundError:
+            rs.append(package)
+    return rs
+
+
+def metadata_hash(routes: Iterable[Any], *extra: Any) -> str:
+    """
+    模型字段、PydanticMeta、FormPydanticMeta、路由及依赖版本的哈希, 任何一项变化都会使缓存失效
+    """
+    return hashlib.sha256(
+        orjson.dumps(
+            [versions(), models_metadata(), routes_metadata(routes), stable(extra)],
+            default=str,
+        )
+    ).hexdigest()
+
+
+class OpenAPICache:
+    """
+    OpenAPI 文档磁盘缓存, 同一主机上的 worker 共享
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"openapi-{key}.json")
+
+    def load(self, key: str) -> dict[str, Any] | None:
+        try:
+            with open(self.path(key), "rb") as f:
+                return orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+
+    def store(self, key: str, schema: dict[str, Any]):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # 先写临时文件再原子替换, 避免其他 worker 读到不完整的文件
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps(schema))
+            os.replace(tmp, self.path(key))
+        except OSError as e:
+            logger.bind(e=repr(e), directory=self.directory).warning(
+                "store openapi cache"
+            )
+
+
+schema_ref_prefix = "#/components/schemas/"
+
+
+def schema_refs(node: Any, refs: set[str]):
+    if isinstance(node, dict):
+        for k, v in node.items():  # pyright: ignore[reportUnknownVariableType]
+            if k == "$ref" and isinstance(v, str) and v.startswith(schema_ref_prefix):
+                refs.add(v[len(schema_ref_prefix) :])
+            else:
+                schema_refs(v, refs)
+    elif isinstance(node, list):
+        for v in node:  # pyright: ignore[reportUnknownVariableType]
+            schema_refs(v, refs)
+
+
+class OpenAPIDocument:
+    """
+    预先序列化并压缩的 OpenAPI 文档, 可按路径前缀拆分出子文档
+    """
+
+    def __init__(self, schema: dict[str, Any], max_partitions: int = 256) -> None:
+        self.schema = schema
+        self.body = orjson.dumps(schema)
+        self.gzipped = gzip.compress(self.body, 6)
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.max_partitions = max_partitions
+        self.partitions: dict[str, OpenAPIDocument | None] = {}
+
+    def partition(self, prefix: str) -> "OpenAPIDocument | None":
+        prefix = "/" + prefix.strip("/")
+        if prefix in self.partitions:
+            return self.partitions[prefix]
+
+        paths: dict[str, Any] = {
+            path: item
+            for path, item in self.schema.get("paths", {}).items()
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/")
+        }
+        document = None
+        if paths:
+            # 只保留子文档用到的 schema
+            schemas: dict[str, Any] = self.schema.get("components", {}).get(
+                "schemas", {}
+            )
+            refs: set[str] = set()
+            pending: set[str] = set()
+            schema_refs(paths, pending)
+            while pending:
+                name = pending.pop()
+                if name in refs or name not in schemas:
+                    continue
+                refs.add(name)
+                schema_refs(schemas[name], pending)
+            components = {**self.schema.get("components", {})}
+            components["schemas"] = {k: v for k, v in schemas.items() if k in refs}
+            document = OpenAPIDocument(
+                {**self.schema, "paths": paths, "components": components}, 0
+            )
+        if len(self.partitions) < self.max_partitions:
+            self.partitions[prefix] = document
+        return document
+
+    def response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Vary": "Accept-Encoding"}
+        if etag_matches(self.etag, request.headers.get("if-none-match", "")):
+            return Response(status_code=304, headers=headers)
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            return Response(
+                self.gzipped,
+                media_type="application/json",
+                headers={**headers, "Content-Encoding": "gzip"},
+            )
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """
+    If-None-Match 为 * 或逗号分隔的 ETag 列表, 使用弱比较 (忽略 W/ 前缀)
+    """
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class OpenAPIHandler:
+    """
+    启动后生成 OpenAPI 文档, 替代 FastAPI 默认的 /openapi.json 及文档页面
+
+    - prepare 在事件循环中分段执行, 用于生成与请求共用的响应模型 (非线程安全)
+    - build 及文档的序列化、压缩在后台线程中执行
+    """
+
+    def __init__(
+        self,
+        app: FastAPI,
+        build: Callable[[], dict[str, Any]],
+        prepare: Callable[[], Iterable[Any]] | None = None,
+    ) -> None:
+        self.app = app
+        self.build = build
+        self.prepare = prepare
+        self.task: asyncio.Task[OpenAPIDocument] | None = None
+
+    async def generate(self) -> OpenAPIDocument:
+        start = time.perf_counter()
+        if self.prepare:
+            for _ in self.prepare():
+                await asyncio.sleep(0)
+        document = await asyncio.to_thread(lambda: OpenAPIDocument(self.build()))
+        logger.bind(
+            elapsed=time.perf_counter() - start,
+            size=len(document.body),
+            gzipped=len(document.gzipped),
+        ).info("openapi built")
+        return document
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self.generate())
+
+    async def document(self) -> OpenAPIDocument:
+        self.start()
+        assert self.task
+        return await asyncio.shield(self.task)
+
+    def bind(
+        self,
+        openapi_url: str = "/openapi.json",
+        docs_url: str | None = "/docs",
+        redoc_url: str | None = "/redoc",
+    ):
+        app = self.app
+
+        @app.get(openapi_url, include_in_schema=False)
+        async def _(request: Request, prefix: str = Query("")) -> Response:
+            document = await self.document()
+            if prefix:
+                partition = document.partition(prefix)
+                if partition is None:
+                    return Response(status_code=404)
+                document = partition
+            return document.response(request)
+
+        async def url(request: Request) -> str | None:
+            root_path = request.scope.get("root_path", "").rstrip("/")
+            prefix = request.query_params.get("prefix", "")
+            if not prefix:
+                return root_path + openapi_url
+            # 只接受存在的子文档, 且转义后再写入页面
+            if (await self.document()).partition(prefix) is None:
+                return None
+            return f"{root_path}{openapi_url}?prefix={quote(prefix, safe='/')}"
+
+        if docs_url:
+
+            @app.get(docs_url, include_in_schema=False)
+            async def _(request: Request) -> Response:
+                openapi = await url(request)
+                if openapi is None:
+                    return Response(status_code=404)
+                return get_swagger_ui_html(
+                    openapi_url=openapi, title=f"{app.title} - Swagger UI"
+                )
+
+        if redoc_url:
+
+            @app.get(redoc_url, include_in_schema=False)
+            async def _(request: Request) -> Response:
+                openapi = await url(request)
+                if openapi is None:
+                    return Response(status_code=404)
+                return get_redoc_html(openapi_url=openapi, title=f"{app.title} - ReDoc")
@@ -0,0 +1,110 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Any
+
+Frame = tuple[str, str, int]
+
+
+class Sampler:
+    """
+    在后台线程中定时采集目标线程的调用栈, 事件循环线程上所有协程都会被采集到
+    """
+
+    def __init__(self, interval: float = 0.001, max_depth: int = 128) -> None:
+        self.interval = interval
+        self.max_depth = max_depth
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter[tuple[Frame, ...]]()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.start = 0.0
+        self.end = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args: Any):
+        self.stopped.set()
+        self.thread.join()
+        self.end = time.perf_counter()
+
+    def stack(self, frame: FrameType | None) -> tuple[Frame, ...]:
+        stack: list[Frame] = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)  # pyright: ignore[reportPrivateUsage]
+            if frame is not None:
+                self.stacks[self.stack(frame)] += 1
+            del frame
+
+    def collapsed(self) -> str:
+        return "".join(
+            ";".join(f"{name} ({file}:{line})" for name, file, line in stack)
+            + f" {count}\n"
+            for stack, count in self.stacks.most_common()
+        )
+
+    def speedscope(self, name: str) -> dict[str, Any]:
+        frames: dict[Frame, int] = {}
+        samples: list[list[int]] = []
+        weights: list[float] = []
+        for stack, count in self.stacks.items():
+            samples.append([frames.setdefault(frame, len(frames)) for frame in stack])
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {
+                "frames": [
+                    {"name": name, "file": file, "line": line}
+                    for name, file, line in frames
+                ]
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": self.end - self.start,
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+            "exporter": "anyforce",
+        }
+
+
+class Profiler:
+    """
+    cProfile 后备方案, 精确统计调用次数但开销更大
+    """
+
+    def __init__(self) -> None:
+        self.profile = cProfile.Profile()
+
+    def __enter__(self):
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *args: Any):
+        self.profile.disable()
+
+    def text(self, limit: int = 100) -> str:
+        s = io.StringIO()
+        pstats.Stats(self.profile, stream=s).sort_stats("cumulative").print_stats(limit)
+        return s.getvalue()
@@ -0,0 +1,379 @@
+import asyncio
+import gc
+import os
+import random
+import select
+import signal
+import socket
+import sys
+import time
+from dataclasses import dataclass
+from types import FrameType
+from typing import Any, Awaitable, Callable
+
+import uvicorn
+from uvicorn.importer import import_from_string
+
+from .gc_tuner import GCTuner
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        # Linux 下单位为 KB, 且为峰值
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def bind(
+    host: str, port: int, reuse_port: bool = True, backlog: int = 2048
+) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        # 每个 worker 独立监听, 由内核分发连接
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def prebuild(app: Any):
+    """
+    在父进程中初始化模型并生成 OpenAPI, fork 后 worker 通过写时复制共享
+
+    应用配置了 GCTuner(freeze=True) 时在 fork 前执行 gc.freeze()
+    """
+    from .model import init_models
+
+    state = getattr(app, "state", None)
+    config: dict[str, Any] | None = getattr(state, "tortoise_config", None)
+    gc_tuner: GCTuner | None = getattr(state, "gc_tuner", None)
+    start = time.perf_counter()
+    # 失败时直接抛出, 不带着未初始化的模型 fork 出 worker
+    if config:
+        init_models(config)
+    openapi = getattr(app, "openapi", None)
+    if openapi:
+        openapi()
+    if gc_tuner and gc_tuner.freeze:
+        # fork 前冻结, 避免 worker 中的回收写入对象头导致共享页被复制
+        gc.collect()
+        gc.freeze()
+    logger.bind(elapsed=time.perf_counter() - start).info("prebuilt")
+
+
+class Server(uvicorn.Server):
+    accept_grace = 0.5
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        ready_fd: int,
+        max_memory: int,
+        drain: Callable[[], Awaitable[None]] | None = None,
+    ) -> None:
+        super().__init__(config)
+        self.ready_fd = ready_fd
+        self.max_memory = max_memory
+        self.drain = drain
+        self.draining = False
+
+    def handle_exit(self, sig: int, frame: FrameType | None) -> None:
+        # 只有 SIGTERM (停止服务) 需要等待负载均衡摘除, 滚动重启及回收时
+        # 其他 worker 仍在共享的 socket 上 accept, 直接退出即可
+        if sig == signal.SIGTERM:
+            self.draining = True
+        super().handle_exit(sig, frame)
+
+    async def on_tick(self, counter: int) -> bool:
+        if self.ready_fd >= 0 and self.started:
+            os.write(self.ready_fd, b"1")
+            os.close(self.ready_fd)
+            self.ready_fd = -1
+        if self.max_memory and counter % 50 == 0 and rss() > self.max_memory:
+            logger.bind(pid=os.getpid(), rss=rss()).info("max memory, recycling")
+            self.should_exit = True
+        return await super().on_tick(counter)
+
+    async def shutdown(self, sockets: list[socket.socket] | None = None) -> None:
+        if self.drain and self.draining:
+            # 仍在 accept 时等待摘除及处理中的请求结束, /healthz 此时返回 503
+            await self.drain()
+        # 先停止 accept, 已建立但尚未发送请求的连接在此期间内仍会被处理,
+        # 否则 uvicorn 会直接关闭它们
+        for server in self.servers:
+            server.close()
+        await asyncio.sleep(self.accept_grace)
+        await super().shutdown(sockets)
+
+
+@dataclass
+class Worker:
+    pid: int
+    ready_fd: int
+    started_at: float
+
+
+class Arbiter:
+    """
+    预先加载应用后 fork 出多个 worker 并监督
+
+    - SIGHUP: 滚动重启, 新 worker 就绪后再停止旧 worker
+    - SIGTERM / SIGINT: 优雅停止, 超过 graceful_timeout 后强制结束; worker 收到
+      SIGTERM 时先执行应用的 app.state.drain (create_app 提供), 等待负载均衡摘除
+    - max_requests / max_memory: worker 达到上限后退出并由父进程重新拉起
+    - 默认由父进程监听, worker 共享继承的 socket, 重启 worker 不会丢弃已排队的连接
+    - reuse_port: 改为每个 worker 以 SO_REUSEPORT 独立监听, 由内核均衡分发;
+      但 worker 退出时其监听队列中尚未 accept 的连接会被内核重置
+    """
+
+    def __init__(
+        self,
+        app: str,
+        host: str = "0.0.0.0",
+        port: int = 8000,
+        workers: int = 1,
+        factory: bool = False,
+        reuse_port: bool = False,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        max_memory: int = 0,
+        graceful_timeout: float = 30,
+        startup_timeout: float = 60,
+        **uvicorn_config: Any,
+    ) -> None:
+        self.app_path = app
+        self.host = host
+        self.port = port
+        self.workers_count = workers
+        self.factory = factory
+        self.reuse_port = reuse_port
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.max_memory = max_memory
+        self.graceful_timeout = graceful_timeout
+        self.startup_timeout = startup_timeout
+        self.uvicorn_config = uvicorn_config
+        self.app: Any = None
+        self.sock: socket.socket | None = None
+        self.workers: dict[int, Worker] = {}
+        self.retiring: set[int] = set()
+        self.stopping = False
+        self.reloading = False
+        self.backoff = 0.0
+
+    def load(self):
+        app = import_from_string(self.app_path)
+        self.app = app() if self.factory else app
+        prebuild(self.app)
+
+    def spawn(self) -> Worker:
+        r, w = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            os.close(r)
+            for worker in self.workers.values():
+                os.close(worker.ready_fd)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            # 发给整个进程组的 SIGHUP 由父进程处理
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            code = 0
+            try:
+                self.serve(w)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                logger.exception("worker failed")
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            os._exit(code)
+
+        os.close(w)
+        worker = Worker(pid, r, time.monotonic())
+        self.workers[pid] = worker
+        logger.bind(pid=pid).info("worker spawned")
+        return worker
+
+    def serve(self, ready_fd: int):  # pragma: no cover
+        random.seed()
+        max_requests = self.max_requests
+        if max_requests and self.max_requests_jitter:
+            max_requests += random.randint(0, self.max_requests_jitter)
+        config = uvicorn.Config(
+            self.app,
+            loop="uvloop",
+            lifespan="on",
+            limit_max_requests=max_requests or None,
+            timeout_graceful_shutdown=int(self.graceful_timeout),
+            **self.uvicorn_config,
+        )
+        sock = self.sock or bind(self.host, self.port)
+        drain = getattr(getattr(self.app, "state", None), "drain", None)
+        Server(config, ready_fd, self.max_memory, drain).run(sockets=[sock])
+
+    def wait_ready(self, worker: Worker) -> bool:
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            readable, _, _ = select.select([worker.ready_fd], [], [], 0.1)
+            if readable:
+                return os.read(worker.ready_fd, 1) == b"1"
+            if self.reap_one(worker.pid):
+                return False
+        return False
+
+    def reap_one(self, pid: int) -> bool:
+        try:
+            pid, _ = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            pid = -1
+        if pid == 0:
+            return False
+        self.forget(pid)
+        return True
+
+    def forget(self, pid: int):
+        worker = self.workers.pop(pid, None)
+        if worker:
+            os.close(worker.ready_fd)
+        self.retiring.discard(pid)
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self.workers.get(pid)
+            retired = pid in self.retiring
+            self.forget(pid)
+            if worker is None or retired or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            lifetime = time.monotonic() - worker.started_at
+            logger.bind(pid=pid, code=code, lifetime=lifetime).info("worker exited")
+            # 启动即退出时逐步退避, 避免频繁重启
+            self.backoff = min(max(self.backoff * 2, 0.5), 30) if lifetime < 5 else 0
+            if self.backoff:
+                time.sleep(self.backoff)
+            self.spawn()
+
+    def reload(self):
+        logger.info("rolling restart")
+        for pid in list(self.workers):
+            if self.stopping:
+                return
+            worker = self.spawn()
+            if not self.wait_ready(worker):
+                logger.bind(pid=worker.pid).error("new worker not ready, abort")
+                self.kill(worker.pid, signal.SIGKILL)
+                return
+            self.retiring.add(pid)
+            # 新 worker 已在共享的 socket 上 accept, 旧 worker 无需等待摘除
+            self.kill(pid, signal.SIGINT)
+
+    def kill(self, pid: int, sig: int):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            self.forget(pid)
+
+    def stop(self):
+        logger.bind(workers=list(self.workers)).info("stopping")
+        for pid in list(self.workers):
+            self.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            logger.bind(pid=pid).warning("graceful timeout, killing")
+            self.kill(pid, signal.SIGKILL)
+        while self.workers:
+            self.reap()
+            time.sleep(0.01)
+
+    def handle_stop(self, sig: int, frame: Any):
+        self.stopping = True
+
+    def handle_reload(self, sig: int, frame: Any):
+        self.reloading = True
+
+    def run(self) -> int:
+        self.load()
+        if not self.reuse_port:
+            self.sock = bind(self.host, self.port, reuse_port=False)
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        signal.signal(signal.SIGHUP, self.handle_reload)
+
+        for _ in range(self.workers_count):
+            self.spawn()
+        logger.bind(
+            pid=os.getpid(), host=self.host, port=self.port, workers=self.workers_count
+        ).info("serving")
+
+        while not self.stopping:
+            self.reap()
+            if self.reloading:
+                self.reloading = False
+                self.reload()
+            time.sleep(0.1)
+        self.stop()
+        if self.sock:
+            self.sock.close()
+        return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="anyforce")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="prefork 方式启动应用")
+    serve.add_argument("app", help="module:attribute")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    serve.add_argument("--factory", action="store_true")
+    serve.add_argument("--reuse-port", action="store_true")
+    serve.add_argument("--max-requests", type=int, default=0)
+    serve.add_argument("--max-requests-jitter", type=int, default=0)
+    serve.add_argument("--max-memory", type=int, default=0, help="MB")
+    serve.add_argument("--graceful-timeout", type=float, default=30)
+    serve.add_argument("--startup-timeout", type=float, default=60)
+    serve.add_argument("--proxy-headers", action="store_true")
+    serve.add_argument("--forwarded-allow-ips", default=None)
+    serve.add_argument("--no-access-log", action="store_true")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.getcwd())
+    return Arbiter(
+        args.app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        factory=args.factory,
+        reuse_port=args.reuse_port,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        max_memory=args.max_memory * 1024 * 1024,
+        graceful_timeout=args.graceful_timeout,
+        startup_timeout=args.startup_timeout,
+        proxy_headers=args.proxy_headers,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+        access_log=not args.no_access_log,
+    ).run()
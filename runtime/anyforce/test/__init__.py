@@ -1,3 +1,15 @@
-from .api import TestAPI, TestConfigs
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .api import TestAPI, TestConfigs
+
+
+def __getattr__(name: str) -> Any:
+    if name in __all__:
+        from . import api
+
+        return getattr(api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ["TestConfigs", "TestAPI"]
@@ -1,13 +1,15 @@
 import logging
 from functools import cached_property
-from typing import Any, Callable, Iterable, cast
+from typing import TYPE_CHECKING, Any, Callable, Iterable, cast
 
-from faker import Faker
 from fastapi.encoders import jsonable_encoder
 from fastapi.testclient import TestClient
 
 from .request import delete, get, post, put
 
+if TYPE_CHECKING:
+    from faker import Faker
+
 logger = logging.getLogger()
 
 
@@ -22,7 +24,9 @@ TestConfigs = Iterable[
 
 class TestAPI:
     @cached_property
-    def faker(self) -> Faker:
+    def faker(self) -> "Faker":
+        from faker import Faker
+
         return Faker()
 
     def create(
@@ -1,4 +1,6 @@
-from typing import Iterable
+import os
+import tempfile
+from typing import Any, Iterable
 
 import pytest
 from fastapi import FastAPI
@@ -6,17 +8,45 @@ from fastapi.testclient import TestClient
 from tortoise import Tortoise
 
 from ..api import exceptions
+from ..model import search
+from ..model.replica import configure as configure_replicas
 
 
-async def init_tortoise(models: Iterable[str]):
-    await Tortoise.init(  # type: ignore
-        db_url="sqlite://:memory:", modules={"models": models}
-    )
+def replica_db_path() -> str:
+    return os.path.join(tempfile.gettempdir(), f"anyforce-{os.getpid()}.sqlite3")
+
+
+def tortoise_config(models: Iterable[str], replicas: int = 0) -> dict[str, Any]:
+    if not replicas:
+        return {
+            "connections": {"default": "sqlite://:memory:"},
+            "apps": {"models": {"models": list(models)}},
+        }
+
+    # 只读副本替身: 与主库共享同一个 SQLite 文件
+    url = f"sqlite://{replica_db_path()}"
+    replica_names = [f"replica{i}" for i in range(replicas)]
+    return {
+        "connections": {"default": url, **{name: url for name in replica_names}},
+        "apps": {"models": {"models": list(models), "default_connection": "default"}},
+        "replicas": {"default": replica_names},
+    }
+
+
+async def init_tortoise(models: Iterable[str], replicas: int = 0):
+    config = tortoise_config(models, replicas)
+    await Tortoise.init(config=config)  # type: ignore
+    configure_replicas(config)
+
+
+@pytest.fixture(scope="session")
+def replicas() -> int:
+    return 0
 
 
 @pytest.fixture(scope="session")
-async def app(models: Iterable[str]):
-    await init_tortoise(models)
+async def app(models: Iterable[str], replicas: int):
+    await init_tortoise(models, replicas)
     app = FastAPI()
     exceptions.register(app)
     yield app
@@ -28,8 +58,14 @@ def client(app: FastAPI) -> TestClient:
 
 
 @pytest.fixture(scope="session")
-async def database(models: Iterable[str]):
-    await init_tortoise(models)
+async def database(models: Iterable[str], replicas: int):
+    path = replica_db_path()
+    if replicas and os.path.exists(path):
+        os.remove(path)
+    await init_tortoise(models, replicas)
     await Tortoise.generate_schemas(False)
+    await search.generate_schemas()
     yield True
     await Tortoise.close_connections()
+    if replicas and os.path.exists(path):
+        os.remove(path)
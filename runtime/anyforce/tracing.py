@@ -0,0 +1,294 @@
+import asyncio
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Generator
+
+import orjson
+
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class Span:
+    __slots__ = (
+        "trace",
+        "name",
+        "span_id",
+        "parent_id",
+        "start",
+        "end",
+        "attributes",
+        "error",
+    )
+
+    def __init__(
+        self,
+        trace: "Trace",
+        name: str,
+        parent_id: str,
+        attributes: dict[str, Any],
+    ) -> None:
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start = time.time_ns()
+        self.end = 0
+        self.attributes = attributes
+        self.error = ""
+
+    @property
+    def duration(self) -> float:
+        return (self.end - self.start) / 1e9
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "end": self.end,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    def __init__(self, tracer: "Tracer", trace_id: str | None = None) -> None:
+        self.tracer = tracer
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.spans: list[Span] = []
+
+
+current: ContextVar[Span | None] = ContextVar("anyforce.tracing.current", default=None)
+
+
+class Exporter(ABC):
+    @abstractmethod
+    def export(self, spans: list[Span]) -> None: ...
+
+
+class MemoryExporter(Exporter):
+    def __init__(self, maxlen: int = 10000) -> None:
+        self.spans: deque[dict[str, Any]] = deque(maxlen=maxlen)
+
+    def export(self, spans: list[Span]) -> None:
+        self.spans.extend(span.dict() for span in spans)
+
+
+class FileExporter(Exporter):
+    """
+    每行一个 JSON 格式的 span, 在事件循环中时由线程追加写入, 不阻塞事件循环
+    """
+
+    def __init__(self, path: str, max_queue: int = 8192) -> None:
+        self.path = path
+        self.queue: deque[Span] = deque(maxlen=max_queue)
+        self.task: asyncio.Task[None] | None = None
+
+    def export(self, spans: list[Span]) -> None:
+        self.queue.extend(spans)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self.flush()
+        if self.task is None or self.task.done():
+            self.task = loop.create_task(self.run())
+
+    async def run(self):
+        while self.queue:
+            await asyncio.to_thread(self.flush)
+
+    def flush(self):
+        batch = [self.queue.popleft() for _ in range(len(self.queue))]
+        if not batch:
+            return
+        with open(self.path, "ab") as f:
+            f.write(
+                b"".join(
+                    orjson.dumps(span.dict(), default=str) + b"\n" for span in batch
+                )
+            )
+
+
+def otlp_value(v: Any) -> dict[str, Any]:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": str(v)}
+
+
+def to_otlp(spans: list[Span], service_name: str) -> dict[str, Any]:
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": otlp_value(service_name)}
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "anyforce"},
+                        "spans": [
+                            {
+                                "traceId": span.trace.trace_id,
+                                "spanId": span.span_id,
+                                "parentSpanId": span.parent_id,
+                                "name": span.name,
+                                "kind": 2 if not span.parent_id else 1,
+                                "startTimeUnixNano": str(span.start),
+                                "endTimeUnixNano": str(span.end),
+                                "attributes": [
+                                    {"key": k, "value": otlp_value(v)}
+                                    for k, v in span.attributes.items()
+                                ],
+                                "status": (
+                                    {"code": 2, "message": span.error}
+                                    if span.error
+                                    else {"code": 0}
+                                ),
+                            }
+                            for span in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class OTLPExporter(Exporter):
+    """
+    以 OTLP/HTTP JSON 格式批量发送到 collector, 例如 http://localhost:4318/v1/traces
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        service_name: str = "anyforce",
+        headers: dict[str, str] | None = None,
+        max_batch: int = 512,
+        interval: float = 5,
+        max_queue: int = 8192,
+    ) -> None:
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.max_batch = max_batch
+        self.interval = interval
+        self.queue: deque[Span] = deque(maxlen=max_queue)
+        self.task: asyncio.Task[None] | None = None
+
+    def export(self, spans: list[Span]) -> None:
+        self.queue.extend(spans)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def run(self):
+        await asyncio.sleep(self.interval)
+        while self.queue:
+            await self.flush()
+
+    async def flush(self):
+        import aiohttp
+
+        batch = [
+            self.queue.popleft() for _ in range(min(len(self.queue), self.max_batch))
+        ]
+        if not batch:
+            return
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    self.endpoint,
+                    data=orjson.dumps(to_otlp(batch, self.service_name), default=str),
+                    headers=self.headers,
+                ) as response:
+                    if response.status >= 300:
+                        logger.bind(status=response.status).warning("otlp export")
+        except Exception as e:
+            logger.bind(e=repr(e)).warning("otlp export")
+
+
+class Tracer:
+    """
+    头部采样: 在请求入口决定是否采样, 未采样的请求内 span() 不产生任何对象
+    """
+
+    def __init__(
+        self,
+        exporter: Exporter,
+        sample_rate: float = 0.01,
+        max_spans: int = 1000,
+    ) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.max_spans = max_spans
+
+    def sampled(self, traceparent: str = "") -> tuple[bool, str | None, str]:
+        # W3C traceparent: 00-{trace_id}-{parent_id}-{flags}
+        parts = traceparent.split("-")
+        if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+            return parts[3] == "01", parts[1], parts[2]
+        return random.random() < self.sample_rate, None, ""
+
+    @contextmanager
+    def trace(
+        self, name: str, traceparent: str = "", **attributes: Any
+    ) -> Generator[Span | None, None, None]:
+        sampled, trace_id, parent_id = self.sampled(traceparent)
+        if not sampled:
+            yield None
+            return
+        trace = Trace(self, trace_id)
+        with start_span(trace, name, parent_id, attributes) as root:
+            yield root
+        try:
+            self.exporter.export(trace.spans)
+        except Exception as e:
+            logger.bind(e=repr(e)).warning("export spans")
+
+
+@contextmanager
+def start_span(
+    trace: Trace, name: str, parent_id: str, attributes: dict[str, Any]
+) -> Generator[Span, None, None]:
+    span = Span(trace, name, parent_id, attributes)
+    token = current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = repr(e)
+        raise
+    finally:
+        span.end = time.time_ns()
+        current.reset(token)
+        if len(trace.spans) < trace.tracer.max_spans:
+            trace.spans.append(span)
+
+
+@contextmanager
+def noop() -> Generator[None, None, None]:
+    yield None
+
+
+def span(name: str, **attributes: Any):
+    parent = current.get()
+    if parent is None:
+        return noop()
+    return start_span(parent.trace, name, parent.span_id, attributes)
@@ -20,6 +20,11 @@ def models():
     return [name]
 
 
+@pytest.fixture(scope="session")
+def replicas():
+    return 1
+
+
 @pytest.fixture(scope="session")
 def router(app: FastAPI):
     class CreateForm(Model2.form()):
@@ -1,4 +1,9 @@
+from typing import Any
+
+import orjson
+
 from anyforce.model import BaseUpdateModel, StrEnum, fields
+from anyforce.model.search import SearchIndex
 
 
 class CharEnum(StrEnum):
@@ -55,6 +60,40 @@ class Model2(BaseUpdateModel):
         return self.int_field + self.bigint_field
 
 
+decoded: list[Any] = []
+
+
+def counting_loads(v: str | bytes) -> Any:
+    decoded.append(v)
+    return orjson.loads(v)
+
+
+class Model3(BaseUpdateModel):
+    name = fields.CharField(max_length=32, default="")
+    json_field = fields.JSONField(default={}, lazy=True, decoder=counting_loads)
+    json_list_field = fields.JSONListField(null=True, lazy=True, decoder=counting_loads)
+
+
+class Model4(BaseUpdateModel):
+    name = fields.CharField(max_length=32, default="")
+    content = fields.TextField(default="", defer=True)
+    data = fields.BinaryField(null=True, defer=True)
+    model1 = fields.ForeignKeyField("models.Model1", null=True)
+
+    search_index = SearchIndex("name", "content")
+
+
+class Model5(BaseUpdateModel):
+    name = fields.CharField(max_length=32, default="")
+    file = fields.BlobField(null=True, media_type="text/plain", max_size=4096)
+
+
+class Model6(BaseUpdateModel):
+    name = fields.CharField(max_length=32, default="")
+    payload = fields.JSONField(default={}, compress="zlib", decoder=counting_loads)
+    text = fields.TextField(null=True, compress="zlib", compress_threshold=16)
+
+
 name = __name__
 
 __all__ = ["name"]
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from anyforce.api.middleware import AdmissionController, AdmissionMiddleware
+from anyforce.api.middleware.admission import Limiter
+
+
+async def test_limiter():
+    limiter = Limiter(1, max_queue=1)
+    assert await limiter.acquire(0)
+    assert not await limiter.acquire(0)
+
+    waiter = asyncio.create_task(limiter.acquire(1))
+    await asyncio.sleep(0)
+    assert limiter.saturated
+    # 队列已满
+    assert not await limiter.acquire(1)
+    limiter.release()
+    assert await waiter
+    assert limiter.in_flight == 1
+
+    timeout = asyncio.create_task(limiter.acquire(0.01))
+    assert not await timeout
+    assert not limiter.waiters
+
+    rejected = asyncio.create_task(limiter.acquire(1))
+    await asyncio.sleep(0)
+    limiter.reject_waiters()
+    assert not await rejected
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+async def test_limiter_timeout_after_grant(monkeypatch: pytest.MonkeyPatch):
+    limiter = Limiter(1, max_queue=1)
+    assert await limiter.acquire(0)
+
+    async def wait_for(fut: asyncio.Future[bool], timeout: float) -> bool:
+        # 名额转交后才超时
+        limiter.release()
+        assert fut.done()
+        raise asyncio.TimeoutError()
+
+    monkeypatch.setattr(asyncio, "wait_for", wait_for)
+    assert not await limiter.acquire(1)
+    assert limiter.in_flight == 0 and not limiter.waiters
+
+
+def test_adaptive_limiter():
+    limiter = Limiter(10, adaptive=True, latency_target=0.1)
+    for _ in range(5):
+        limiter.in_flight += 1
+        limiter.release(1)
+    assert int(limiter.limit) == 5
+    for _ in range(100):
+        limiter.in_flight += 1
+        limiter.release(0.01)
+    assert int(limiter.limit) == 10
+
+    # 同一批慢请求只降低一次
+    limiter.in_flight = 10
+    for _ in range(10):
+        limiter.release(1)
+    assert limiter.limit == 9
+    limiter.in_flight += 1
+    limiter.release(1)
+    assert limiter.limit < 9
+
+
+def test_admission_middleware():
+    controller = AdmissionController(max_reads=0, max_queue=0, exempt=["/healthz"])
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+
+    @app.get("/")
+    async def _() -> str:
+        return ""
+
+    @app.get("/healthz")
+    async def _() -> str:
+        return ""
+
+    @app.post("/")
+    async def _() -> str:
+        return ""
+
+    with TestClient(app) as client:
+        r = client.get("/")
+        assert r.status_code == 503
+        assert r.headers["retry-after"] == "1"
+        assert client.get("/healthz").status_code == 200
+        assert client.post("/").status_code == 200
+    assert controller.limiters["write"].in_flight == 0
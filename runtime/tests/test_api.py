@@ -5,6 +5,7 @@ import pytest
 from fastapi import status
 
 from anyforce.test import TestAPI as Base
+from anyforce.test.request import get
 
 
 class TestAPI(Base):
@@ -213,6 +214,38 @@ class TestAPI(Base):
             status.HTTP_200_OK,
         )
 
+    def test_get_batch(self, client: Any, endpoint: str):
+        ids = [
+            self.create(client, endpoint, self.create_data(), status.HTTP_201_CREATED)[
+                "id"
+            ]
+            for _ in range(3)
+        ]
+        ids.reverse()
+        r = get(
+            client,
+            f"{endpoint}/{','.join([str(id) for id in ids])}",
+            params={"prefetch": ["int_field_plus_bigint_field"]},
+        )
+        self.log_request(ids, status.HTTP_200_OK, r)
+        objs = r.json_array()
+        assert [obj["id"] for obj in objs] == ids
+        for obj in objs:
+            self.assert_obj(obj)
+            assert (
+                obj["int_field_plus_bigint_field"]
+                == obj["int_field"] + obj["bigint_field"]
+            )
+
+        r = get(client, f"{endpoint}/{ids[0]},10000")
+        self.log_request(ids, status.HTTP_404_NOT_FOUND, r)
+
+        # 按主键类型去重
+        for duplicated in [f"{ids[0]},0{ids[0]}", f"{ids[0]}, {ids[0]}"]:
+            r = get(client, f"{endpoint}/{duplicated}")
+            self.log_request(ids, status.HTTP_200_OK, r)
+            assert r.json_object()["id"] == ids[0]
+
     def test_get_not_found(self, client: Any, endpoint: str):
         self.get(
             client,
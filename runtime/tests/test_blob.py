@@ -0,0 +1,152 @@
+import hashlib
+import os
+from typing import Any, AsyncIterator
+
+import pytest
+from fastapi import APIRouter, BackgroundTasks, FastAPI, Request
+from fastapi.testclient import TestClient
+
+from anyforce.api import PublicAPI
+from anyforce.api.exceptions import HTTPForbiddenError
+from anyforce.api.responses import parse_range
+from anyforce.model import blob
+from anyforce.model.blob import Blob, LocalBlobStore
+
+from .model import Model5
+
+
+class ReadOnlyAPI(PublicAPI[Model5, Any, Any]):
+    async def before_update(
+        self,
+        user: str,
+        obj: Model5,
+        input: Any,
+        request: Request,
+        background_tasks: BackgroundTasks,
+    ) -> Model5 | None:
+        raise HTTPForbiddenError
+
+
+def create_app(read_only: bool = False) -> FastAPI:
+    cls = ReadOnlyAPI if read_only else PublicAPI[Model5, Any, Any]
+    api = cls(Model5, Model5.form(), Model5.form(required_override=False))
+    app = FastAPI()
+    router = APIRouter(prefix="/blob")
+    api.bind(router)
+    app.include_router(router)
+    return app
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 10)
+    assert parse_range("bytes=90-", 100) == (90, 100)
+    assert parse_range("bytes=-10", 100) == (90, 100)
+    assert parse_range("bytes=90-200", 100) == (90, 100)
+    assert parse_range("bytes=0-1,3-4", 100) is None
+    for value in ["bytes=100-", "bytes=5-1"]:
+        with pytest.raises(ValueError):
+            parse_range(value, 100)
+
+
+async def test_local_blob_store(tmp_path: str):
+    store = LocalBlobStore(str(tmp_path), chunk_size=4)
+    data = b"0123456789"
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for i in range(0, len(data), 3):
+            yield data[i : i + 3]
+
+    a = await store.put(data)
+    b = await store.put(chunks())
+    assert a == b == Blob(hash=hashlib.sha256(data).hexdigest(), size=len(data))
+    assert os.path.exists(store.path(a.hash))
+    # 相同内容只保存一份, 不残留临时文件
+    files = [name for _, _, names in os.walk(tmp_path) for name in names]
+    assert files == [a.hash]
+
+    assert b"".join([c async for c in store.read(a.hash)]) == data
+    assert b"".join([c async for c in store.read(a.hash, 2, 7)]) == data[2:7]
+    await store.delete(a.hash)
+    assert not await store.exists(a.hash)
+
+
+async def test_blob_field(database: bool, tmp_path: str):
+    assert database
+    blob.configure({"default": LocalBlobStore(str(tmp_path))})
+    data = os.urandom(1024)
+    obj = await Model5.create(name="blob")
+    assert "file" not in Model5.form().model_fields
+
+    with TestClient(create_app()) as client:
+        r = client.get(f"/blob/{obj.id}/file")
+        assert r.status_code == 404
+        r = client.get(f"/blob/{obj.id}/name")
+        assert r.status_code == 404
+
+        r = client.put(f"/blob/{obj.id}/file", content=data)
+        assert r.status_code == 200
+        uploaded = Blob(hash=hashlib.sha256(data).hexdigest(), size=len(data))
+        expected = uploaded.model_dump()
+        assert r.json() == expected
+
+        obj = await Model5.get(id=obj.id)
+        assert obj.file == uploaded
+        r = client.get(f"/blob/{obj.id}")
+        assert r.json()["file"] == expected
+
+        r = client.get(f"/blob/{obj.id}/file")
+        assert r.status_code == 200
+        assert r.content == data
+        assert r.headers["content-type"].startswith("text/plain")
+        etag = r.headers["etag"]
+
+        r = client.get(f"/blob/{obj.id}/file", headers={"Range": "bytes=100-199"})
+        assert r.status_code == 206
+        assert r.content == data[100:200]
+        assert r.headers["content-range"] == f"bytes 100-199/{len(data)}"
+        assert r.headers["content-length"] == "100"
+
+        r = client.get(f"/blob/{obj.id}/file", headers={"Range": "bytes=-24"})
+        assert r.status_code == 206 and r.content == data[-24:]
+        r = client.get(f"/blob/{obj.id}/file", headers={"Range": "bytes=2048-"})
+        assert r.status_code == 416
+        assert r.headers["content-range"] == f"bytes */{len(data)}"
+        r = client.get(f"/blob/{obj.id}/file", headers={"If-None-Match": etag})
+        assert r.status_code == 304
+        r = client.get(
+            f"/blob/{obj.id}/file", headers={"If-None-Match": f'"x", W/{etag}'}
+        )
+        assert r.status_code == 304
+        r = client.get(f"/blob/{obj.id}/file", headers={"If-None-Match": f"{etag}-gz"})
+        assert r.status_code == 200 and r.content == data
+        r = client.get(
+            f"/blob/{obj.id}/file",
+            headers={"Range": "bytes=0-9", "If-Range": '"stale"'},
+        )
+        assert r.status_code == 200 and r.content == data
+
+    def stored() -> list[str]:
+        return [name for _, _, names in os.walk(tmp_path) for name in names]
+
+    files = stored()
+    with TestClient(create_app()) as client:
+        # 不存在的记录及超出上限的内容不写入存储
+        r = client.put("/blob/0/file", content=b"missing")
+        assert r.status_code == 404
+        r = client.put(f"/blob/{obj.id}/file", content=os.urandom(4097))
+        assert r.status_code == 413
+
+        def chunks():
+            for _ in range(5):
+                yield os.urandom(1024)
+
+        r = client.put(f"/blob/{obj.id}/file", content=chunks())
+        assert r.status_code == 413
+    assert stored() == files
+
+    # before_update 拒绝时不修改, 也不写入存储
+    with TestClient(create_app(read_only=True)) as client:
+        r = client.put(f"/blob/{obj.id}/file", content=b"vetoed")
+        assert r.status_code == 403
+    assert (await Model5.get(id=obj.id)).file == uploaded
+    assert stored() == files
@@ -0,0 +1,119 @@
+from typing import Any
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from tortoise import Tortoise
+from tortoise.expressions import RawSQL
+
+from anyforce.api import PublicAPI
+from anyforce.model import fields
+from anyforce.model.fields import Compressed, compress, decompress
+
+from .model import Model6, decoded
+
+
+def create_app(compact: bool = False) -> FastAPI:
+    api = PublicAPI(Model6, Model6.form(), Model6.form(required_override=False))
+    api.compact = compact
+    app = FastAPI()
+    router = APIRouter(prefix="/compressed")
+    api.bind(router)
+    app.include_router(router)
+    return app
+
+
+async def raw(id: int) -> dict[str, Any]:
+    # RawSQL 的结果不经过字段转换, 即数据库中保存的内容
+    rows = (
+        await Model6.filter(id=id)
+        .annotate(payload_raw=RawSQL('"payload"'), text_raw=RawSQL('"text"'))
+        .values("payload_raw", "text_raw")
+    )
+    return {"payload": rows[0]["payload_raw"], "text": rows[0]["text_raw"]}
+
+
+def test_compress():
+    payload = b"a" * 1024
+    assert compress(payload, "zlib", 2048, 6) == b"\x00" + payload
+    data = compress(payload, "zlib", 16, 6)
+    assert data[:1] == b"\x01" and len(data) < 64
+    # 压缩后更大时保存原文
+    assert compress(b"abc", "zlib", 0, 6) == b"\x00abc"
+    for v in [data, b"\x00" + payload, payload]:
+        assert decompress(v) == payload
+    with pytest.raises(ValueError):
+        fields.TextField(compress="lz4")  # type: ignore
+
+
+def test_compress_zstd():
+    pytest.importorskip("zstandard")
+    payload = b"a" * 1024
+    data = compress(payload, "zstd", 16, 3)
+    assert data[:1] == b"\x02" and len(data) < 64
+    assert decompress(data) == payload
+
+    field: Any = fields.JSONField(compress="zstd", compress_threshold=16)
+    value = {"items": [{"id": i} for i in range(100)]}
+    packed = field.pack(value)
+    assert packed[:1] == b"\x02"
+    assert field.to_python_value(packed) == value
+
+
+async def test_compressed(database: bool, monkeypatch: pytest.MonkeyPatch):
+    assert database
+    value = {"items": [{"id": i, "name": "item"} for i in range(200)]}
+    obj = await Model6.create(payload=value, text="text " * 100)
+    small = await Model6.create(payload={}, text="short")
+
+    data = await raw(obj.id)
+    assert data["payload"][:1] == b"\x01" and len(data["payload"]) < 1024
+    assert data["text"][:1] == b"\x01"
+    assert (await raw(small.id))["text"] == b"\x00short"
+
+    decoded.clear()
+    obj = await Model6.get(id=obj.id)
+    assert type(obj.__dict__["payload"]) is Compressed
+    assert not decoded
+    assert obj.payload == value and obj.text == "text " * 100
+    assert len(decoded) == 1
+    assert await Model6.filter(id=obj.id).values_list("payload", flat=True) == [value]
+
+    # 未访问的压缩字段保存时不重新写入
+    decoded.clear()
+    obj = await Model6.get(id=obj.id)
+    obj.name = "saved"
+    await obj.save()
+    assert not decoded
+    assert (await raw(obj.id))["payload"] == data["payload"]
+
+    # 原地修改后保存
+    obj.payload["items"].append({"id": -1})
+    await obj.save()
+    obj = await Model6.get(id=obj.id)
+    assert obj.name == "saved" and obj.payload["items"][-1] == {"id": -1}
+    assert not isinstance(obj.__dict__["payload"], Compressed)
+
+    # 总量超过阈值时在线程池中整批解压
+    monkeypatch.setattr(fields, "compress_offload_threshold", 0)
+    objs = await Model6.filter(id__in=[obj.id, small.id]).order_by("id")
+    assert not any(type(o.__dict__["payload"]) is Compressed for o in objs)
+    assert objs[1].text == "short"
+
+    # 压缩前写入的原文
+    await Tortoise.get_connection("default").execute_script(
+        f'UPDATE "model6" SET "text" = \'legacy\' WHERE "id" = {small.id}'
+    )
+    assert (await Model6.get(id=small.id)).text == "legacy"
+
+    for app in [create_app(), create_app(compact=True)]:
+        with TestClient(app) as client:
+            r = client.get(f"/compressed/{obj.id}")
+            assert r.status_code == 200
+            assert r.json()["payload"] == obj.payload
+            r = client.get("/compressed/", params={"condition": f'{{"id": {obj.id}}}'})
+            assert r.status_code == 200
+            assert r.json()["data"][0]["text"] == "text " * 100
+            r = client.put(f"/compressed/{small.id}", json={"text": "updated " * 10})
+            assert r.status_code == 200
+            assert (await Model6.get(id=small.id)).text == "updated " * 10
@@ -0,0 +1,94 @@
+from typing import cast
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from tortoise.functions import Length
+
+from anyforce.api import PublicAPI
+from anyforce.model.queryset import default_projection, deferred_fields
+
+from .model import Model1, Model4
+
+
+def create_app(compact: bool = False) -> FastAPI:
+    api = PublicAPI(Model4, Model4.form(), Model4.form(required_override=False))
+    api.compact = compact
+    app = FastAPI()
+    router = APIRouter(prefix="/defer")
+    api.bind(router)
+    app.include_router(router)
+    return app
+
+
+async def test_defer(database: bool):
+    assert database
+    assert deferred_fields(Model4) == ("content", "data")
+    assert "content" not in default_projection(Model4)
+
+    model1 = await Model1.create(name="defer")
+    a = await Model4.create(name="a", content="a" * 1024, data=b"a", model1=model1)
+    b = await Model4.create(name="b", content="b" * 1024)
+
+    objs = await Model4.filter(id__in=[a.id, b.id]).order_by("id")
+    assert [obj.name for obj in objs] == ["a", "b"]
+    assert not any(hasattr(obj, "content") for obj in objs)
+    assert "content" not in objs[0].dict(exclude_unset=True)
+
+    await Model4.fetch_related_list(objs, "content", "data", "model1")
+    assert [obj.content for obj in objs] == ["a" * 1024, "b" * 1024]
+    assert objs[0].data == b"a" and objs[1].data is None
+    assert cast(Model1, objs[0].model1).name == "defer"
+
+    # 显式查询
+    obj = await Model4.get(id=a.id).only("id", "content")
+    assert obj.content == "a" * 1024
+    assert (await Model4.filter(id=a.id).values_list("content", flat=True)) == [
+        "a" * 1024
+    ]
+    obj = await Model4.get(id=a.id).annotate(n=Length("name"))
+    assert getattr(obj, "n") == 1 and not hasattr(obj, "content")
+    obj = await Model4.get(id=a.id).select_related("model1")
+    assert obj.content == "a" * 1024 and cast(Model1, obj.model1).name == "defer"
+
+    # 未加载 defer 字段时保存只更新已加载的字段
+    obj = await Model4.get(id=a.id)
+    obj.name = "saved"
+    await obj.save()
+    obj = await Model4.get(id=a.id)
+    await obj.fetch_related("content")
+    assert obj.name == "saved" and obj.content == "a" * 1024
+    obj.content = "c"
+    await obj.save()
+    obj = await Model4.get(id=a.id).only("id", "content")
+    assert obj.content == "c"
+
+
+async def test_defer_api(database: bool):
+    assert database
+    obj = await Model4.create(name="api", content="content")
+    for compact in [False, True]:
+        with TestClient(create_app(compact)) as client:
+            r = client.get(f"/defer/{obj.id}")
+            assert r.status_code == 200
+            assert r.json()["name"] == "api" and "content" not in r.json()
+
+            for params in [{"include": ["id", "content"]}, {"prefetch": "content"}]:
+                r = client.get(f"/defer/{obj.id}", params=params)
+                assert r.status_code == 200
+                assert r.json()["content"] == "content"
+
+            condition = f'{{"id": {obj.id}}}'
+            r = client.get("/defer/", params={"condition": condition})
+            assert r.status_code == 200
+            assert "content" not in r.json()["data"][0]
+            r = client.get(
+                "/defer/", params={"condition": condition, "prefetch": "content"}
+            )
+            assert r.status_code == 200
+            assert r.json()["data"][0]["content"] == "content"
+
+            r = client.put(f"/defer/{obj.id}", json={"name": "api"})
+            assert r.status_code == 200
+            assert (await Model4.get(id=obj.id).only("id", "content")).content == (
+                "content"
+            )
@@ -0,0 +1,26 @@
+import gc
+
+from anyforce import metrics
+from anyforce.gc_tuner import GCTuner
+
+
+def test_gc_tuner():
+    original = gc.get_threshold()
+    tuner = GCTuner(thresholds=(50_000, 20, 20))
+    tuner.install()
+    try:
+        assert gc.get_threshold() == (50_000, 20, 20)
+        assert tuner.callback in gc.callbacks
+
+        gc.collect()
+        counts = metrics.gc_pause.merged()[("2",)]
+        assert sum(counts[:-1]) >= 1
+
+        tuner.warmed_up()
+        assert gc.get_freeze_count() > 0
+        assert metrics.gc_objects_count.merged()[("frozen",)] > 0
+    finally:
+        gc.unfreeze()
+        tuner.uninstall()
+    assert gc.get_threshold() == original
+    assert tuner.callback not in gc.callbacks
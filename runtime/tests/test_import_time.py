@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+# 导入耗时预算 (秒), 含依赖; 约为实测值的 2 倍 (anyforce.model 约 0.5s)
+budgets = {
+    "anyforce": 0.05,
+    "anyforce.model": 1.0,
+}
+
+# 只使用 model 时不应加载的依赖
+deferred = ["fastapi", "starlette", "starlette_context", "aiohttp", "jose", "faker"]
+
+
+def import_time(module: str) -> tuple[float, set[str]]:
+    r = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import sys, {module}; print(','.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0
+    for line in r.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() in (module, *module.split(".")[:1]):
+            total += int(parts[1])
+    return total / 1e6, set(r.stdout.strip().split(","))
+
+
+def test_import_time():
+    for module, budget in budgets.items():
+        elapsed, modules = import_time(module)
+        assert elapsed < budget, f"import {module} took {elapsed:.3f}s > {budget}s"
+        assert not modules & set(deferred), modules & set(deferred)
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import signal
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from anyforce.api.middleware import InFlight, InFlightMiddleware
+from anyforce.app import create_app
+
+from .test_serve import free_port, serve
+
+app = create_app(
+    "secret",
+    [],
+    {
+        "connections": {"models": "sqlite://:memory:"},
+        "apps": {"models": {"models": ["tests.model"], "default_connection": "models"}},
+    },
+    shutdown_delay_in_seconds=1,
+    shutdown_timeout_in_seconds=10,
+    warm_up_connections=False,
+    openapi_prebuild=False,
+)
+
+
+@app.get("/pid")
+async def pid() -> int:
+    return os.getpid()
+
+
+@app.get("/slow")
+async def slow() -> str:
+    await asyncio.sleep(1.5)
+    return "slow"
+
+
+def status(port: int, path: str) -> int:
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=5) as r:
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+async def test_drain():
+    in_flight = InFlight()
+    start = time.monotonic()
+    await in_flight.drain(0.2, 1)
+    assert 0.2 <= time.monotonic() - start < 0.5
+
+    # 请求结束后立即退出
+    in_flight.count = 1
+    asyncio.get_running_loop().call_later(0.3, setattr, in_flight, "count", 0)
+    start = time.monotonic()
+    await in_flight.drain(0, 1)
+    assert 0.3 <= time.monotonic() - start < 0.6
+
+    # 负载均衡已确认摘除
+    in_flight.unhealthy_probes = 2
+    start = time.monotonic()
+    await in_flight.drain(10, 10, probes=2)
+    assert time.monotonic() - start < 0.1
+
+    in_flight.count = 1
+    start = time.monotonic()
+    await in_flight.drain(0, 0.2)
+    assert 0.2 <= time.monotonic() - start < 0.5
+
+
+def test_in_flight_middleware():
+    in_flight = InFlight()
+    counts: list[int] = []
+    app = FastAPI()
+    app.add_middleware(InFlightMiddleware, in_flight=in_flight)
+
+    @app.get("/")
+    async def _() -> StreamingResponse:
+        async def body():
+            counts.append(in_flight.count)
+            yield b"ok"
+
+        return StreamingResponse(body())
+
+    with TestClient(app) as client:
+        assert client.get("/").text == "ok"
+    assert counts == [1]
+    assert in_flight.count == 0
+
+
+def test_drain_on_sigterm():
+    # 经 uvicorn 停止: 收到 SIGTERM 后仍 accept, /healthz 返回 503, 处理中的请求完成
+    port = free_port()
+    p = serve(port, "--workers", "1", app="tests.test_inflight:app")
+    try:
+        assert status(port, "/healthz") == 200
+        slow: list[int] = []
+        thread = threading.Thread(target=lambda: slow.append(status(port, "/slow")))
+        thread.start()
+        time.sleep(0.3)
+        start = time.monotonic()
+        p.send_signal(signal.SIGTERM)
+        time.sleep(0.3)
+        assert status(port, "/healthz") == 503
+        assert status(port, "/pid") == 200
+        thread.join()
+        assert slow == [200]
+        assert p.wait(30) == 0
+        # 等待 shutdown_delay_in_seconds 而不是默认的 15 秒
+        assert 1 <= time.monotonic() - start < 10
+    finally:
+        if p.poll() is None:
+            p.kill()
@@ -0,0 +1,89 @@
+import orjson
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from pypika_tortoise.enums import Dialects
+
+from anyforce.api import PublicAPI
+from anyforce.api.exceptions import register
+from anyforce.model.functions import json_path_sql
+
+from .model import CharEnum, Model2
+
+
+def create_app(json_paths: dict[str, str] = {}, compact: bool = False) -> FastAPI:
+    api = PublicAPI(Model2, Model2.form(), Model2.form(required_override=False))
+    api.json_paths = json_paths
+    api.compact = compact
+    app = FastAPI()
+    register(app)
+    router = APIRouter(prefix="/json")
+    api.bind(router)
+    app.include_router(router)
+    return app
+
+
+def test_json_path_sql():
+    assert (
+        json_path_sql(Dialects.SQLITE, '"json_field"', ["a", "0", "b"])
+        == """json_extract("json_field",'$."a"[0]."b"')"""
+    )
+    assert (
+        json_path_sql(Dialects.MYSQL, "`json_field`", ["a"])
+        == """JSON_UNQUOTE(JSON_EXTRACT(`json_field`,'$."a"'))"""
+    )
+    assert (
+        json_path_sql(Dialects.POSTGRESQL, '"json_field"', ["a", "0"], "numeric")
+        == """("json_field"#>>'{"a","0"}')::numeric"""
+    )
+    with pytest.raises(ValueError):
+        json_path_sql(Dialects.SQLITE, '"json_field"', ['a"'])
+
+
+async def test_json_path(database: bool):
+    assert database
+    objs = [
+        await Model2.create(
+            int_field=i,
+            bigint_field=i,
+            char_enum_field=CharEnum.a,
+            required_char_field=f"json{i}",
+            json_field={"a": {"b": i, "c": f"v{i}"}, "tag": "json_path", "名 称": i},
+        )
+        for i in range(3)
+    ]
+    ids = [obj.id for obj in objs]
+
+    def get(client: TestClient, condition: dict[str, object]):
+        condition = {"json_field.tag": "json_path"} | condition
+        return client.get(
+            "/json/",
+            params={"condition": orjson.dumps(condition).decode(), "order_by": "id"},
+        )
+
+    def query(client: TestClient, condition: dict[str, object]) -> list[int]:
+        r = get(client, condition)
+        assert r.status_code == 200, r.text
+        return [item["id"] for item in r.json()["data"]]
+
+    for compact in [False, True]:
+        with TestClient(create_app(compact=compact)) as client:
+            assert query(client, {}) == ids
+            assert query(client, {"json_field.a.b": 1}) == ids[1:2]
+            assert query(client, {"json_field.a.b.in": [0, 2]}) == [ids[0], ids[2]]
+            assert query(client, {"json_field.a.b.gte": 1}) == ids[1:]
+            assert query(client, {"json_field__a__c": "v2"}) == ids[2:]
+            assert query(client, {"json_field.a.c.startswith": "v"}) == ids
+            assert query(client, {"json_field.a.x.isnull": True}) == ids
+            assert query(client, {"json_field.a.b.not": 0}) == ids[1:]
+            assert query(client, {"json_field.名 称": 1}) == ids[1:2]
+            # 字段本身的运算符
+            assert query(client, {"json_field.not_isnull": True}) == ids
+            assert query(client, {"json_field__isnull": True}) == []
+            r = get(client, {'json_field.a"b': 1})
+            assert r.status_code == 400
+
+    # 声明了生成列的路径直接使用该列
+    app = create_app({"json_field.a.c": "required_char_field"})
+    with TestClient(app) as client:
+        assert query(client, {"json_field.a.c": "json1"}) == ids[1:2]
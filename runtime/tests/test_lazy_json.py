@@ -0,0 +1,88 @@
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from anyforce.api import PublicAPI
+from anyforce.model.fields import RawJSON
+
+from .model import Model3, decoded
+
+
+def create_app(lazy: bool = False, compact: bool = False) -> FastAPI:
+    api = PublicAPI(Model3, Model3.form(), Model3.form(required_override=False))
+    api.compact = compact
+    app = FastAPI()
+    router = APIRouter(prefix="/lazy_json")
+    api.bind(router, lazy=lazy)
+    app.include_router(router)
+    return app
+
+
+async def test_lazy_json(database: bool):
+    assert database
+    value = {"a": [1, {"b": "中文"}], "c": None}
+    obj = await Model3.create(json_field=value, json_list_field=[1, 2])
+
+    decoded.clear()
+    obj = await Model3.get(id=obj.id)
+    assert isinstance(obj.__dict__["json_field"], RawJSON)
+    assert not decoded
+    assert obj.json_field == value
+    assert len(decoded) == 1
+    assert obj.json_field == value
+    assert len(decoded) == 1
+    assert obj.dict()["json_list_field"] == [1, 2]
+
+    # values / values_list 返回的 dict 没有描述符, 直接解码
+    rows = await Model3.filter(id=obj.id).values("json_field")
+    assert rows == [{"json_field": value}]
+    assert await Model3.filter(id=obj.id).values_list("json_field", flat=True) == [
+        value
+    ]
+
+    # 未访问的字段保存时不重新编码
+    obj = await Model3.get(id=obj.id)
+    obj.name = "saved"
+    await obj.save()
+    obj = await Model3.get(id=obj.id)
+    assert obj.name == "saved" and obj.json_field == value
+
+    expected = {
+        "id": obj.id,
+        "name": "saved",
+        "json_field": value,
+        "json_list_field": [1, 2],
+    }
+    for app in [create_app(), create_app(lazy=True), create_app(compact=True)]:
+        with TestClient(app) as client:
+            decoded.clear()
+            r = client.get(f"/lazy_json/{obj.id}")
+            assert r.status_code == 200
+            assert {k: r.json()[k] for k in expected} == expected
+            r = client.get("/lazy_json/", params={"condition": f'{{"id": {obj.id}}}'})
+            assert r.status_code == 200
+            assert {k: r.json()["data"][0][k] for k in expected} == expected
+            assert not decoded
+
+            r = client.put(f"/lazy_json/{obj.id}", json={"json_field": {"d": 1}})
+            assert r.status_code == 200
+            assert r.json()["json_field"] == {"d": 1}
+            r = client.put(f"/lazy_json/{obj.id}", json={"json_field": value})
+
+    schema = create_app().openapi()["components"]["schemas"]
+    detail = next(
+        v for k, v in schema.items() if k.endswith("Model3__detail__optional")
+    )
+    assert "anyOf" in detail["properties"]["json_field"]
+
+
+async def test_raw_json_placeholder(database: bool):
+    assert database
+    # 字段中与占位符相同的字符串不会被替换
+    for name in ["\x00anyforce.raw_json:0", "\x00anyforce.raw_json:99"]:
+        obj = await Model3.create(name=name, json_field={"secret": 1})
+        for app in [create_app(lazy=True), create_app(compact=True)]:
+            with TestClient(app) as client:
+                r = client.get(f"/lazy_json/{obj.id}")
+                assert r.status_code == 200
+                assert r.json()["name"] == name
+                assert r.json()["json_field"] == {"secret": 1}
@@ -0,0 +1,78 @@
+import gc
+
+from fastapi import APIRouter, Depends, FastAPI, Response
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from anyforce.api import PublicAPI
+from anyforce.api.api import lazy_response_models, resolve_lazy_response_models
+
+from .model import Model1
+
+
+def create_app(lazy: bool) -> FastAPI:
+    app = FastAPI()
+    router = APIRouter(prefix="/models")
+    PublicAPI(Model1, Model1.form(), Model1.form(required_override=False)).bind(
+        router, lazy=lazy
+    )
+    app.include_router(router)
+    return app
+
+
+def test_lazy_schema(database: bool):
+    assert database
+    eager, lazy = create_app(False), create_app(True)
+    routes = [
+        route
+        for route in lazy.routes
+        if isinstance(route, APIRoute) and route.path.startswith("/models")
+    ]
+    assert routes
+    assert all(
+        route.response_model is None for route in routes if route.methods != {"DELETE"}
+    )
+
+    with TestClient(eager) as eager_client, TestClient(lazy) as lazy_client:
+        r = lazy_client.post("/models/", json={"name": "lazy"})
+        assert r.status_code == 201
+        obj = r.json()
+        assert obj["name"] == "lazy"
+        assert r.json() == eager_client.get(f"/models/{obj['id']}").json()
+        assert (
+            lazy_client.get(f"/models/{obj['id']}").json()
+            == eager_client.get(f"/models/{obj['id']}").json()
+        )
+        assert lazy_client.get("/models/").json() == eager_client.get("/models/").json()
+        r = lazy_client.put(f"/models/{obj['id']}", json={"name": "lazy2"})
+        assert r.json()["name"] == "lazy2"
+
+    resolve_lazy_response_models(lazy.routes)
+    assert lazy.openapi()["paths"] == eager.openapi()["paths"]
+
+
+def test_lazy_sub_response(database: bool):
+    assert database
+
+    def set_headers(response: Response):
+        response.headers["X-Extra"] = "1"
+        response.set_cookie("k", "v")
+
+    app = FastAPI()
+    router = APIRouter(prefix="/models", dependencies=[Depends(set_headers)])
+    PublicAPI(Model1, Model1.form(), Model1.form(required_override=False)).bind(
+        router, lazy=True
+    )
+    app.include_router(router)
+    with TestClient(app) as client:
+        r = client.post("/models/", json={"name": "sub"})
+        assert r.status_code == 201
+        assert r.headers["x-extra"] == "1" and r.cookies["k"] == "v"
+        r = client.get("/models/")
+        assert r.headers["x-extra"] == "1"
+
+    # 路由释放后不再保留工厂
+    size = len(lazy_response_models)
+    del app, router, client
+    gc.collect()
+    assert len(lazy_response_models) < size
@@ -0,0 +1,27 @@
+import asyncio
+import time
+
+import pytest
+
+from anyforce import metrics
+from anyforce.loop_monitor import LoopMonitor
+
+
+async def test_loop_monitor(capsys: pytest.CaptureFixture[str]):
+    monitor = LoopMonitor(interval=0.01, threshold=0.05)
+    await monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        time.sleep(0.2)
+        await asyncio.sleep(0.15)
+    finally:
+        await monitor.stop()
+
+    assert max(monitor.lags) >= 0.15
+    out = capsys.readouterr().out
+    assert "event loop blocked" in out
+    assert "test_loop_monitor" in out
+
+    text = metrics.registry.expose()
+    assert 'anyforce_event_loop_lag_quantile_seconds{quantile="1"}' in text
+    assert "anyforce_event_loop_lag_seconds_count" in text
@@ -0,0 +1,48 @@
+from typing import Any
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from anyforce import metrics
+from anyforce.api.middleware import MetricsMiddleware
+
+from .model import Model1
+
+
+def test_registry():
+    registry = metrics.Registry()
+    counter = registry.counter("c_total", "c", ("k",))
+    counter.inc("a")
+    counter.inc("a", value=2)
+    histogram = registry.histogram("h", "h", buckets=(1, 2))
+    histogram.observe(0.5)
+    histogram.observe(3)
+    text = registry.expose()
+    assert 'c_total{k="a"} 3' in text
+    assert 'h_bucket{le="1"} 1' in text
+    assert 'h_bucket{le="+Inf"} 2' in text
+    assert "h_sum 3.5" in text
+    assert "h_count 2" in text
+
+
+def test_metrics_middleware(database: bool):
+    assert database
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/models/{id}")
+    async def _(id: int) -> Any:
+        return await Model1.filter(id=id).count()
+
+    with TestClient(app) as client:
+        assert client.get("/models/1").status_code == 200
+
+    text = metrics.registry.expose()
+    assert (
+        'anyforce_http_requests_total{method="GET",route="/models/{id}",status="200"}'
+        in text
+    )
+    assert "anyforce_http_requests_in_flight 0" in text
+    assert 'anyforce_db_duration_seconds_count{method="GET",route="/models/{id}"}' in (
+        text
+    )
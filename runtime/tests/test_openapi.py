@@ -0,0 +1,153 @@
+import os
+from typing import Any
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from anyforce.api import PublicAPI
+from anyforce.api.api import iter_resolve_lazy_response_models
+from anyforce.openapi import (
+    OpenAPICache,
+    OpenAPIDocument,
+    OpenAPIHandler,
+    etag_matches,
+    metadata_hash,
+    stable,
+)
+
+from .model import Model1
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+    router = APIRouter(prefix="/models")
+    PublicAPI(Model1, Model1.form(), Model1.form(required_override=False)).bind(router)
+    app.include_router(router)
+    return app
+
+
+def test_metadata_hash(database: bool):
+    assert database
+    app = create_app()
+    key = metadata_hash(app.routes)
+    assert key == metadata_hash(create_app().routes)
+
+    @app.get("/extra")
+    async def _(q: int = 0) -> Any:
+        return q
+
+    assert metadata_hash(app.routes) != key
+    assert stable(lambda: None).startswith("tests.test_openapi.")
+
+
+def test_openapi_cache(database: bool, tmp_path: str):
+    assert database
+    app = create_app()
+    key = metadata_hash(app.routes)
+    cache = OpenAPICache(os.path.join(tmp_path, "cache"))
+    assert cache.load(key) is None
+    cache.store(key, app.openapi())
+    assert cache.load(key) == app.openapi()
+
+
+def test_openapi_handler(database: bool):
+    assert database
+    app = FastAPI(openapi_url=None)
+
+    resolved: list[Any] = []
+
+    def prepare():
+        for route in iter_resolve_lazy_response_models(app.routes):
+            resolved.append(route)
+            yield route
+
+    def build() -> dict[str, Any]:
+        # 响应模型已在事件循环中生成
+        assert all(route.response_model for route in resolved)
+        return app.openapi()
+
+    OpenAPIHandler(app, build, prepare).bind()
+    router = APIRouter(prefix="/models")
+    PublicAPI(Model1, Model1.form(), Model1.form(required_override=False)).bind(
+        router, lazy=True
+    )
+    app.include_router(router)
+
+    @app.get("/others")
+    async def _() -> int:
+        return 0
+
+    with TestClient(app) as client:
+        r = client.get("/openapi.json")
+        assert r.headers["content-encoding"] == "gzip"
+        etag = r.headers["etag"]
+        schema = r.json()
+        assert {"/models/", "/others"} <= set(schema["paths"])
+        assert (
+            client.get("/openapi.json", headers={"If-None-Match": etag}).status_code
+            == 304
+        )
+
+        assert resolved
+        assert (
+            client.get(
+                "/openapi.json", headers={"If-None-Match": f'W/"x", W/{etag}'}
+            ).status_code
+            == 304
+        )
+
+        r = client.get("/openapi.json", params={"prefix": "/models"})
+        partition = r.json()
+        assert set(partition["paths"]) == {"/models/", "/models/{ids}"}
+        assert set(partition["components"]["schemas"]) <= set(
+            schema["components"]["schemas"]
+        )
+        assert r.headers["etag"] != etag
+        assert (
+            client.get("/openapi.json", params={"prefix": "/none"}).status_code == 404
+        )
+        assert (
+            "openapi.json?prefix=/models"
+            in client.get("/docs", params={"prefix": "/models"}).text
+        )
+        # 未知的前缀不写入页面
+        evil = "x'})</script><script>alert(1)</script>"
+        for path in ["/docs", "/redoc"]:
+            r = client.get(path, params={"prefix": evil})
+            assert r.status_code == 404 and "alert" not in r.text
+        assert (
+            "openapi.json?prefix=/models"
+            in client.get("/redoc", params={"prefix": "/models"}).text
+        )
+
+
+def test_etag_matches():
+    assert etag_matches('"a"', '"b", "a"')
+    assert etag_matches('"a"', "*")
+    assert etag_matches('"a"', 'W/"a"')
+    assert not etag_matches('"a"', '"ab"')
+    assert not etag_matches('"ab"', '"a", "b"')
+    assert not etag_matches('"a"', "")
+
+
+def test_openapi_partition():
+    document = OpenAPIDocument(
+        {
+            "paths": {
+                "/a/": {"get": {"schema": {"$ref": "#/components/schemas/A"}}},
+                "/b/": {"get": {"schema": {"$ref": "#/components/schemas/B"}}},
+            },
+            "components": {
+                "schemas": {
+                    "A": {"items": {"$ref": "#/components/schemas/C"}},
+                    "B": {},
+                    "C": {},
+                }
+            },
+        }
+    )
+    partition = document.partition("a")
+    assert partition
+    assert set(partition.schema["paths"]) == {"/a/"}
+    assert set(partition.schema["components"]["schemas"]) == {"A", "C"}
+    assert document.partition("/c") is None
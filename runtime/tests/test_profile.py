@@ -0,0 +1,64 @@
+import os
+import time
+from typing import Any
+
+import orjson
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from anyforce.api.middleware import ProfileMiddleware
+
+
+def busy() -> int:
+    deadline = time.perf_counter() + 0.05
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+    return n
+
+
+def create_app(**kwargs: Any) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfileMiddleware, token="secret", **kwargs)
+
+    @app.get("/")
+    async def _() -> int:
+        return busy()
+
+    return app
+
+
+def test_profile():
+    with TestClient(create_app(allow=["testclient"], max_per_minute=60000)) as client:
+        # 未授权时正常返回
+        r = client.get("/", headers={"X-Anyforce-Profile": "wrong"})
+        assert r.headers["content-type"] == "application/json"
+
+        r = client.get("/", headers={"X-Anyforce-Profile": "secret"})
+        assert r.headers["x-anyforce-profile-status"] == "200"
+        assert "busy" in r.text
+
+        r = client.get("/", params={"_profile": "secret,speedscope"})
+        profile = orjson.loads(r.content)
+        assert profile["profiles"][0]["samples"]
+        assert "busy" in {frame["name"] for frame in profile["shared"]["frames"]}
+
+        r = client.get("/", params={"_profile": "secret,cprofile"})
+        assert "busy" in r.text
+
+
+def test_profile_allow(tmp_path: str):
+    with TestClient(create_app()) as client:
+        r = client.get("/", headers={"X-Anyforce-Profile": "secret"})
+        assert r.headers["content-type"] == "application/json"
+
+    app = create_app(allow=["testclient"], directory=tmp_path)
+    with TestClient(app) as client:
+        r = client.get("/", headers={"X-Anyforce-Profile": "secret"})
+        assert r.headers["content-type"] == "application/json"
+        filename = r.headers["x-anyforce-profile"]
+
+        # 超过速率上限
+        r = client.get("/", headers={"X-Anyforce-Profile": "secret"})
+        assert "x-anyforce-profile" not in r.headers
+    assert os.path.exists(os.path.join(tmp_path, filename))
@@ -0,0 +1,72 @@
+from typing import Any, Hashable
+
+import pytest
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.testclient import TestClient
+from tortoise import connections
+
+from anyforce.api import PublicAPI
+from anyforce.api.exceptions import HTTPForbiddenError, register
+from anyforce.model.functions import in_transaction
+from anyforce.model.replica import replicas
+
+from .model import Model1
+
+
+@pytest.mark.asyncio
+async def test_replica(database: bool):
+    assert database
+    assert replicas.db_for_read("default") is connections.get("replica0")
+    assert replicas.db_for_read("unknown") is None
+
+    async with in_transaction("default"):
+        assert replicas.db_for_read("default") is None
+
+    replicas.mark_written("default", "user")
+    assert replicas.db_for_read("default", "user") is None
+    assert replicas.db_for_read("default", "other") is connections.get("replica0")
+
+    obj = await Model1.create(name="replica")
+    r = await Model1.filter(id=obj.id).using_db(replicas.db_for_read("default"))
+    assert r[0].name == "replica"
+
+
+class StickyAPI(PublicAPI[Model1, Any, Any]):
+    def sticky_key(self, user: str, request: Request) -> Hashable | None:
+        return request.headers["x-user"]
+
+    async def before_create(self, user: str, input: Any, request: Request) -> Any:
+        if input.name == "veto":
+            raise HTTPForbiddenError
+        return input
+
+
+def test_mark_written_after_commit(database: bool):
+    assert database
+    app = FastAPI()
+    register(app)
+    router = APIRouter(prefix="/sticky")
+    StickyAPI(Model1, Model1.form(), Model1.form(required_override=False)).bind(router)
+    app.include_router(router)
+    with TestClient(app) as client:
+        # 回滚的写入不标记
+        r = client.post("/sticky/", json={"name": "veto"}, headers={"x-user": "a"})
+        assert r.status_code == 403
+        assert replicas.db_for_read("default", "a") is connections.get("replica0")
+
+        r = client.post("/sticky/", json={"name": "ok"}, headers={"x-user": "b"})
+        assert r.status_code == 201
+        assert replicas.db_for_read("default", "b") is None
+
+
+def test_anonymous_not_sticky(database: bool):
+    assert database
+    app = FastAPI()
+    router = APIRouter(prefix="/anonymous")
+    PublicAPI(Model1, Model1.form(), Model1.form(required_override=False)).bind(router)
+    app.include_router(router)
+    with TestClient(app) as client:
+        r = client.post("/anonymous/", json={"name": "anonymous"})
+        assert r.status_code == 201
+    # 匿名用户之间不共享写后读主库的状态
+    assert replicas.db_for_read("default", "anonymous") is connections.get("replica0")
@@ -0,0 +1,116 @@
+import orjson
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from pypika_tortoise.enums import Dialects
+from tortoise import fields
+from tortoise.models import Model
+
+from anyforce.api import PublicAPI
+from anyforce.model import instrument
+from anyforce.model.search import SearchIndex, search_query
+
+from .model import Model4
+
+
+class Keyed(Model):
+    key = fields.CharField(max_length=8, primary_key=True)
+    name = fields.CharField(max_length=32)
+
+    class Meta(Model.Meta):
+        abstract = True
+
+
+def create_app(compact: bool = False) -> FastAPI:
+    api = PublicAPI(Model4, Model4.form(), Model4.form(required_override=False))
+    api.compact = compact
+    app = FastAPI()
+    router = APIRouter(prefix="/search")
+    api.bind(router)
+    app.include_router(router)
+    return app
+
+
+async def test_search_index(database: bool):
+    assert database
+    index = Model4.search_index
+    assert index
+    assert search_query(Dialects.SQLITE, 'a-b "c') == '"a" "b" "c"'
+    assert search_query(Dialects.MYSQL, "a b") == "+a +b"
+    assert index.ddl(Model4, Dialects.MYSQL) == [
+        "CREATE FULLTEXT INDEX `model4_search` ON `model4` (`name`, `content`)"
+    ]
+    assert "USING GIN" in index.ddl(Model4, Dialects.POSTGRESQL)[0]
+    assert (
+        "content='model4', content_rowid='id'" in index.ddl(Model4, Dialects.SQLITE)[0]
+    )
+    with pytest.raises(ValueError):
+        SearchIndex("data").validate(Model4)
+    with pytest.raises(ValueError):
+        SearchIndex("name").validate(Keyed)
+
+
+async def test_search(database: bool):
+    assert database
+    a = await Model4.create(name="fox", content="the quick brown fox jumps")
+    b = await Model4.create(name="dog", content="brown dog, brown bear, brown")
+    c = await Model4.create(name="cat", content="search cat")
+
+    def query(client: TestClient, text: str, **params: str) -> list[int]:
+        condition = orjson.dumps({"search": text}).decode()
+        r = client.get("/search/", params={"condition": condition, **params})
+        assert r.status_code == 200, r.text
+        assert r.json()["total"] == len(r.json()["data"])
+        return [item["id"] for item in r.json()["data"]]
+
+    sqls: list[str] = []
+
+    def record(event: instrument.QueryEvent):
+        sqls.append(event.sql)
+
+    instrument.install()
+    instrument.add_listener(record)
+    try:
+        with TestClient(create_app()) as client:
+            # 不按相关度排序时不计算 search_rank
+            assert query(client, "brown", order_by="id") == [a.id, b.id]
+            assert sqls and not any("bm25" in sql for sql in sqls)
+            query(client, "brown", order_by="-search_rank")
+            assert any("bm25" in sql for sql in sqls)
+    finally:
+        instrument.remove_listener(record)
+
+    for compact in [False, True]:
+        with TestClient(create_app(compact)) as client:
+            assert query(client, "brown", order_by="id") == [a.id, b.id]
+            assert query(client, "brown fox") == [a.id]
+            assert query(client, "DOG") == [b.id]
+            assert query(client, "brown", order_by="-search_rank") == [b.id, a.id]
+            assert query(client, "missing") == []
+            assert c.id in query(client, '"*')
+
+    # 索引由触发器维护, 不经过 save 的写入同样生效
+    obj = await Model4.get(id=a.id)
+    obj.name = "wolf"
+    await obj.save()
+    await Model4.filter(id=c.id).update(content="bulk")
+    await Model4.bulk_create([Model4(name="bulk", content="created")])
+    with TestClient(create_app()) as client:
+        assert query(client, "wolf fox") == [a.id]
+        await b.delete()
+        assert query(client, "brown") == [a.id]
+        assert query(client, "bulk", order_by="id")[0] == c.id
+        assert len(query(client, "bulk created")) == 1
+
+        await Model4.filter(id=a.id).delete()
+        assert query(client, "fox") == []
+        # 主键复用时不会命中已删除记录的内容
+        await Model4.create(id=a.id, name="new")
+        assert query(client, "fox") == []
+        assert query(client, "new") == [a.id]
+
+    index = Model4.search_index
+    assert index
+    await index.rebuild(Model4)
+    with TestClient(create_app()) as client:
+        assert query(client, "bulk created") != []
@@ -0,0 +1,181 @@
+import gc
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from typing import Any
+
+import pytest
+from fastapi import FastAPI
+from tortoise.exceptions import ConfigurationError
+
+from anyforce.gc_tuner import GCTuner
+from anyforce.serve import bind, prebuild, rss
+
+app = FastAPI()
+
+
+@app.get("/pid")
+async def pid() -> int:
+    return os.getpid()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get(port: int) -> int:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/pid", timeout=5) as r:
+        return int(r.read())
+
+
+def serve(
+    port: int, *args: str, app: str = "tests.test_serve:app"
+) -> subprocess.Popen[Any]:
+    p = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "anyforce",
+            "serve",
+            app,
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--no-access-log",
+            *args,
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            get(port)
+            return p
+        except OSError:
+            time.sleep(0.1)
+    p.kill()
+    raise TimeoutError()
+
+
+def pids(port: int, n: int = 20) -> set[int]:
+    rs: set[int] = set()
+    for _ in range(n):
+        try:
+            rs.add(get(port))
+        except OSError:
+            # 被结束的 worker 队列中的连接会被重置
+            time.sleep(0.05)
+    return rs
+
+
+def stop(p: subprocess.Popen[Any]):
+    p.send_signal(signal.SIGTERM)
+    assert p.wait(30) == 0
+
+
+def test_bind():
+    a = bind("127.0.0.1", 0)
+    b = bind("127.0.0.1", a.getsockname()[1])
+    assert a.getsockname() == b.getsockname()
+    a.close()
+    b.close()
+    assert rss() > 0
+
+
+def test_prebuild_freeze():
+    # 只有配置了 GCTuner(freeze=True) 才冻结
+    gc.unfreeze()
+    other = FastAPI()
+    prebuild(other)
+    assert gc.get_freeze_count() == 0
+    other.state.gc_tuner = GCTuner(freeze=False)
+    prebuild(other)
+    assert gc.get_freeze_count() == 0
+    other.state.gc_tuner = GCTuner()
+    try:
+        prebuild(other)
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+
+
+def test_prebuild_fail_fast():
+    broken = FastAPI()
+    broken.state.tortoise_config = {"apps": {"models": {"models": ["not.exists"]}}}
+    with pytest.raises(ConfigurationError):
+        prebuild(broken)
+
+
+def test_serve():
+    port = free_port()
+    p = serve(port, "--workers", "2", "--reuse-port")
+    try:
+        deadline = time.monotonic() + 10
+        while len(pids(port)) < 2 and time.monotonic() < deadline:
+            pass
+        workers = pids(port)
+        assert len(workers) == 2 and p.pid not in workers
+
+        # worker 异常退出后重新拉起
+        worker = workers.pop()
+        os.kill(worker, signal.SIGKILL)
+        deadline = time.monotonic() + 10
+        while worker in pids(port, 5) or len(pids(port)) < 2:
+            assert time.monotonic() < deadline
+    finally:
+        stop(p)
+
+
+def test_max_requests():
+    port = free_port()
+    p = serve(port, "--workers", "1", "--max-requests", "3")
+    try:
+        seen: set[int] = set()
+        deadline = time.monotonic() + 10
+        while len(seen) < 2:
+            assert time.monotonic() < deadline
+            try:
+                seen.add(get(port))
+            except OSError:
+                time.sleep(0.05)
+    finally:
+        stop(p)
+
+
+def test_rolling_restart():
+    port = free_port()
+    p = serve(port, "--workers", "2")
+    errors: list[Exception] = []
+    running = True
+
+    def load():
+        while running:
+            try:
+                get(port)
+            except Exception as e:
+                errors.append(e)
+
+    try:
+        before = pids(port)
+        thread = threading.Thread(target=load)
+        thread.start()
+        p.send_signal(signal.SIGHUP)
+        deadline = time.monotonic() + 20
+        while pids(port) & before:
+            assert time.monotonic() < deadline
+            time.sleep(0.1)
+        running = False
+        thread.join()
+        assert not errors
+    finally:
+        running = False
+        stop(p)
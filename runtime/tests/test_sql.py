@@ -0,0 +1,148 @@
+import asyncio
+from typing import Any
+
+import pytest
+import structlog
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from anyforce.api import admin
+from anyforce.api.exceptions import HTTPForbiddenError
+from anyforce.api.middleware import SQLMiddleware
+from anyforce.api.middleware.sql import QueryStats, current, current_route
+from anyforce.app import create_app
+from anyforce.model import instrument
+from anyforce.model.query_stats import QueryStatistics
+from anyforce.model.slow_query import SlowQueryLog
+
+from .model import Model1
+
+
+def test_fingerprint():
+    assert (
+        instrument.fingerprint(
+            "SELECT `id` FROM `model1` WHERE `name`='a''b' AND `id` IN (1,2, 3) LIMIT 20"
+        )
+        == "SELECT `id` FROM `model1` WHERE `name`=? AND `id` IN (?+) LIMIT ?"
+    )
+    assert instrument.fingerprint("SELECT * FROM t1 WHERE id=$1") == (
+        "SELECT * FROM t1 WHERE id=?"
+    )
+
+
+def test_sql_middleware(database: bool):
+    assert database
+    instrument.install()
+
+    stats: list[QueryStats] = []
+    app = FastAPI()
+    app.add_middleware(SQLMiddleware, server_timing=True, repeated_threshold=2)
+
+    @app.get("/")
+    async def _() -> Any:
+        for i in range(3):
+            await Model1.filter(id=i).first()
+        s = current.get()
+        assert s
+        stats.append(s)
+        # 执行语句时不更新日志上下文
+        assert "db_count" not in structlog.contextvars.get_contextvars()
+        return ""
+
+    with TestClient(app) as client:
+        r = client.get("/")
+    assert r.status_code == 200
+    assert r.headers["Server-Timing"].startswith("db;dur=")
+    assert stats[0].count == 3
+    assert list(stats[0].repeated().values()) == [3]
+    assert stats[0].context()["db_slowest_sql"].endswith("LIMIT ?")
+
+
+def test_sql_middleware_streaming(database: bool):
+    assert database
+    instrument.install()
+
+    app = FastAPI()
+    app.add_middleware(SQLMiddleware, server_timing=True)
+    contexts: list[dict[str, Any]] = []
+
+    @app.get("/")
+    async def _() -> StreamingResponse:
+        await Model1.filter(id=1).first()
+
+        async def body():
+            # 开始响应时绑定
+            contexts.append(structlog.contextvars.get_contextvars())
+            await Model1.filter(id=2).first()
+            yield b"a"
+
+        return StreamingResponse(body())
+
+    with TestClient(app) as client:
+        for r in [client.get("/"), client.get("/")]:
+            assert r.status_code == 200 and r.text == "a"
+    assert contexts[0]["db_count"] == 1
+    assert "db_count" not in structlog.contextvars.get_contextvars()
+
+
+async def test_slow_query_log(database: bool):
+    assert database
+    slow_query_log = SlowQueryLog(threshold=0)
+    slow_query_log.install()
+    try:
+        await Model1.filter(name="slow").first()
+        await asyncio.gather(*slow_query_log.tasks)
+    finally:
+        slow_query_log.uninstall()
+    assert slow_query_log.explained_at
+    assert slow_query_log.values(["a", 1]) == ["<str>", "<int>"]
+
+
+def test_query_stats(database: bool):
+    assert database
+    statistics = QueryStatistics(max_shapes=2)
+    statistics.install(route=current_route)
+
+    app = FastAPI()
+    app.add_middleware(SQLMiddleware)
+    router = APIRouter(prefix="/_admin")
+    admin.bind_query_stats(router, statistics)
+    app.include_router(router)
+
+    @app.get("/models")
+    async def _() -> Any:
+        await Model1.filter(name="a").first()
+        await Model1.filter(name="b").first()
+        await Model1.filter(id=1).count()
+        await Model1.filter(id__in=[1, 2]).all()
+        return ""
+
+    try:
+        with TestClient(app) as client:
+            client.get("/models")
+            r = client.get("/_admin/query_stats", params={"order_by": "count"})
+            assert r.status_code == 200
+            stats = r.json()
+            assert stats["shapes"] == 2
+            assert stats["evicted"] == 1
+            assert stats["data"][0]["routes"] == {"/models": 1}
+
+            client.delete("/_admin/query_stats")
+            assert not statistics.shapes
+    finally:
+        statistics.uninstall()
+
+
+def test_query_stats_admin_dependencies():
+    with pytest.raises(ValueError):
+        create_app("secret", [], {}, query_stats=True)
+
+    def deny():
+        raise HTTPForbiddenError
+
+    app = create_app(
+        "secret", [], {}, query_stats=True, admin_dependencies=[Depends(deny)]
+    )
+    r = TestClient(app).get("/_admin/query_stats")
+    assert r.status_code == 403
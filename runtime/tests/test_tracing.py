@@ -0,0 +1,91 @@
+import orjson
+from fastapi import APIRouter, FastAPI
+from fastapi.security import APIKeyHeader
+from fastapi.testclient import TestClient
+
+from anyforce import tracing
+from anyforce.api import API, PublicAPI
+from anyforce.api.middleware import TracingMiddleware
+from anyforce.model import instrument
+
+from .model import Model1
+
+
+def test_tracer(tmp_path: str):
+    exporter = tracing.FileExporter(f"{tmp_path}/spans.jsonl")
+    tracer = tracing.Tracer(exporter, sample_rate=0)
+    with tracer.trace("root") as root:
+        assert root is None
+        with tracing.span("child") as child:
+            assert child is None
+
+    # 上游已采样则跟随
+    trace_id = "0af7651916cd43dd8448eb211c80319c"
+    with tracer.trace("root", f"00-{trace_id}-b7ad6b7169203331-01") as root:
+        assert root
+        with tracing.span("child", k="v"):
+            pass
+
+    with open(exporter.path, "rb") as f:
+        spans = [orjson.loads(line) for line in f]
+    assert [span["name"] for span in spans] == ["child", "root"]
+    assert {span["trace_id"] for span in spans} == {trace_id}
+    assert spans[0]["parent_id"] == spans[1]["span_id"]
+    assert spans[0]["attributes"] == {"k": "v"}
+
+    otlp = tracing.to_otlp(tracer_spans(spans), "test")
+    assert otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+
+async def test_file_exporter(tmp_path: str):
+    # 事件循环中由线程写入
+    exporter = tracing.FileExporter(f"{tmp_path}/spans.jsonl")
+    with tracing.Tracer(exporter, sample_rate=1).trace("root"):
+        pass
+    assert exporter.task
+    await exporter.task
+    with open(exporter.path, "rb") as f:
+        assert [orjson.loads(line)["name"] for line in f] == ["root"]
+
+
+def test_tracing_security_scheme():
+    # 依赖保持原样, OpenAPI 中的安全定义不丢失
+    get_current_user = APIKeyHeader(name="x-token")
+    app = FastAPI()
+    router = APIRouter(prefix="/models")
+    API(
+        Model1, Model1.form(), Model1.form(required_override=False), get_current_user
+    ).bind(router)
+    app.include_router(router)
+    assert "x-token" in str(app.openapi()["components"]["securitySchemes"])
+
+
+def tracer_spans(spans: list[dict[str, object]]) -> list[tracing.Span]:
+    trace = tracing.Trace(tracing.Tracer(tracing.MemoryExporter()))
+    return [tracing.Span(trace, str(span["name"]), "", {}) for span in spans]
+
+
+def test_tracing_middleware(database: bool):
+    assert database
+    instrument.install()
+
+    exporter = tracing.MemoryExporter()
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, tracer=tracing.Tracer(exporter, 1))
+    router = APIRouter(prefix="/models")
+    PublicAPI(Model1, Model1.form(), Model1.form(required_override=False)).bind(router)
+    app.include_router(router)
+
+    with TestClient(app) as client:
+        r = client.get(
+            "/models/", params={"condition": orjson.dumps({"id": 1}).decode()}
+        )
+        assert r.status_code == 200
+
+    names = [span["name"] for span in exporter.spans]
+    for name in ("auth", "q", "condition", "count", "query", "serialize", "db"):
+        assert name in names
+    root = exporter.spans[-1]
+    assert root["name"] == "GET /models/"
+    assert root["attributes"]["status"] == 200
+    assert all(span["trace_id"] == root["trace_id"] for span in exporter.spans)
@@ -0,0 +1,10 @@
+from typing import Iterable
+
+from anyforce.model import warm_up
+from anyforce.test.fixtures import tortoise_config
+
+
+async def test_warm_up(database: bool, models: Iterable[str], replicas: int):
+    assert database
+    durations = await warm_up(tortoise_config(models, replicas))
+    assert set(durations) == {"default", "replica0"}